@@ -1,12 +1,22 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import IsolationForest
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
-import joblib
 import os
 from datetime import datetime, date
 
+# scikit-learn, numpy and joblib are imported inside the functions that use
+# them, so importing this module (e.g. via analytics_service at worker boot)
+# costs nothing until an AI feature actually runs. Call warm_up() to pay the
+# import cost ahead of the first request instead.
+
+
+def warm_up():
+    """Import the heavy ML dependencies now rather than on first use."""
+    import numpy  # noqa: F401
+    import joblib  # noqa: F401
+    from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: F401
+    from sklearn.linear_model import LogisticRegression  # noqa: F401
+    from sklearn.ensemble import IsolationForest  # noqa: F401
+    from sklearn.metrics.pairwise import cosine_similarity  # noqa: F401
+
+
 # -----------------------------
 # 1️⃣ SEMANTIC EXCUSE ANALYSIS (Lightweight NLP)
 # -----------------------------
@@ -28,6 +38,10 @@ def analyze_excuses(excuse_texts):
             "repetition_flag": False
         }
 
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
     # TF-IDF Vectorization (lightweight, no model download needed)
     # max_features=500 limits vocabulary size → saves RAM
     vectorizer = TfidfVectorizer(max_features=500)
@@ -58,6 +72,10 @@ def train_demo_model():
     Trains a simple logistic regression model for delay risk prediction.
     Uses demo data for college presentation purposes.
     """
+    import numpy as np
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+
     # Demo training dataset
     # Features: [delay_rate, avg_auth, risk_score]
     X = np.array([
@@ -76,7 +94,7 @@ def train_demo_model():
     joblib.dump(model, MODEL_PATH)
 
 
-def predict_delay_risk(delay_rate, avg_auth, risk_score):
+def predict_delay_risk(delay_rate, avg_auth, risk_score, model=None):
     """
     Predicts delay risk based on historical patterns using ML.
     
@@ -84,14 +102,17 @@ def predict_delay_risk(delay_rate, avg_auth, risk_score):
         delay_rate: Percentage of delayed tasks
         avg_auth: Average authenticity score
         risk_score: Average risk score
+        model: Fitted classifier (e.g. the promoted version from
+            services.model_service). Falls back to the demo model if omitted.
         
     Returns:
         dict with delay_probability and risk_flag
     """
-    if not os.path.exists(MODEL_PATH):
-        train_demo_model()
-
-    model = joblib.load(MODEL_PATH)
+    if model is None:
+        import joblib
+        if not os.path.exists(MODEL_PATH):
+            train_demo_model()
+        model = joblib.load(MODEL_PATH)
 
     features = [[delay_rate, avg_auth, risk_score]]
 
@@ -122,6 +143,9 @@ def detect_anomaly(delay_history):
             "anomaly_score": 0
         }
 
+    import numpy as np
+    from sklearn.ensemble import IsolationForest
+
     # Keep only last 10 records for efficiency
     delay_history = delay_history[-10:]
 
@@ -140,6 +164,8 @@ def detect_anomaly(delay_history):
 # -----------------------------
 # 4️⃣ TIME-DECAY TRUST SCORING (Intelligent Weighting)
 # -----------------------------
+DECAY_RATE = 0.05
+
 def calculate_time_decay_score(delay_records):
     """
     Calculates trust score with time-decay weighting.
@@ -159,6 +185,8 @@ def calculate_time_decay_score(delay_records):
             "decay_applied": False
         }
     
+    import numpy as np
+
     today = date.today()
     weighted_sum = 0
     weight_sum = 0
@@ -174,7 +202,7 @@ def calculate_time_decay_score(delay_records):
         days_old = (today - submitted_date).days
         
         # Time-decay weight: exp(-0.05 * days_old)
-        weight = np.exp(-0.05 * days_old)
+        weight = np.exp(-DECAY_RATE * days_old)
         
         # Weighted score
         authenticity = record.get('authenticity', 0)
@@ -188,6 +216,36 @@ def calculate_time_decay_score(delay_records):
         "decay_applied": True
     }
 
+def calculate_time_decay_score_from_state(weighted_sum, weight_sum):
+    """
+    Calculates the time-decay trust score from a running decay state.
+
+    The state is kept per user and updated on every delay insert (see
+    repository.delays_repo.create_delay), so the score covers the full
+    history in constant time. Both sums decay by the same
+    exp(-0.05 * days) factor, so their ratio is already current and needs
+    no rescaling here.
+
+    Args:
+        weighted_sum: Decayed sum of authenticity * weight
+        weight_sum: Decayed sum of weights
+
+    Returns:
+        dict with weighted_trust_score and decay_applied
+    """
+    if not weight_sum or weight_sum <= 0:
+        return {
+            "weighted_trust_score": 0,
+            "decay_applied": False
+        }
+
+    weighted_score = float(weighted_sum) / float(weight_sum)
+
+    return {
+        "weighted_trust_score": round(weighted_score, 2),
+        "decay_applied": True
+    }
+
 # -----------------------------
 # 5️⃣ BEHAVIORAL RELIABILITY SCORE (WRS - Composite AI Metric)
 # -----------------------------
@@ -57,6 +57,20 @@ import routes.team_routes
 import routes.export_routes
 import routes.sample_data_routes  # Sample data generator for testing AI features
 
+# Periodically re-queue delay analyses left pending by a previous process.
+# Started with the first request rather than on import, so scripts and
+# benchmarks that import the app do not start it.
+from services.delay_analysis_service import start_pending_recovery
+
+@app.before_request
+def _start_background_workers():
+    start_pending_recovery()
+
+# AI/ML dependencies load lazily on first use; opt in to paying that cost at boot
+if os.getenv("AI_WARMUP", "").lower() in ("1", "true", "yes"):
+    from services.analytics_service import warm_up_ai
+    warm_up_ai()
+
 # --- Run Server ---
 if __name__ == '__main__':
     print("🚀 Starting Flask server...")
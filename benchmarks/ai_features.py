@@ -0,0 +1,276 @@
+"""
+Benchmark harness for the five AI features in ai_demo.
+
+Generates synthetic delay data at each requested scale, times every feature
+over several repeats (p50/p90/p99 latency) and measures peak Python heap in
+a separate tracemalloc pass. Results can be saved as a JSON baseline and
+compared against later runs to catch regressions.
+
+    python benchmarks/ai_features.py
+    python benchmarks/ai_features.py --sizes 10,1000 --save benchmarks/baselines/ai_features.json
+    python benchmarks/ai_features.py --compare benchmarks/baselines/ai_features.json
+
+Features whose cost is quadratic in the input (analyze_excuses builds an
+n x n similarity matrix) are skipped above --max-pairwise and reported as such.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ai_demo
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 1_000_000]
+
+_EXCUSE_TEMPLATES = [
+    "Server issues caused delays on the {thing}",
+    "I was not feeling well and could not finish the {thing}",
+    "Heavy rain flooded the site so the {thing} slipped",
+    "Material delivery for the {thing} was delayed by the supplier",
+    "Network issue while uploading the {thing}",
+    "Waiting on the client to approve the {thing}",
+    "Team member absent so the {thing} is behind schedule",
+]
+_THINGS = ["report", "deployment", "audit", "design", "migration", "invoice", "review", "release"]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+
+def make_dataset(n: int, seed: int = 42) -> dict:
+    """Build n synthetic delays plus the derived inputs each feature needs."""
+    rng = random.Random(seed)
+    today = datetime.now()
+
+    texts, records, auth_series = [], [], []
+    for _ in range(n):
+        text = rng.choice(_EXCUSE_TEMPLATES).format(thing=rng.choice(_THINGS))
+        auth = rng.randint(20, 95)
+        texts.append(text)
+        auth_series.append(float(auth))
+        records.append({"authenticity": auth, "submitted_at": today - timedelta(days=rng.randint(0, 365))})
+
+    # Running decay state equivalent to the records (what user_trust_decay holds)
+    weighted_sum = weight_sum = 0.0
+    for r in records:
+        w = math.exp(-ai_demo.DECAY_RATE * (today.date() - r["submitted_at"].date()).days)
+        weighted_sum += r["authenticity"] * w
+        weight_sum += w
+
+    avg_auth = statistics.fmean(auth_series)
+    return {
+        "texts": texts,
+        "records": records,
+        "auth_series": auth_series,
+        "decay_state": (weighted_sum, weight_sum),
+        "metrics": {"delay_rate": rng.uniform(5, 80), "avg_auth": avg_auth, "avg_risk_val": rng.uniform(20, 100)},
+    }
+
+
+def make_model():
+    """Fit the demo-shaped classifier in memory so nothing is written to disk."""
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform([0, 20, 0], [100, 100, 100], size=(500, 3))
+    y = (X[:, 0] > 35).astype(int)
+    return LogisticRegression(max_iter=1000).fit(X, y)
+
+
+# ---------------------------------------------------------------------------
+# Feature cases — each returns a zero-arg callable for a given dataset.
+# ---------------------------------------------------------------------------
+
+def _case_analyze_excuses(data, model):
+    return lambda: ai_demo.analyze_excuses(data["texts"])
+
+
+def _case_predict_delay_risk(data, model):
+    m = data["metrics"]
+    return lambda: ai_demo.predict_delay_risk(m["delay_rate"], m["avg_auth"], m["avg_risk_val"], model=model)
+
+
+def _case_detect_anomaly(data, model):
+    return lambda: ai_demo.detect_anomaly(data["auth_series"])
+
+
+def _case_time_decay(data, model):
+    return lambda: ai_demo.calculate_time_decay_score(data["records"])
+
+
+def _case_time_decay_state(data, model):
+    weighted_sum, weight_sum = data["decay_state"]
+    return lambda: ai_demo.calculate_time_decay_score_from_state(weighted_sum, weight_sum)
+
+
+def _case_wrs(data, model):
+    m = data["metrics"]
+    return lambda: ai_demo.calculate_wrs(m["avg_auth"], m["avg_risk_val"], m["delay_rate"], 10, 0)
+
+
+FEATURES = {
+    "analyze_excuses":                       (_case_analyze_excuses, True),
+    "predict_delay_risk":                    (_case_predict_delay_risk, False),
+    "detect_anomaly":                        (_case_detect_anomaly, False),
+    "calculate_time_decay_score":            (_case_time_decay, False),
+    "calculate_time_decay_score_from_state": (_case_time_decay_state, False),
+    "calculate_wrs":                         (_case_wrs, False),
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _repeats_for(n: int, budget: int) -> int:
+    """Fewer repeats at larger scales so the full sweep stays tractable."""
+    if n <= 1_000:
+        return budget
+    if n <= 100_000:
+        return max(budget // 5, 3)
+    return 3
+
+
+def measure(fn, repeats: int) -> dict:
+    fn()  # warm-up: first-call imports and caches are not what we're measuring
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "repeats": repeats,
+        "p50_ms": round(_percentile(timings, 50), 4),
+        "p90_ms": round(_percentile(timings, 90), 4),
+        "p99_ms": round(_percentile(timings, 99), 4),
+        "min_ms": round(timings[0], 4),
+        "max_ms": round(timings[-1], 4),
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def run(sizes: list[int], features: list[str], repeats: int, max_pairwise: int) -> dict:
+    model = make_model()
+    results = {name: {} for name in features}
+
+    for n in sizes:
+        data = make_dataset(n)
+        for name in features:
+            build, quadratic = FEATURES[name]
+            if quadratic and n > max_pairwise:
+                results[name][str(n)] = {"skipped": f"O(n^2) memory above --max-pairwise={max_pairwise}"}
+                print(f"  {name:<40} n={n:<9} skipped (quadratic)")
+                continue
+            r = measure(build(data, model), _repeats_for(n, repeats))
+            results[name][str(n)] = r
+            print(f"  {name:<40} n={n:<9} p50 {r['p50_ms']:>10.3f} ms  p99 {r['p99_ms']:>10.3f} ms  "
+                  f"peak {r['peak_mem_kb']:>10.1f} KB")
+        del data
+
+    return {
+        "benchmark": "ai_features",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": f"{platform.system()} {platform.machine()}",
+        "sizes": sizes,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    """
+    Return a line per (feature, size) whose p50 regressed beyond tolerance.
+
+    Sub-millisecond cases jitter by more than any sensible ratio, so a
+    regression also has to be at least min_delta_ms slower in absolute terms.
+    """
+    regressions = []
+    print(f"\nComparison against baseline from {baseline.get('created_at')} (tolerance x{tolerance}):")
+    for name, by_size in current["results"].items():
+        for size, r in by_size.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            if not base or "p50_ms" not in base or "p50_ms" not in r:
+                continue
+            ratio = r["p50_ms"] / base["p50_ms"] if base["p50_ms"] else float("inf")
+            mem_ratio = r["peak_mem_kb"] / base["peak_mem_kb"] if base["peak_mem_kb"] else 1.0
+            regressed = ratio > tolerance and r["p50_ms"] - base["p50_ms"] >= min_delta_ms
+            marker = "REGRESSION" if regressed else ""
+            print(f"  {name:<40} n={size:<9} p50 x{ratio:>6.2f}  mem x{mem_ratio:>6.2f}  {marker}")
+            if regressed:
+                regressions.append(f"{name} n={size}: p50 {base['p50_ms']} -> {r['p50_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated delay counts (default: 10,1000,100000,1000000)")
+    parser.add_argument("--features", default=",".join(FEATURES),
+                        help="Comma-separated subset of features to run")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed repeats at small scales (default: 50)")
+    parser.add_argument("--max-pairwise", type=int, default=5_000,
+                        help="Largest n for features with O(n^2) memory (default: 5000)")
+    parser.add_argument("--save", help="Write results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="p50 ratio above which a result counts as a regression (default: 1.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this many ms (default: 0.5)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    features = [f for f in args.features.split(",") if f]
+    unknown = set(features) - set(FEATURES)
+    if unknown:
+        parser.error(f"unknown features: {', '.join(sorted(unknown))}")
+
+    print(f"Benchmarking {len(features)} features at sizes {sizes}")
+    report = run(sizes, features, args.repeats, args.max_pairwise)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
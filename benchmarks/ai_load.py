@@ -0,0 +1,113 @@
+"""
+Offline load test of the AI paths against the local LLM stand-in
+(scripts/llm_standin.py): excuse analysis (ai_service.analyze_excuse_with_ai,
+with micro-batching) and the chatbot (chat_service.get_chat_response).
+
+Starts a stand-in in-process unless --base-url points at a running one.
+Every excuse is unique and the persistent cache is off, so each call
+reaches the LLM path. Reports throughput, latency percentiles and how many
+calls fell back to the neutral signal / the "unavailable" message.
+
+    python benchmarks/ai_load.py
+    python benchmarks/ai_load.py --concurrency 32 --calls 500 --latency lognormal:300,0.6 \\
+        --error-rate 0.05 --rate-limit-rate 0.05
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LLM_CACHE_PERSIST", "0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from scripts.llm_standin import StandinConfig, start_in_thread
+from services import groq_clients
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run(name: str, fn, calls: int, concurrency: int, is_fallback) -> dict:
+    def timed(i):
+        start = time.perf_counter()
+        result = fn(i)
+        return (time.perf_counter() - start) * 1000, is_fallback(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(ms for ms, _ in results)
+    row = {
+        "calls_per_s": round(calls / elapsed, 1),
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(percentile(timings, 0.95), 1),
+        "p99_ms": round(percentile(timings, 0.99), 1),
+        "fallbacks": sum(1 for _, fallback in results if fallback),
+    }
+    print(f"{name:<10} {row['calls_per_s']:>9} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+          f"{row['p99_ms']:>9} {row['fallbacks']:>9}")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Calls per path (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent callers (default: 16)")
+    parser.add_argument("--base-url", help="Use a running stand-in instead of starting one")
+    parser.add_argument("--latency", default="lognormal:150,0.5", help="Stand-in latency spec")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_in_thread(StandinConfig(
+            latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        ))
+    groq_clients.GROQ_BASE_URL = base_url
+    groq_clients.close_clients()
+
+    from services import ai_service, chat_service
+    ai_service.GROQ_API_KEY = ai_service.GROQ_API_KEY_SECONDARY = "standin"
+    chat_service.GROQ_API_KEY = "standin"
+    os.environ["GROQ_API_KEY_SECONDARY"] = "standin"
+
+    neutral = ai_service.default_ai_signal()
+    run_id = int(time.time())
+    print(f"stand-in {base_url}, {args.calls} calls per path at concurrency {args.concurrency}\n")
+    print(f"{'path':<10} {'calls/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fallback':>9}")
+    results = {
+        "excuse": run(
+            "excuse",
+            lambda i: ai_service.analyze_excuse_with_ai(f"Load test {run_id}-{i}: the vendor shipped the wrong parts"),
+            args.calls, args.concurrency, lambda r: r == neutral,
+        ),
+        "chat": run(
+            "chat",
+            lambda i: chat_service.get_chat_response(f"How should I plan task {i}?", [], "load test"),
+            args.calls, args.concurrency, lambda r: r.startswith("⚠️"),
+        ),
+    }
+    print(f"\nexcuse batching: {ai_service.get_batch_stats()}")
+
+    if server:
+        server.shutdown()
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"benchmark": "ai_load", "args": vars(args), "results": results}, f, indent=2)
+        print(f"results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
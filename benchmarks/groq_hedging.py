@@ -0,0 +1,109 @@
+"""
+Latency of Groq calls against a local stub server: per-call clients vs the
+pooled clients in services.groq_clients, with and without hedging.
+
+The stub is scripts/llm_standin.py. The primary model is usually
+fast but has a slow tail (--tail-rate of calls take --tail-ms); the
+secondary is consistently moderate. Reports p50/p95/max per variant and how
+many TCP connections each one opened. No API keys or network needed.
+
+    python benchmarks/groq_hedging.py
+    python benchmarks/groq_hedging.py --calls 200 --tail-rate 0.1 --tail-ms 3000 --hedge-ms 500
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq import Groq
+
+from scripts.llm_standin import Standin, StandinConfig, start_in_thread
+from services import groq_clients
+
+PRIMARY, SECONDARY = "llama-3.3-70b-versatile", "llama3-8b-8192"
+
+
+# ---------------------------------------------------------------------------
+# Variants
+# ---------------------------------------------------------------------------
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def per_call_client(base_url: str):
+    """The pre-pooling pattern: a fresh client per call, sequential fallback."""
+    for model in (PRIMARY, SECONDARY):
+        try:
+            client = Groq(api_key="stub", base_url=base_url)
+            return client.chat.completions.create(model=model, messages=MESSAGES).choices[0].message.content
+        except Exception:
+            continue
+    return None
+
+
+def pooled(hedge_after: float):
+    content, _ = groq_clients.complete([("stub", PRIMARY), ("stub", SECONDARY)], MESSAGES, hedge_after=hedge_after)
+    return content
+
+
+def measure(name: str, fn, calls: int, standin: Standin) -> dict:
+    standin.rng.seed(1)  # same slow calls for every variant
+    before = standin.stats["connections"]
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        assert fn(), f"{name}: no response"
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 1),
+        "max_ms": round(timings[-1], 1),
+        "connections": standin.stats["connections"] - before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100, help="Calls per variant (default: 100)")
+    parser.add_argument("--fast-ms", type=float, default=20, help="Usual primary latency (default: 20)")
+    parser.add_argument("--tail-ms", type=float, default=1500, help="Slow primary latency (default: 1500)")
+    parser.add_argument("--tail-rate", type=float, default=0.1, help="Share of slow primary calls (default: 0.1)")
+    parser.add_argument("--secondary-ms", type=float, default=120, help="Secondary latency (default: 120)")
+    parser.add_argument("--hedge-ms", type=float, default=250, help="Hedge budget (default: 250)")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    server, base_url = start_in_thread(StandinConfig(
+        latency=f"fixed:{args.secondary_ms}",
+        model_latency={PRIMARY: f"tail:{args.fast_ms},{args.tail_ms},{args.tail_rate}"},
+    ))
+    standin = server.standin
+
+    groq_clients.GROQ_BASE_URL = base_url
+    groq_clients.close_clients()
+
+    results = {
+        "per_call_client": measure("per-call", lambda: per_call_client(base_url), args.calls, standin),
+        "pooled":          measure("pooled", lambda: pooled(0), args.calls, standin),
+        "pooled_hedged":   measure("hedged", lambda: pooled(args.hedge_ms / 1000), args.calls, standin),
+    }
+    server.shutdown()
+
+    print(f"{'variant':<16} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'conns':>6}")
+    for name, row in results.items():
+        print(f"{name:<16} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['max_ms']:>8} {row['connections']:>6}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"benchmark": "groq_hedging", "args": vars(args), "results": results}, f, indent=2)
+        print(f"results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: detect_repeated_excuse vs the per-pair SequenceMatcher baseline.
+
+Compares the original loop (similarity() on every past reason) with the
+filtered implementation in utils.pattern_engine, with and without the
+rapidfuzz accelerator, over realistic excuse lengths and history sizes.
+Also checks that every variant returns the same decision as the baseline.
+
+    python benchmarks/repeated_excuse.py
+    python benchmarks/repeated_excuse.py --history 5,50,500,5000 --trials 200 --json out.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import pattern_engine
+
+_WORDS = (
+    "server network outage client approval supplier delivery delayed rain flood site "
+    "report deployment migration audit review team member sick doctor appointment "
+    "unexpected issue system problem personal reason waiting blocked dependency vendor"
+).split()
+
+
+def baseline(current_reason: str, past_reasons: list) -> bool:
+    """The pre-optimisation implementation, kept verbatim for comparison."""
+    for old in past_reasons:
+        if old and pattern_engine.similarity(current_reason, old) > 0.85:
+            return True
+    return False
+
+
+def make_reason(rng: random.Random, min_words: int = 20, max_words: int = 80) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def near_duplicate(rng: random.Random, text: str) -> str:
+    words = text.split()
+    for _ in range(max(1, len(words) // 25)):
+        words[rng.randrange(len(words))] = rng.choice(_WORDS)
+    return " ".join(words)
+
+
+def make_cases(history_size: int, trials: int, seed: int = 7) -> list[tuple[str, list]]:
+    rng = random.Random(seed)
+    cases = []
+    for i in range(trials):
+        current = make_reason(rng)
+        history = [make_reason(rng) for _ in range(history_size)]
+        if i % 4 == 0:  # a quarter of submissions really are repeats
+            history[rng.randrange(history_size)] = near_duplicate(rng, current)
+        cases.append((current, history))
+    return cases
+
+
+def time_variant(fn, cases) -> tuple[float, list]:
+    decisions = []
+    start = time.perf_counter()
+    for current, history in cases:
+        decisions.append(fn(current, history))
+    return (time.perf_counter() - start) / len(cases) * 1000, decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="5,50,500", help="Comma-separated history sizes (default: 5,50,500)")
+    parser.add_argument("--trials", type=int, default=100, help="Submissions per history size (default: 100)")
+    parser.add_argument("--json", dest="json_path", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    accelerator = pattern_engine._indel_ratio
+    results = {}
+
+    for size in [int(s) for s in args.history.split(",") if s]:
+        cases = make_cases(size, args.trials)
+        base_ms, expected = time_variant(baseline, cases)
+        row = {"baseline_ms": round(base_ms, 4)}
+
+        pattern_engine._indel_ratio = None
+        filtered_ms, got = time_variant(pattern_engine.detect_repeated_excuse, cases)
+        assert got == expected, "filtered path disagrees with baseline"
+        row["filtered_ms"] = round(filtered_ms, 4)
+
+        if accelerator is not None:
+            pattern_engine._indel_ratio = accelerator
+            fast_ms, got = time_variant(pattern_engine.detect_repeated_excuse, cases)
+            assert got == expected, "rapidfuzz path disagrees with baseline"
+            row["rapidfuzz_ms"] = round(fast_ms, 4)
+
+        row["repeat_rate"] = round(sum(expected) / len(expected), 3)
+        results[str(size)] = row
+
+        line = f"history={size:<6} baseline {base_ms:9.3f} ms  filtered {filtered_ms:9.3f} ms (x{base_ms / filtered_ms:5.1f})"
+        if "rapidfuzz_ms" in row:
+            line += f"  rapidfuzz {row['rapidfuzz_ms']:9.3f} ms (x{base_ms / row['rapidfuzz_ms']:5.1f})"
+        print(line + "  [decisions identical]")
+
+    pattern_engine._indel_ratio = accelerator
+    if accelerator is None:
+        print("rapidfuzz not installed — accelerated path not measured")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"benchmark": "repeated_excuse", "per_submission": results}, f, indent=2)
+        print(f"results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Parity check + throughput for the vectorised authenticity scorer.
+
+Scores the same random delays with calculate_authenticity_score (one call
+per row) and calculate_authenticity_scores_batch (columnar, NumPy), asserts
+every sub-score, total and risk band is identical, then reports rows/second
+for both. Exits non-zero on any mismatch.
+
+    python benchmarks/scoring_batch.py
+    python benchmarks/scoring_batch.py --sizes 1000,100000 --repeats 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scoring_engine import (
+    calculate_authenticity_score,
+    calculate_authenticity_scores_batch,
+    text_columns,
+)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+_REASONS = [
+    "",
+    "   ",
+    "sick",
+    "Server issues caused delays",
+    "I was not feeling well and could not finish the report on time",
+    "Traffic was bad",
+    "Heavy rain flooded the site so the audit slipped by two days",
+    "Some personal reasons came up and network issues too",
+    "Material delivery for the migration was delayed by the supplier again this week",
+]
+_PRIORITIES = ["High", "Medium", "Low"]
+# Casing/whitespace variants and junk the scalar path treats as Low (parity only;
+# unknown values log a warning per scalar call, which would skew timings).
+_PARITY_PRIORITIES = _PRIORITIES + ["high", " medium ", "LOW", None, "", "Urgent"]
+
+
+def make_rows(n: int, seed: int = 7, priorities: list = _PRIORITIES) -> dict:
+    rng = random.Random(seed)
+    return {
+        "reasons":           [rng.choice(_REASONS) for _ in range(n)],
+        "delay_counts":      [rng.randint(-1, 9) for _ in range(n)],
+        "priorities":        [rng.choice(priorities) for _ in range(n)],
+        "hours_left":        [rng.randint(-72, 72) for _ in range(n)],
+        "has_proof":         [rng.random() < 0.3 for _ in range(n)],
+        "is_after_deadline": [rng.random() < 0.4 for _ in range(n)],
+        "ai_scores":         [rng.randint(-3, 20) for _ in range(n)],
+    }
+
+
+def score_scalar(rows: dict) -> list:
+    return [
+        calculate_authenticity_score(r, d, p, h, pr, late, ai)
+        for r, d, p, h, pr, late, ai in zip(
+            rows["reasons"], rows["delay_counts"], rows["priorities"], rows["hours_left"],
+            rows["has_proof"], rows["is_after_deadline"], rows["ai_scores"],
+        )
+    ]
+
+
+def score_batch(rows: dict):
+    word_counts, generic_hits = text_columns(rows["reasons"])
+    return _score_columns(rows, word_counts, generic_hits)
+
+
+def _score_columns(rows: dict, word_counts, generic_hits):
+    return calculate_authenticity_scores_batch(
+        word_counts, generic_hits, rows["delay_counts"], rows["priorities"], rows["hours_left"],
+        rows["has_proof"], rows["is_after_deadline"], rows["ai_scores"],
+    )
+
+
+def check_parity(rows: dict) -> int:
+    """Return the number of rows whose batch result differs from the scalar one."""
+    scalar = score_scalar(rows)
+    batch = score_batch(rows)
+    mismatches = 0
+    for i, expected in enumerate(scalar):
+        got = batch.row(i)
+        if got != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  ❌ row {i}: scalar {expected} != batch {got}")
+    return mismatches
+
+
+def rows_per_second(fn, rows: dict, n: int, repeats: int) -> float:
+    fn(rows)  # warm-up (phrase-matcher cache, NumPy import)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - start)
+    return n / statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated row counts (default: 1000,100000,1000000)")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed repeats per size (default: 3)")
+    parser.add_argument("--parity-rows", type=int, default=50_000,
+                        help="Rows compared field-by-field before timing (default: 50000)")
+    args = parser.parse_args()
+
+    print(f"Parity check on {args.parity_rows} random rows...")
+    mismatches = check_parity(make_rows(args.parity_rows, seed=1, priorities=_PARITY_PRIORITIES))
+    if mismatches:
+        print(f"❌ {mismatches} mismatching rows")
+        sys.exit(1)
+    print("✅ Batch results identical to scalar path\n")
+
+    # "columns only" reuses precomputed text columns, as a what-if sweep over
+    # the same delays would.
+    print(f"{'rows':>10}  {'scalar rows/s':>15}  {'batch rows/s':>15}  {'columns only':>15}  {'speedup':>8}")
+    for n in [int(s) for s in args.sizes.split(",") if s]:
+        rows = make_rows(n)
+        word_counts, generic_hits = text_columns(rows["reasons"])
+        scalar = rows_per_second(score_scalar, rows, n, args.repeats)
+        batch = rows_per_second(score_batch, rows, n, args.repeats)
+        columns = rows_per_second(lambda r: _score_columns(r, word_counts, generic_hits), rows, n, args.repeats)
+        print(f"{n:>10}  {scalar:>15,.0f}  {batch:>15,.0f}  {columns:>15,.0f}  {batch / scalar:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Worker startup benchmark — `python -X importtime` report for the app import.
+
+Runs `import <module>` (default: app) in fresh interpreters, parses the
+importtime trace and reports total boot import time, the slowest direct
+imports, and whether the heavy ML stack was pulled in at boot.
+
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --runs 5 --top 15 --json benchmarks/results/startup.json
+    AI_WARMUP=1 python benchmarks/startup_importtime.py   # cost with warm-up enabled
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that should only load when an AI feature is first used.
+HEAVY_PACKAGES = ("sklearn", "numpy", "scipy", "joblib")
+
+
+def run_importtime(module: str) -> list[tuple[int, int, str]]:
+    """Return (self_us, cumulative_us, qualified_name) for every import line."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"import {module} failed:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def _depth(name: str) -> int:
+    # Nesting is encoded as two extra spaces per level after the separator.
+    return (len(name) - len(name.lstrip()) - 1) // 2
+
+
+def summarise(rows: list[tuple[int, int, str]], module: str, top: int) -> dict:
+    total_us = next((cum for _, cum, name in rows if _depth(name) == 0 and name.strip() == module), 0)
+    loaded = {name.strip().split(".")[0] for _, _, name in rows}
+
+    # Direct imports of the benchmarked module are the actionable ones.
+    children = [(cum, name.strip()) for _, cum, name in rows if _depth(name) == 1]
+
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(rows),
+        "heavy_loaded_at_boot": sorted(p for p in HEAVY_PACKAGES if p in loaded),
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cum / 1000, 1)}
+            for cum, name in sorted(children, reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to sample (default: 3)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports to list")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    reports = [summarise(run_importtime(args.module), args.module, args.top) for _ in range(args.runs)]
+    totals = [r["total_ms"] for r in reports]
+    report = {
+        "benchmark": "startup_importtime",
+        "module": args.module,
+        "ai_warmup": os.getenv("AI_WARMUP", ""),
+        "runs": args.runs,
+        "total_ms": {"median": statistics.median(totals), "min": min(totals), "max": max(totals)},
+        "modules_imported": reports[-1]["modules_imported"],
+        "heavy_loaded_at_boot": reports[-1]["heavy_loaded_at_boot"],
+        "slowest": reports[-1]["slowest"],
+    }
+
+    print(f"import {args.module}: median {report['total_ms']['median']} ms "
+          f"(min {report['total_ms']['min']}, max {report['total_ms']['max']}) over {args.runs} runs")
+    print(f"modules imported: {report['modules_imported']}")
+    print(f"heavy ML packages at boot: {', '.join(report['heavy_loaded_at_boot']) or 'none'}")
+    print(f"slowest direct imports of {args.module}:")
+    for item in report["slowest"]:
+        print(f"  {item['cumulative_ms']:>8.1f} ms  {item['module']}")
+
+    if args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
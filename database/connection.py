@@ -194,6 +194,46 @@ def get_db_cursor(cursor_factory=RealDictCursor):
         release_conn(conn, close=close_conn)
 
 
+class UnitOfWork:
+    """
+    One pooled connection and one transaction for a whole service operation.
+
+    Repository functions that accept cursor= run on uow.cursor, so a request's
+    reads and writes share a single checkout (one liveness check, one
+    commit) instead of opening a connection each. Commits on a clean exit
+    and rolls back if the block raises. Callbacks registered with
+    after_commit run only once the commit succeeded, e.g. queueing
+    background work that must see the new rows.
+
+    Example:
+        with UnitOfWork() as uow:
+            task = get_task_by_id(task_id, cursor=uow.cursor)
+            update_task_status(task_id, 'Delayed', cursor=uow.cursor)
+            uow.after_commit(notify, task_id)
+    """
+
+    def __init__(self, cursor_factory=RealDictCursor):
+        self._context = get_db_cursor(cursor_factory=cursor_factory)
+        self._after_commit = []
+        self.cursor = None
+
+    def after_commit(self, fn, *args, **kwargs):
+        self._after_commit.append((fn, args, kwargs))
+
+    def __enter__(self):
+        self.cursor = self._context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # get_db_cursor commits, or rolls back and re-raises
+        self._context.__exit__(exc_type, exc, tb)
+        self.cursor = None
+        if exc_type is None:
+            for fn, args, kwargs in self._after_commit:
+                fn(*args, **kwargs)
+        return False
+
+
 def execute_query(query, params=None, fetch=True, cursor_factory=RealDictCursor):
     """
     Execute a query with automatic connection management.
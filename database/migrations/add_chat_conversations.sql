@@ -0,0 +1,19 @@
+-- Server-side chatbot conversations (services/chat_session_service.py).
+-- summary holds the turns already folded away; messages holds the recent
+-- turns verbatim ([{role, content}, ...]). Written behind an in-memory
+-- cache; conversations idle longer than CHAT_SESSION_RETENTION_DAYS are
+-- deleted by compaction.
+CREATE TABLE IF NOT EXISTS chat_conversations (
+    id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL DEFAULT '',
+    messages JSONB NOT NULL DEFAULT '[]',
+    turn_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_conversations_user_updated ON chat_conversations(user_id, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_chat_conversations_updated_at ON chat_conversations(updated_at);
+
+ALTER TABLE chat_conversations ENABLE ROW LEVEL SECURITY;
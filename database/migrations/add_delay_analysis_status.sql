@@ -0,0 +1,22 @@
+-- Delays are saved before AI analysis and scored by a background worker
+-- (services/delay_analysis_service.py), so submit latency does not depend on
+-- the LLM.
+--   pending_analysis  saved, waiting for the worker (score/risk are NULL)
+--   analyzed          scored; user_pattern_state / user_trust_decay updated
+--   analysis_failed   worker gave up after retries
+-- analysis_claimed_at is when a worker last picked the row up (or gave up
+-- on it); pending rows with a stale claim are re-queued after a restart.
+-- analysis_failures counts the rounds that ended in analysis_failed; failed
+-- rows are put back to pending_analysis an hour later, up to 3 rounds.
+ALTER TABLE delays ADD COLUMN IF NOT EXISTS analysis_status VARCHAR(20) NOT NULL DEFAULT 'analyzed';
+ALTER TABLE delays ADD COLUMN IF NOT EXISTS analysis_claimed_at TIMESTAMP;
+ALTER TABLE delays ADD COLUMN IF NOT EXISTS analysis_failures INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE delays DROP CONSTRAINT IF EXISTS delays_analysis_status_check;
+ALTER TABLE delays ADD CONSTRAINT delays_analysis_status_check
+    CHECK (analysis_status IN ('pending_analysis', 'analyzed', 'analysis_failed'));
+
+CREATE INDEX IF NOT EXISTS idx_delays_pending_analysis
+    ON delays(analysis_claimed_at) WHERE analysis_status = 'pending_analysis';
+CREATE INDEX IF NOT EXISTS idx_delays_failed_analysis
+    ON delays(analysis_claimed_at) WHERE analysis_status = 'analysis_failed';
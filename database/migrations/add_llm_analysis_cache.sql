@@ -0,0 +1,15 @@
+-- Persistent tier of the excuse-analysis cache (services/llm_cache.py).
+-- cache_key = sha256 of (normalised sanitised excuse, prompt version, model);
+-- result is the validated AI signal. Rows older than LLM_CACHE_TTL_SECONDS
+-- are ignored on read and overwritten on the next store.
+CREATE TABLE IF NOT EXISTS llm_analysis_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(32) NOT NULL,
+    result JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_analysis_cache_created_at ON llm_analysis_cache(created_at);
+
+ALTER TABLE llm_analysis_cache ENABLE ROW LEVEL SECURITY;
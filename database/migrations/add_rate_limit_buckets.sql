@@ -0,0 +1,11 @@
+-- Shared token buckets for services/rate_limiter.py (RATE_LIMIT_BACKEND=postgres).
+-- tokens is the bucket level at updated_at (epoch seconds, database clock);
+-- the limiter refills it lazily on the next request. UNLOGGED: losing the
+-- rows in a crash only resets everyone to a full bucket.
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key VARCHAR(100) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL
+);
+
+ALTER TABLE rate_limit_buckets ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,42 @@
+-- Full-text search for /search (services/search_service.py).
+-- Generated tsvector columns are kept up to date by Postgres on every
+-- insert/update; GIN indexes make `search_tsv @@ tsquery` an index lookup.
+-- Titles/reasons/names weigh more (A) than descriptions/emails (B) and the
+-- status, priority and risk labels (C) in ts_rank_cd.
+-- Text is indexed both stemmed ('english', for whole words and synonyms)
+-- and unstemmed ('simple', so a half-typed prefix like "meetin:*" still
+-- matches "meeting", whose English lexeme is "meet").
+-- A generated column's expression can't be altered, so the columns are
+-- dropped (with their indexes) and re-added: re-running the migration
+-- always leaves the current definition. Each run rewrites the three tables.
+BEGIN;
+
+ALTER TABLE tasks DROP COLUMN IF EXISTS search_tsv;
+ALTER TABLE delays DROP COLUMN IF EXISTS search_tsv;
+ALTER TABLE users DROP COLUMN IF EXISTS search_tsv;
+
+ALTER TABLE tasks ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(status, '') || ' ' || coalesce(priority, '')), 'C')
+) STORED;
+
+ALTER TABLE delays ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(reason_text, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(reason_text, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(risk_level, '')), 'C')
+) STORED;
+
+-- Names and emails are not stemmed
+ALTER TABLE users ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(email, '')), 'B')
+) STORED;
+
+CREATE INDEX idx_tasks_search_tsv ON tasks USING GIN (search_tsv);
+CREATE INDEX idx_delays_search_tsv ON delays USING GIN (search_tsv);
+CREATE INDEX idx_users_search_tsv ON users USING GIN (search_tsv);
+
+COMMIT;
@@ -0,0 +1,10 @@
+-- Fuzzy lookups of people and task titles on top of full-text search
+-- (services/search_service.py and the assignee picker, GET /tasks/assignees).
+-- pg_trgm GIN indexes serve the word-similarity operator (<%) and
+-- ILIKE '%...%' on these columns, so partial names, emails and typos are
+-- index lookups.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON users USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
@@ -0,0 +1,50 @@
+-- Per-user pattern-detection state, updated by create_delay in the same
+-- transaction as the delay insert so run_pattern_detection_from_state reads
+-- one row instead of re-deriving everything from recent delays.
+--   late_count   delays submitted after the task deadline
+--   edge_count   delays submitted 0-1 hours before the deadline
+--   timed_count  delays whose hours-before-deadline was known
+--   recent_risks / recent_reasons  newest-first ring buffers
+--     (sizes: utils.pattern_engine.RISK_WINDOW / REASON_WINDOW = 5 / 20)
+CREATE TABLE IF NOT EXISTS user_pattern_state (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    late_count INTEGER NOT NULL DEFAULT 0,
+    edge_count INTEGER NOT NULL DEFAULT 0,
+    timed_count INTEGER NOT NULL DEFAULT 0,
+    recent_risks TEXT[] NOT NULL DEFAULT '{}',
+    recent_reasons TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill (or rebuild) from the full delay history. Safe to re-run.
+-- Reasons are trimmed like create_delay's reason_text.strip(), so repeats
+-- of old reasons are still recognised.
+WITH ordered AS (
+    SELECT d.user_id, btrim(d.reason_text, E' \t\n\r\f\v') AS reason_text, d.risk_level,
+           EXTRACT(EPOCH FROM (t.deadline::timestamp - d.submitted_at)) / 3600 AS hours_left,
+           ROW_NUMBER() OVER (PARTITION BY d.user_id ORDER BY d.submitted_at DESC, d.id DESC) AS rn
+    FROM delays d
+    LEFT JOIN tasks t ON t.id = d.task_id
+    WHERE d.user_id IS NOT NULL
+)
+INSERT INTO user_pattern_state
+    (user_id, total_count, late_count, edge_count, timed_count, recent_risks, recent_reasons, updated_at)
+SELECT user_id,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE hours_left < 0),
+       COUNT(*) FILTER (WHERE hours_left BETWEEN 0 AND 1),
+       COUNT(hours_left),
+       COALESCE(ARRAY_AGG(risk_level  ORDER BY rn) FILTER (WHERE rn <= 5  AND risk_level  IS NOT NULL), '{}'),
+       COALESCE(ARRAY_AGG(reason_text ORDER BY rn) FILTER (WHERE rn <= 20 AND reason_text IS NOT NULL), '{}'),
+       CURRENT_TIMESTAMP
+FROM ordered
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    total_count = EXCLUDED.total_count,
+    late_count = EXCLUDED.late_count,
+    edge_count = EXCLUDED.edge_count,
+    timed_count = EXCLUDED.timed_count,
+    recent_risks = EXCLUDED.recent_risks,
+    recent_reasons = EXCLUDED.recent_reasons,
+    updated_at = EXCLUDED.updated_at;
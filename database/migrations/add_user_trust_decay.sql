@@ -0,0 +1,23 @@
+-- Per-user running state for the time-decay trust score.
+-- weighted_sum / weight_sum are decayed to last_update with exp(-0.05 * days)
+-- (ai_demo.DECAY_RATE); create_delay rescales and adds each new delay.
+CREATE TABLE IF NOT EXISTS user_trust_decay (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    weighted_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weight_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_update DATE NOT NULL DEFAULT CURRENT_DATE
+);
+
+-- Backfill (or rebuild) from the full delay history. Safe to re-run.
+INSERT INTO user_trust_decay (user_id, weighted_sum, weight_sum, last_update)
+SELECT user_id,
+       SUM(COALESCE(score_authenticity, 0) * EXP(-0.05 * (CURRENT_DATE - submitted_at::date))),
+       SUM(EXP(-0.05 * (CURRENT_DATE - submitted_at::date))),
+       CURRENT_DATE
+FROM delays
+WHERE user_id IS NOT NULL
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    weighted_sum = EXCLUDED.weighted_sum,
+    weight_sum = EXCLUDED.weight_sum,
+    last_update = EXCLUDED.last_update;
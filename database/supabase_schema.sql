@@ -4,6 +4,9 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Trigram similarity for fuzzy name/email/title lookups
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
@@ -12,12 +15,21 @@ CREATE TABLE IF NOT EXISTS users (
     password_hash VARCHAR(255) NOT NULL,
     role VARCHAR(20) CHECK (role IN ('employee', 'manager', 'admin')) DEFAULT 'employee',
     active_status BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Full-text search (see database/migrations/add_search_tsvector.sql)
+    search_tsv tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(full_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(email, '')), 'B')
+    ) STORED
 );
 
 -- Create index on email for faster lookups
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+CREATE INDEX IF NOT EXISTS idx_users_search_tsv ON users USING GIN (search_tsv);
+-- Fuzzy name/email lookup (see database/migrations/add_trigram_search.sql)
+CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON users USING GIN (full_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_email_trgm ON users USING GIN (email gin_trgm_ops);
 
 -- Tasks table
 CREATE TABLE IF NOT EXISTS tasks (
@@ -33,7 +45,15 @@ CREATE TABLE IF NOT EXISTS tasks (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     completion_timestamp TIMESTAMP NULL,
     CONSTRAINT chk_status CHECK (status IN ('Pending', 'In Progress', 'Completed', 'Delayed')),
-    CONSTRAINT chk_priority CHECK (priority IN ('Low', 'Medium', 'High'))
+    CONSTRAINT chk_priority CHECK (priority IN ('Low', 'Medium', 'High')),
+    -- Full-text search (see database/migrations/add_search_tsvector.sql)
+    search_tsv tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(status, '') || ' ' || coalesce(priority, '')), 'C')
+    ) STORED
 );
 
 -- Create indexes for tasks
@@ -41,6 +61,8 @@ CREATE INDEX IF NOT EXISTS idx_tasks_assigned_to ON tasks(assigned_to);
 CREATE INDEX IF NOT EXISTS idx_tasks_created_by ON tasks(created_by);
 CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
 CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks(deadline);
+CREATE INDEX IF NOT EXISTS idx_tasks_search_tsv ON tasks USING GIN (search_tsv);
+CREATE INDEX IF NOT EXISTS idx_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops);
 
 -- Attachments/Resources table
 CREATE TABLE IF NOT EXISTS attachments (
@@ -71,12 +93,81 @@ CREATE TABLE IF NOT EXISTS delays (
     ai_feedback TEXT,
     ai_analysis_json JSONB,
     delay_duration INTEGER DEFAULT 0,
-    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Background analysis (see database/migrations/add_delay_analysis_status.sql)
+    analysis_status VARCHAR(20) NOT NULL DEFAULT 'analyzed'
+        CONSTRAINT delays_analysis_status_check
+        CHECK (analysis_status IN ('pending_analysis', 'analyzed', 'analysis_failed')),
+    analysis_claimed_at TIMESTAMP,
+    analysis_failures INTEGER NOT NULL DEFAULT 0,
+    -- Full-text search (see database/migrations/add_search_tsvector.sql)
+    search_tsv tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(reason_text, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(reason_text, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(risk_level, '')), 'C')
+    ) STORED
 );
 
 CREATE INDEX IF NOT EXISTS idx_delays_task_id ON delays(task_id);
 CREATE INDEX IF NOT EXISTS idx_delays_user_id ON delays(user_id);
 CREATE INDEX IF NOT EXISTS idx_delays_risk_level ON delays(risk_level);
+CREATE INDEX IF NOT EXISTS idx_delays_search_tsv ON delays USING GIN (search_tsv);
+CREATE INDEX IF NOT EXISTS idx_delays_pending_analysis
+    ON delays(analysis_claimed_at) WHERE analysis_status = 'pending_analysis';
+CREATE INDEX IF NOT EXISTS idx_delays_failed_analysis
+    ON delays(analysis_claimed_at) WHERE analysis_status = 'analysis_failed';
+
+-- Running time-decay trust state (one row per user, maintained by create_delay)
+CREATE TABLE IF NOT EXISTS user_trust_decay (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    weighted_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    weight_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    last_update DATE NOT NULL DEFAULT CURRENT_DATE
+);
+
+-- Pattern-detection state (one row per user, maintained by create_delay)
+CREATE TABLE IF NOT EXISTS user_pattern_state (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_count INTEGER NOT NULL DEFAULT 0,
+    late_count INTEGER NOT NULL DEFAULT 0,
+    edge_count INTEGER NOT NULL DEFAULT 0,
+    timed_count INTEGER NOT NULL DEFAULT 0,
+    recent_risks TEXT[] NOT NULL DEFAULT '{}',
+    recent_reasons TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Excuse-analysis cache, persistent tier (see services/llm_cache.py)
+CREATE TABLE IF NOT EXISTS llm_analysis_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    prompt_version VARCHAR(32) NOT NULL,
+    result JSONB NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_analysis_cache_created_at ON llm_analysis_cache(created_at);
+
+-- Chatbot conversations (see services/chat_session_service.py)
+CREATE TABLE IF NOT EXISTS chat_conversations (
+    id UUID PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL DEFAULT '',
+    messages JSONB NOT NULL DEFAULT '[]',
+    turn_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_chat_conversations_user_updated ON chat_conversations(user_id, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_chat_conversations_updated_at ON chat_conversations(updated_at);
+
+-- Shared rate-limit token buckets (see services/rate_limiter.py)
+CREATE UNLOGGED TABLE IF NOT EXISTS rate_limit_buckets (
+    bucket_key VARCHAR(100) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at DOUBLE PRECISION NOT NULL
+);
 
 -- Resource access logs
 CREATE TABLE IF NOT EXISTS resource_logs (
@@ -138,6 +229,11 @@ ALTER TABLE tasks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE delays ENABLE ROW LEVEL SECURITY;
 ALTER TABLE attachments ENABLE ROW LEVEL SECURITY;
 ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_trust_decay ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_pattern_state ENABLE ROW LEVEL SECURITY;
+ALTER TABLE llm_analysis_cache ENABLE ROW LEVEL SECURITY;
+ALTER TABLE chat_conversations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE rate_limit_buckets ENABLE ROW LEVEL SECURITY;
 
 -- Secure View (Respect RLS)
 ALTER VIEW task_statistics SET (security_invoker = true);
@@ -0,0 +1,48 @@
+from psycopg2.extras import execute_values
+from .db import execute_query, get_db_cursor
+import json
+
+_CONVERSATION_COLUMNS = "id::text AS id, user_id, summary, messages, turn_count, updated_at"
+
+def get_conversation(conversation_id):
+    result = execute_query(
+        f"SELECT {_CONVERSATION_COLUMNS} FROM chat_conversations WHERE id = %s",
+        (conversation_id,)
+    )
+    return result[0] if result else None
+
+def get_latest_conversation(user_id):
+    """The user's most recently active conversation, or None."""
+    result = execute_query(f"""
+        SELECT {_CONVERSATION_COLUMNS} FROM chat_conversations
+        WHERE user_id = %s ORDER BY updated_at DESC LIMIT 1
+    """, (user_id,))
+    return result[0] if result else None
+
+def save_conversations(conversations, page_size=200):
+    """Upsert many conversations (dicts with id, user_id, summary, messages, turn_count) in one statement."""
+    if not conversations:
+        return
+    rows = [
+        (c['id'], c['user_id'], c['summary'], json.dumps(c['messages']), c['turn_count'])
+        for c in conversations
+    ]
+    with get_db_cursor() as cursor:
+        execute_values(cursor, """
+            INSERT INTO chat_conversations (id, user_id, summary, messages, turn_count, updated_at)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                summary = EXCLUDED.summary,
+                messages = EXCLUDED.messages,
+                turn_count = EXCLUDED.turn_count,
+                updated_at = EXCLUDED.updated_at
+        """, rows, template="(%s::uuid, %s, %s, %s::jsonb, %s, CURRENT_TIMESTAMP)", page_size=page_size)
+
+def delete_idle_conversations(max_idle_days):
+    """Delete conversations not updated for max_idle_days; returns how many."""
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM chat_conversations WHERE updated_at < CURRENT_TIMESTAMP - make_interval(days => %s)",
+            (max_idle_days,)
+        )
+        return cursor.rowcount
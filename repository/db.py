@@ -8,6 +8,7 @@ from database.connection import (
     get_conn, 
     release_conn, 
     DatabaseConnection,
+    UnitOfWork,
     get_db_connection,
     get_db_cursor,
     execute_query,
@@ -20,6 +21,7 @@ __all__ = [
     'get_conn',
     'release_conn', 
     'DatabaseConnection',
+    'UnitOfWork',
     'get_db_connection',
     'get_db_cursor',
     'execute_query',
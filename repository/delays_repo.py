@@ -1,8 +1,49 @@
 from .db import execute_query, get_db_cursor
+from utils.pattern_engine import RISK_WINDOW, REASON_WINDOW, is_deadline_edge
+from ai_demo import DECAY_RATE
 import json
 
-def create_delay(task_id, user_id, reason_text, reason_audio_path, score_authenticity, score_avoidance, risk_level, ai_feedback, ai_analysis_json, delay_duration=0, proof_path=None):
-    """Create delay record with validation."""
+# Rescale the user's running decay state to today (exp(-DECAY_RATE * days),
+# see ai_demo.DECAY_RATE) and add the new delay with weight 1.
+_UPSERT_TRUST_DECAY = """
+    INSERT INTO user_trust_decay (user_id, weighted_sum, weight_sum, last_update)
+    VALUES (%(user_id)s, %(score)s, 1.0, CURRENT_DATE)
+    ON CONFLICT (user_id) DO UPDATE SET
+        weighted_sum = user_trust_decay.weighted_sum
+                       * EXP(-%(decay_rate)s * (CURRENT_DATE - user_trust_decay.last_update))
+                       + EXCLUDED.weighted_sum,
+        weight_sum   = user_trust_decay.weight_sum
+                       * EXP(-%(decay_rate)s * (CURRENT_DATE - user_trust_decay.last_update))
+                       + 1.0,
+        last_update  = CURRENT_DATE
+"""
+
+# Fold the new delay into the user's pattern-detection state. Ring buffers are
+# newest first and truncated to the window sizes passed in.
+_UPSERT_PATTERN_STATE = """
+    INSERT INTO user_pattern_state
+        (user_id, total_count, late_count, edge_count, timed_count, recent_risks, recent_reasons, updated_at)
+    VALUES (%(user_id)s, 1, %(late)s, %(edge)s, %(timed)s,
+            ARRAY[%(risk)s]::text[], ARRAY[%(reason)s]::text[], CURRENT_TIMESTAMP)
+    ON CONFLICT (user_id) DO UPDATE SET
+        total_count    = user_pattern_state.total_count + 1,
+        late_count     = user_pattern_state.late_count  + EXCLUDED.late_count,
+        edge_count     = user_pattern_state.edge_count  + EXCLUDED.edge_count,
+        timed_count    = user_pattern_state.timed_count + EXCLUDED.timed_count,
+        recent_risks   = (EXCLUDED.recent_risks   || user_pattern_state.recent_risks)[1:%(risk_window)s],
+        recent_reasons = (EXCLUDED.recent_reasons || user_pattern_state.recent_reasons)[1:%(reason_window)s],
+        updated_at     = CURRENT_TIMESTAMP
+"""
+
+def create_delay(task_id, user_id, reason_text, reason_audio_path, score_authenticity, score_avoidance, risk_level, ai_feedback, ai_analysis_json, delay_duration=0, proof_path=None, is_after_deadline=None, hours_left=None):
+    """
+    Create delay record with validation.
+
+    The user's trust-decay and pattern-detection state rows are updated in
+    the same transaction. is_after_deadline / hours_left describe the
+    submission relative to the task deadline; if is_after_deadline is not
+    given it falls back to delay_duration > 0.
+    """
     try:
         # Ensure json is stringified for JSONB column or just passed as dict (psycopg2 handles dict to jsonb automatically often, but explicit dumps is safer for text fields)
         if isinstance(ai_analysis_json, dict):
@@ -16,13 +57,226 @@ def create_delay(task_id, user_id, reason_text, reason_audio_path, score_authent
             """, (task_id, user_id, reason_text.strip(), reason_audio_path, score_authenticity, score_avoidance, risk_level, ai_feedback, ai_analysis_json, delay_duration, proof_path))
             
             result = cursor.fetchone()
-            if result:
-                return result['id']
-            raise Exception("Failed to get new delay ID")
+            if not result:
+                raise Exception("Failed to get new delay ID")
+
+            # Same transaction, so per-user state never drifts from the delays table
+            if user_id is not None:
+                _apply_user_state(cursor, user_id, reason_text.strip(), score_authenticity, risk_level,
+                                  delay_duration, is_after_deadline, hours_left)
+
+            return result['id']
     except Exception as e:
         print(f"Error creating delay: {e}")
         raise
 
+def _apply_user_state(cursor, user_id, reason_text, score_authenticity, risk_level, delay_duration, is_after_deadline, hours_left):
+    cursor.execute(_UPSERT_TRUST_DECAY, {"user_id": user_id, "score": score_authenticity or 0,
+                                         "decay_rate": DECAY_RATE})
+    cursor.execute(_UPSERT_PATTERN_STATE, _pattern_state_params(
+        user_id, reason_text, risk_level, delay_duration, is_after_deadline, hours_left
+    ))
+
+# ---------------------------------------------------------------------------
+# Background analysis — delays are saved as pending_analysis and scored later
+# by services.delay_analysis_service.
+# ---------------------------------------------------------------------------
+
+def create_pending_delay(task_id, user_id, reason_text, proof_path=None, cursor=None):
+    """
+    Save a delay awaiting analysis (no score yet); returns its id.
+    Pass cursor to insert inside an open transaction (see UnitOfWork).
+    """
+    try:
+        if cursor is not None:
+            return _insert_pending_delay(cursor, task_id, user_id, reason_text, proof_path)
+        with get_db_cursor() as cursor:
+            return _insert_pending_delay(cursor, task_id, user_id, reason_text, proof_path)
+    except Exception as e:
+        print(f"Error creating pending delay: {e}")
+        raise
+
+def _insert_pending_delay(cursor, task_id, user_id, reason_text, proof_path):
+    cursor.execute("""
+        INSERT INTO delays (task_id, user_id, reason_text, delay_duration, proof_path,
+                            analysis_status, analysis_claimed_at)
+        VALUES (%s, %s, %s, 0, %s, 'pending_analysis', CURRENT_TIMESTAMP)
+        RETURNING id
+    """, (task_id, user_id, reason_text.strip(), proof_path))
+    result = cursor.fetchone()
+    if not result:
+        raise Exception("Failed to get new delay ID")
+    return result['id']
+
+def submit_pending_delay(cursor, task_id, user_id, reason_text, proof_path=None):
+    """
+    Lock the task and, if user_id is its assignee, save a pending delay,
+    mark the task Delayed and write the audit log, all in one statement.
+
+    Returns {'title', 'assigned_to', 'delay_id'}; delay_id is None when the
+    task belongs to someone else. Returns None if the task doesn't exist.
+    """
+    cursor.execute("""
+        WITH task AS (
+            SELECT id, title, assigned_to FROM tasks WHERE id = %(task_id)s FOR UPDATE
+        ), delay AS (
+            INSERT INTO delays (task_id, user_id, reason_text, delay_duration, proof_path,
+                                analysis_status, analysis_claimed_at)
+            SELECT id, %(user_id)s, %(reason)s, 0, %(proof_path)s,
+                   'pending_analysis', CURRENT_TIMESTAMP
+            FROM task WHERE assigned_to = %(user_id)s
+            RETURNING id
+        ), status AS (
+            UPDATE tasks SET status = 'Delayed'
+            FROM task
+            WHERE tasks.id = task.id AND task.assigned_to = %(user_id)s
+        ), log AS (
+            INSERT INTO audit_logs (user_id, action, details)
+            SELECT %(user_id)s, 'SUBMIT_DELAY',
+                   'Delay submitted for ''' || title || ''' - analysis pending'
+            FROM task WHERE assigned_to = %(user_id)s
+        )
+        SELECT task.title, task.assigned_to, (SELECT id FROM delay) AS delay_id
+        FROM task
+    """, {"task_id": task_id, "user_id": user_id, "reason": reason_text.strip(),
+          "proof_path": proof_path})
+    return cursor.fetchone()
+
+def get_delay_for_analysis(delay_id):
+    """Delay row plus the task context the scorer needs, or None."""
+    result = execute_query("""
+        SELECT d.id, d.task_id, d.user_id, d.reason_text, d.proof_path, d.delay_duration,
+               d.submitted_at, d.analysis_status,
+               t.title AS task_title, t.priority, t.deadline
+        FROM delays d
+        LEFT JOIN tasks t ON d.task_id = t.id
+        WHERE d.id = %s
+    """, (delay_id,))
+    return result[0] if result else None
+
+def lock_user_pattern_state(cursor, user_id):
+    """
+    Serialise read-score-write of one user's pattern state until the
+    cursor's transaction ends (two delays analysed at once would otherwise
+    both score against the same prior state).
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('user_pattern_state'), %s)", (user_id,))
+
+def finalize_delay_analysis(cursor, delay_id, user_id, reason_text, score_authenticity, risk_level, ai_feedback, ai_analysis_json, delay_duration=0, is_after_deadline=None, hours_left=None):
+    """
+    Store the analysis result and fold the delay into the user's state, in
+    the caller's transaction. Returns False (and changes nothing) if the
+    delay is no longer pending, e.g. another worker finished it first.
+    """
+    if isinstance(ai_analysis_json, dict):
+        ai_analysis_json = json.dumps(ai_analysis_json)
+
+    cursor.execute("""
+        UPDATE delays
+        SET score_authenticity = %s, score_avoidance = %s, risk_level = %s,
+            ai_feedback = %s, ai_analysis_json = %s, analysis_status = 'analyzed'
+        WHERE id = %s AND analysis_status = 'pending_analysis'
+    """, (score_authenticity, 100 - score_authenticity, risk_level, ai_feedback, ai_analysis_json, delay_id))
+    if cursor.rowcount == 0:
+        return False
+
+    if user_id is not None:
+        _apply_user_state(cursor, user_id, (reason_text or '').strip(), score_authenticity, risk_level,
+                          delay_duration, is_after_deadline, hours_left)
+    return True
+
+def mark_delay_analysis_failed(delay_id):
+    return execute_query("""
+        UPDATE delays SET analysis_status = 'analysis_failed',
+                          analysis_failures = analysis_failures + 1,
+                          analysis_claimed_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND analysis_status = 'pending_analysis'
+    """, (delay_id,), fetch=False)
+
+def claim_stale_pending_delays(stale_seconds, limit=100):
+    """
+    Re-claim pending delays nobody has touched for stale_seconds (e.g. the
+    process that queued them restarted). SKIP LOCKED + the claim timestamp
+    mean concurrent app processes each get a disjoint set.
+    """
+    rows = execute_query("""
+        UPDATE delays SET analysis_claimed_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT id FROM delays
+            WHERE analysis_status = 'pending_analysis'
+              AND COALESCE(analysis_claimed_at, submitted_at) < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            ORDER BY submitted_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id
+    """, (stale_seconds, limit))
+    return [r['id'] for r in rows]
+
+def claim_failed_delays(retry_seconds, max_failures, limit=100):
+    """
+    Put failed delays back to pending_analysis once retry_seconds have
+    passed since they failed, unless they already failed max_failures
+    times. Returns the claimed ids; SKIP LOCKED as in claim_stale_pending_delays.
+    """
+    rows = execute_query("""
+        UPDATE delays SET analysis_status = 'pending_analysis', analysis_claimed_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT id FROM delays
+            WHERE analysis_status = 'analysis_failed'
+              AND analysis_failures < %s
+              AND COALESCE(analysis_claimed_at, submitted_at) < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            ORDER BY submitted_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id
+    """, (max_failures, retry_seconds, limit))
+    return [r['id'] for r in rows]
+
+def get_delay_status(delay_id):
+    """Analysis status and result for polling, or None."""
+    result = execute_query("""
+        SELECT id, task_id, user_id, analysis_status, score_authenticity, risk_level,
+               ai_analysis_json -> 'pattern_flags' AS pattern_flags
+        FROM delays WHERE id = %s
+    """, (delay_id,))
+    return result[0] if result else None
+
+def _pattern_state_params(user_id, reason_text, risk_level, delay_duration, is_after_deadline, hours_left):
+    if is_after_deadline is None:
+        is_after_deadline = (delay_duration or 0) > 0
+    return {
+        "user_id": user_id,
+        "late": int(bool(is_after_deadline)),
+        "edge": int(is_deadline_edge(hours_left)),
+        "timed": int(hours_left is not None),
+        "risk": risk_level,
+        "reason": reason_text,
+        "risk_window": RISK_WINDOW,
+        "reason_window": REASON_WINDOW,
+    }
+
+_PATTERN_STATE_QUERY = """
+    SELECT total_count, late_count, edge_count, timed_count, recent_risks, recent_reasons
+    FROM user_pattern_state WHERE user_id = %s
+"""
+
+def get_user_pattern_state(user_id, cursor=None):
+    """
+    Pattern-detection state row for a user, or None if they have no delays yet.
+    Pass cursor to read inside an open transaction (see lock_user_pattern_state).
+    """
+    if cursor is not None:
+        cursor.execute(_PATTERN_STATE_QUERY, (user_id,))
+        return cursor.fetchone()
+    try:
+        result = execute_query(_PATTERN_STATE_QUERY, (user_id,))
+        return result[0] if result else None
+    except Exception as e:
+        print(f"❌ Error fetching pattern state: {e}")
+        return None
+
 def get_delays_all():
     query = """
         SELECT d.*, t.title as task_title, u.email as user_email
@@ -0,0 +1,19 @@
+from .db import execute_query
+import json
+
+def get_cached_analysis(cache_key, max_age_seconds):
+    """Cached analysis result for cache_key if younger than max_age_seconds, else None."""
+    result = execute_query("""
+        SELECT result FROM llm_analysis_cache
+        WHERE cache_key = %s AND created_at > CURRENT_TIMESTAMP - make_interval(secs => %s)
+    """, (cache_key, max_age_seconds))
+    return result[0]['result'] if result else None
+
+def put_cached_analysis(cache_key, model, prompt_version, result):
+    execute_query("""
+        INSERT INTO llm_analysis_cache (cache_key, model, prompt_version, result, created_at)
+        VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (cache_key) DO UPDATE SET
+            result = EXCLUDED.result,
+            created_at = EXCLUDED.created_at
+    """, (cache_key, model, prompt_version, json.dumps(result)), fetch=False)
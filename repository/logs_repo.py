@@ -1,18 +1,16 @@
-from .db import get_conn
+from .db import get_conn, get_db_cursor
 import mysql.connector
 
-def create_log(user_id, action, details):
-    conn = get_conn()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "INSERT INTO audit_logs (user_id, action, details) VALUES (%s, %s, %s)",
-            (user_id, action, details)
-        )
-        conn.commit()
-    finally:
-        cursor.close()
-        conn.close()
+def create_log(user_id, action, details, cursor=None):
+    """Pass cursor to write the log inside an open transaction (see UnitOfWork)."""
+    query = "INSERT INTO audit_logs (user_id, action, details) VALUES (%s, %s, %s)"
+    if cursor is not None:
+        cursor.execute(query, (user_id, action, details))
+        return
+    # get_db_cursor returns the connection to the pool; closing it here
+    # used to leak a pool slot per log line.
+    with get_db_cursor() as cursor:
+        cursor.execute(query, (user_id, action, details))
 
 def get_recent_logs(limit=50):
     conn = get_conn()
@@ -0,0 +1,32 @@
+from psycopg2.extras import execute_values
+
+def lock_buckets(cursor, capacities):
+    """
+    Lock the buckets named in capacities ({bucket_key: capacity}) until the
+    cursor's transaction ends, creating missing ones full.
+
+    Returns ({bucket_key: (tokens, updated_at)}, now), times in epoch
+    seconds on the database clock.
+    """
+    keys = sorted(capacities)  # one lock order for every caller
+    execute_values(cursor, """
+        INSERT INTO rate_limit_buckets (bucket_key, tokens, updated_at) VALUES %s
+        ON CONFLICT (bucket_key) DO NOTHING
+    """, [(key, capacities[key]) for key in keys], template="(%s, %s, EXTRACT(EPOCH FROM clock_timestamp()))")
+    cursor.execute("""
+        SELECT bucket_key, tokens, updated_at, EXTRACT(EPOCH FROM clock_timestamp()) AS now
+        FROM rate_limit_buckets WHERE bucket_key = ANY(%s)
+        ORDER BY bucket_key FOR UPDATE
+    """, (keys,))
+    rows = cursor.fetchall()
+    now = float(rows[0]['now']) if rows else 0.0
+    return {row['bucket_key']: (row['tokens'], row['updated_at']) for row in rows}, now
+
+def save_buckets(cursor, states):
+    """Write {bucket_key: (tokens, updated_at)} back, in the caller's transaction."""
+    execute_values(cursor, """
+        UPDATE rate_limit_buckets AS b SET tokens = v.tokens, updated_at = v.updated_at
+        FROM (VALUES %s) AS v(bucket_key, tokens, updated_at)
+        WHERE b.bucket_key = v.bucket_key
+    """, [(key, tokens, updated_at) for key, (tokens, updated_at) in states.items()],
+        template="(%s, %s::double precision, %s::double precision)")
@@ -0,0 +1,109 @@
+from .db import execute_query, get_db_cursor
+
+# tsquery text is built by services.search_service from [a-z0-9] words and
+# operators only, and is always passed as a parameter. The prefix terms are
+# parsed unstemmed ('simple'), the synonyms stemmed ('english'); search_tsv
+# holds both forms (see database/migrations/add_search_tsvector.sql).
+_QUERY = """(SELECT to_tsquery('simple', %(prefix)s)
+                 || COALESCE(to_tsquery('english', %(synonyms)s), to_tsquery('simple', %(prefix)s)) AS q) s"""
+
+def search_tasks(prefix, synonyms, limit):
+    return execute_query(f"""
+        SELECT t.id, t.title, t.description, t.status, t.priority, t.deadline,
+               ts_rank_cd(t.search_tsv, s.q) AS rank
+        FROM tasks t
+        CROSS JOIN {_QUERY}
+        WHERE t.search_tsv @@ s.q
+        ORDER BY rank DESC, t.created_at DESC
+        LIMIT %(limit)s
+    """, {"prefix": prefix, "synonyms": synonyms, "limit": limit})
+
+def search_delays(prefix, synonyms, limit):
+    return execute_query(f"""
+        SELECT d.id, d.task_id, d.reason_text, d.risk_level, d.analysis_status, d.submitted_at,
+               t.title AS task_title, ts_rank_cd(d.search_tsv, s.q) AS rank
+        FROM delays d
+        CROSS JOIN {_QUERY}
+        LEFT JOIN tasks t ON d.task_id = t.id
+        WHERE d.search_tsv @@ s.q
+        ORDER BY rank DESC, d.submitted_at DESC
+        LIMIT %(limit)s
+    """, {"prefix": prefix, "synonyms": synonyms, "limit": limit})
+
+def search_users(prefix, limit):
+    return execute_query("""
+        SELECT u.id, u.full_name, u.email, u.role, ts_rank_cd(u.search_tsv, q) AS rank
+        FROM users u
+        CROSS JOIN to_tsquery('simple', %s) q
+        WHERE u.search_tsv @@ q
+        ORDER BY rank DESC, u.full_name
+        LIMIT %s
+    """, (prefix, limit))
+
+def _contains_pattern(text):
+    """ILIKE '%text%' with the user's own % and _ matched literally."""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# Trigram lookups (pg_trgm, see database/migrations/add_trigram_search.sql).
+# `q <% column` is word similarity above the threshold, which tolerates typos
+# and partial words; ILIKE catches substrings too short to share a trigram.
+# Both are served by the gin_trgm_ops indexes. Prefix matches rank first so
+# autocomplete behaves as typed.
+
+def find_similar_users(text, limit, threshold=0.3, active_only=False):
+    with get_db_cursor() as cursor:
+        cursor.execute("SET LOCAL pg_trgm.word_similarity_threshold = %s", (threshold,))
+        cursor.execute("""
+            SELECT u.id, u.full_name, u.email, u.role,
+                   GREATEST(word_similarity(%(q)s, u.full_name),
+                            word_similarity(%(q)s, u.email)) AS rank
+            FROM users u
+            WHERE (%(q)s <%% u.full_name OR %(q)s <%% u.email
+                   OR u.full_name ILIKE %(contains)s OR u.email ILIKE %(contains)s)
+              AND (u.active_status OR NOT %(active_only)s)
+            ORDER BY (u.full_name ILIKE %(prefix)s OR u.email ILIKE %(prefix)s) DESC,
+                     rank DESC, u.full_name
+            LIMIT %(limit)s
+        """, {"q": text, "contains": _contains_pattern(text), "prefix": _contains_pattern(text)[1:],
+              "active_only": active_only, "limit": limit})
+        return cursor.fetchall()
+
+def find_similar_tasks(text, limit, threshold=0.3):
+    with get_db_cursor() as cursor:
+        cursor.execute("SET LOCAL pg_trgm.word_similarity_threshold = %s", (threshold,))
+        cursor.execute("""
+            SELECT t.id, t.title, t.description, t.status, t.priority, t.deadline,
+                   word_similarity(%(q)s, t.title) AS rank
+            FROM tasks t
+            WHERE %(q)s <%% t.title OR t.title ILIKE %(contains)s
+            ORDER BY rank DESC, t.created_at DESC
+            LIMIT %(limit)s
+        """, {"q": text, "contains": _contains_pattern(text), "limit": limit})
+        return cursor.fetchall()
+
+def log_search(user_id, query):
+    execute_query("INSERT INTO search_logs (user_id, query) VALUES (%s, %s)", (user_id, query), fetch=False)
+
+def get_trending_searches(days=7, limit=5):
+    """Most common queries of the last `days` days, all users."""
+    result = execute_query("""
+        SELECT query, COUNT(*) AS count
+        FROM search_logs
+        WHERE timestamp > NOW() - make_interval(days => %s)
+        GROUP BY query
+        ORDER BY count DESC
+        LIMIT %s
+    """, (days, limit))
+    return [row['query'] for row in result]
+
+def get_recent_searches(user_id, limit=5):
+    """The user's latest distinct queries, newest first."""
+    result = execute_query("""
+        SELECT query
+        FROM search_logs
+        WHERE user_id = %s
+        GROUP BY query
+        ORDER BY MAX(timestamp) DESC
+        LIMIT %s
+    """, (user_id, limit))
+    return [row['query'] for row in result]
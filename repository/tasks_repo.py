@@ -39,15 +39,20 @@ def get_all_tasks():
     """
     return execute_query(query)
 
-def update_task_status(task_id, status):
+def update_task_status(task_id, status, cursor=None):
+    """Pass cursor to update inside an open transaction (see UnitOfWork)."""
+    query = "UPDATE tasks SET status=%s WHERE id=%s"
+    if cursor is not None:
+        cursor.execute(query, (status, task_id))
+        return
     execute_query(
-        "UPDATE tasks SET status=%s WHERE id=%s", 
+        query, 
         (status, task_id), 
         fetch=False
     )
 
-def get_task_by_id(task_id):
-    """Get task details by ID."""
+def get_task_by_id(task_id, cursor=None):
+    """Get task details by ID. Pass cursor to read inside an open transaction."""
     if not task_id:
         return None
         
@@ -57,6 +62,9 @@ def get_task_by_id(task_id):
         FROM tasks 
         WHERE id = %s
     """
+    if cursor is not None:
+        cursor.execute(query, (task_id,))
+        return cursor.fetchone()
     results = execute_query(query, (task_id,))
     return results[0] if results else None
 
@@ -4,6 +4,7 @@ from utils.flask_auth import admin_required
 from services.user_service import get_users_list, manage_create_user, manage_update_user
 from repository.users_repo import soft_delete_user
 from repository.db import test_connection
+from services.whatif_service import submit_simulation, get_simulation, WhatIfServiceError
 
 
 @app.route('/admin')
@@ -107,3 +108,39 @@ def admin_edit_user():
         current_app.logger.error(f"Admin edit user error: {e}")
     
     return redirect(url_for('admin_panel'))
+
+
+@app.route('/admin/whatif', methods=['POST'])
+@admin_required
+def admin_whatif_submit():
+    """
+    Simulate alternative scoring rules over historical delays.
+
+    JSON body: {"params": {"threshold_medium": 50}, "pattern_penalties": {...},
+    "sample": 0.2, "seed": 42}. Returns the result if it is cached (200),
+    otherwise {"id", "status": "running"} (202); poll GET /admin/whatif/<id>.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result = submit_simulation(
+            overrides=data.get('params'),
+            pattern_penalties=data.get('pattern_penalties'),
+            sample=float(data.get('sample', 1.0)),
+            seed=int(data.get('seed', 42)),
+        )
+    except (WhatIfServiceError, ValueError, TypeError) as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        current_app.logger.error(f"What-if submit error: {e}")
+        return {'error': 'Failed to start simulation'}, 500
+
+    return result, (200 if result['status'] == 'done' else 202)
+
+
+@app.route('/admin/whatif/<sim_id>')
+@admin_required
+def admin_whatif_result(sim_id):
+    result = get_simulation(sim_id)
+    if result is None:
+        return {'error': 'Unknown simulation id'}, 404
+    return result, {'done': 200, 'running': 202}.get(result['status'], 500)
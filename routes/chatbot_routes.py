@@ -1,8 +1,13 @@
-from flask import request, session, jsonify, render_template, current_app
+import json
+from flask import request, session, jsonify, render_template, current_app, Response, stream_with_context
 from app import app, csrf
-from services.chat_service import get_chat_response
-from services.analytics_service import get_analytics_data
-from repository.tasks_repo import get_tasks_by_user, get_all_tasks
+from services.chat_service import get_chat_response, stream_chat_response, UNAVAILABLE_MESSAGE
+from services.chat_session_service import (
+    get_conversation, get_latest_user_conversation, record_turn, start_conversation
+)
+from services.chat_context_service import get_chat_context
+from services import answer_cache
+from services.rate_limiter import RateLimited
 from utils.flask_auth import auth_required
 
 @app.route('/chatbot')
@@ -11,55 +16,183 @@ def chatbot():
     """Renders the chatbot UI."""
     return render_template('chatbot.html')
 
-@app.route('/chatbot/api', methods=['POST'])
-@csrf.exempt  # Exempt from CSRF for JSON API
-def chatbot_api():
-    """Handles chat API requests."""
-    if 'user_id' not in session: 
-        return {'error': 'Unauthorized'}, 401
-    
+def _chat_request(user_id):
+    """(prompt, conversation) from the JSON body, or an error response tuple."""
     data = request.json
     if not data:
-        return {'error': 'No data provided'}, 400
-        
+        return None, ({'error': 'No data provided'}, 400)
+
     prompt = data.get('message')
-    conversation_history = data.get('history', [])
-    
-    if not prompt: 
-        return {'error': 'No message provided'}, 400
-        
-    user_id = session['user_id']
-    user_role = session.get('user_role', 'employee')
-    
-    # Fetch real analytics for context
-    kpis = get_analytics_data(user_id=user_id, role=user_role)
+    if not prompt:
+        return None, ({'error': 'No message provided'}, 400)
+
+    conversation_id = data.get('conversation_id')
+    try:
+        if conversation_id:
+            return (prompt, get_conversation(conversation_id, user_id)), None
+    except LookupError:
+        pass  # expired or unknown: carry on in a new conversation
+    except PermissionError as e:
+        return None, ({'error': str(e)}, 403)
+    # Older clients may still send their own history to seed the conversation
+    return (prompt, start_conversation(user_id, data.get('history'))), None
+
+def _chat_context(user_id, user_role):
+    """Cached chat context and the user-context text for the system prompt."""
+    context = get_chat_context(user_id, user_role)
     
     user_context = f"""
     User: {session.get('user_name')} ({user_role})
     Stats:
-    - Avg Authenticity: {kpis.get('avg_auth_score')}%
-    - Risk Distribution: {kpis.get('risk_distribution')}
-    - Pending Tasks: {len([t for t in get_tasks_by_user(user_id) if t['status'] == 'Pending']) if user_role == 'employee' else 'N/A'}
+    - Avg Authenticity: {context.avg_auth_score}%
+    - Risk Distribution: {context.risk_distribution}
+    - Pending Tasks: {context.pending_count if user_role == 'employee' else 'N/A'}
     """
+    return context, user_context
 
-    # --- Contextual Query Handling ---
+def _quick_answer(prompt, context):
+    """Answers built from our own data without the LLM, or None."""
     prompt_lower = prompt.lower()
     
     if "quick insights" in prompt_lower or "performance" in prompt_lower:
-        auth = kpis.get('avg_auth_score', 0)
-        low_risk = kpis.get('risk_low', 0)
-        return {'response': f"🚀 **Quick Insights:**<br>• Your average Authenticity Signal is **{auth}%**.<br>• You have **{low_risk}** low-risk delay submissions.<br>• Trend: Your trust index is {'stable' if auth > 70 else 'needs improvement'}.<br>How else can I help?"}
+        auth = context.avg_auth_score
+        low_risk = context.risk_low
+        return f"🚀 **Quick Insights:**<br>• Your average Authenticity Signal is **{auth}%**.<br>• You have **{low_risk}** low-risk delay submissions.<br>• Trend: Your trust index is {'stable' if auth > 70 else 'needs improvement'}.<br>How else can I help?"
 
     if "pending" in prompt_lower or "status" in prompt_lower:
-        tasks = get_tasks_by_user(user_id) if user_role == 'employee' else get_all_tasks()
-        pending = [t for t in tasks if t['status'] == 'Pending']
-        return {'response': f"You have **{len(pending)}** pending tasks. Your next deadline is **{pending[0]['deadline'] if pending else 'N/A'}**."}
+        return f"You have **{context.pending_count}** pending tasks. Your next deadline is **{context.next_deadline or 'N/A'}**."
+    return None
+
+@app.route('/chatbot/api', methods=['POST'])
+@csrf.exempt  # Exempt from CSRF for JSON API
+def chatbot_api():
+    """Handles chat API requests."""
+    if 'user_id' not in session: 
+        return {'error': 'Unauthorized'}, 401
+    
+    user_id = session['user_id']
+    user_role = session.get('user_role', 'employee')
+    parsed, error = _chat_request(user_id)
+    if error:
+        return error
+    prompt, conversation = parsed
+
+    context, user_context = _chat_context(user_id, user_role)
+    version = answer_cache.context_version(user_context)
+
+    # --- Contextual Query Handling / answers to near-identical questions ---
+    quick = _quick_answer(prompt, context) or answer_cache.lookup(prompt, user_role, version)
+    if quick:
+        record_turn(conversation, prompt, quick)
+        return {'response': quick, 'conversation_id': conversation.id}
     
     try:
-        # Pass conversation history if you want context (frontend needs to send it)
-        # For now, we'll pass an empty list if not provided
-        response_text = get_chat_response(prompt, conversation_history, user_context=user_context)
-        return {'response': response_text}
+        # History and summary come from the server-side conversation
+        response_text = get_chat_response(prompt, list(conversation.messages), user_context=user_context,
+                                          summary=conversation.summary, user_id=user_id)
+        if response_text != UNAVAILABLE_MESSAGE:
+            record_turn(conversation, prompt, response_text)
+            answer_cache.store(prompt, user_role, version, response_text)
+        return {'response': response_text, 'conversation_id': conversation.id}
+    except RateLimited as e:
+        return _rate_limited(e)
     except Exception as e:
         current_app.logger.error(f"Chatbot Error: {e}")
         return {'error': str(e)}, 500
+
+def _rate_limited(e):
+    return (
+        {'error': 'Too many requests. Please wait a moment and try again.', 'retry_after': e.retry_after_header},
+        429,
+        {'Retry-After': e.retry_after_header},
+    )
+
+def _sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+@app.route('/chatbot/stream', methods=['POST'])
+@csrf.exempt  # Exempt from CSRF for JSON API
+def chatbot_stream():
+    """
+    Same as /chatbot/api, streamed as Server-Sent Events.
+
+    Events: conversation {conversation_id} (first), delta {text},
+    reset {model} (drop the text so far, a fallback model restarts the
+    answer), done {model}, error.
+    """
+    if 'user_id' not in session: 
+        return {'error': 'Unauthorized'}, 401
+
+    user_id = session['user_id']
+    user_role = session.get('user_role', 'employee')
+    parsed, error = _chat_request(user_id)
+    if error:
+        return error
+    prompt, conversation = parsed
+
+    context, user_context = _chat_context(user_id, user_role)
+    version = answer_cache.context_version(user_context)
+
+    quick = _quick_answer(prompt, context) or answer_cache.lookup(prompt, user_role, version)
+    if quick:
+        events = iter([{'type': 'delta', 'text': quick}, {'type': 'done', 'model': None}])
+    else:
+        try:
+            events = stream_chat_response(prompt, list(conversation.messages), user_context=user_context,
+                                          summary=conversation.summary, user_id=user_id)
+        except RateLimited as e:
+            return _rate_limited(e)
+
+    def generate():
+        yield _sse({'type': 'conversation', 'conversation_id': conversation.id})
+        answer = []
+        try:
+            for event in events:
+                if event['type'] == 'delta':
+                    answer.append(event['text'])
+                elif event['type'] == 'reset':
+                    answer.clear()
+                elif event['type'] == 'done':
+                    record_turn(conversation, prompt, ''.join(answer))
+                    if not quick:
+                        answer_cache.store(prompt, user_role, version, ''.join(answer))
+                yield _sse(event)
+        except Exception as e:
+            current_app.logger.error(f"Chatbot stream error: {e}")
+            yield _sse({'type': 'error'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+@app.route('/chatbot/conversation', methods=['GET'])
+def chatbot_conversation():
+    """
+    Resume a conversation: its summary and recent messages.
+
+    ?id=<conversation_id>, or the user's most recent conversation if omitted.
+    """
+    if 'user_id' not in session: 
+        return {'error': 'Unauthorized'}, 401
+
+    user_id = session['user_id']
+    conversation_id = request.args.get('id')
+    try:
+        if conversation_id:
+            conversation = get_conversation(conversation_id, user_id)
+        else:
+            conversation = get_latest_user_conversation(user_id)
+    except LookupError:
+        return {'error': 'Conversation not found'}, 404
+    except PermissionError as e:
+        return {'error': str(e)}, 403
+
+    if conversation is None:
+        return {'conversation_id': None, 'summary': '', 'messages': []}
+    return {
+        'conversation_id': conversation.id,
+        'summary': conversation.summary,
+        'messages': list(conversation.messages),
+    }
@@ -3,6 +3,7 @@ from app import app
 from datetime import datetime, timedelta, date
 from repository.tasks_repo import create_task, update_task_status
 from repository.delays_repo import create_delay
+from services.chat_context_service import invalidate_chat_context
 import random
 
 @app.route("/debug")
@@ -85,5 +86,6 @@ def generate_sample_data():
             estimated_minutes=random.randint(45, 180)
         )
 
+    invalidate_chat_context(user_id)
     flash("⚡ Sample data loaded successfully!", "success")
     return redirect(url_for('dashboard'))
@@ -7,6 +7,7 @@ from flask import session, flash, redirect, url_for, current_app
 from app import app
 from utils.flask_auth import auth_required
 from repository.db import execute_query
+from services.chat_context_service import invalidate_chat_context
 from datetime import datetime, timedelta
 import random
 
@@ -119,6 +120,7 @@ def load_sample_data():
             ))
             delays_created += 1
         
+        invalidate_chat_context(user_id)
         flash(f"✅ Sample data loaded! Created {len(task_ids)} tasks and {delays_created} delays for testing.", "success")
         current_app.logger.info(f"Sample data loaded for user {user_id}: {len(task_ids)} tasks, {delays_created} delays")
         
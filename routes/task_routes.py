@@ -8,11 +8,13 @@ from services.task_service import (
     service_create_task,
     service_complete_task,
     service_submit_delay,
+    service_get_delay_status,
     service_delete_task,
     service_get_task_or_404,
 )
 from repository.resources_repo import get_resources_by_task
-from services.user_service import get_users_list
+from services.user_service import search_assignees
+from services.rate_limiter import RateLimited
 
 
 # ---------------------------------------------------------------------------
@@ -90,11 +92,11 @@ def new_task():
             est_minutes = int(request.form.get('est_minutes') or 0)
         except (ValueError, TypeError):
             flash("Invalid estimated time. Please enter valid numbers.", "error")
-            return render_template('task_form.html', users=get_users_list(session['user_id']))
+            return render_template('task_form.html')
 
         if not (title and description and assigned_to):
             flash("Title, description, and assignee are required.", "warning")
-            return render_template('task_form.html', users=get_users_list(session['user_id']))
+            return render_template('task_form.html')
 
         try:
             task_id = service_create_task(
@@ -117,7 +119,23 @@ def new_task():
             current_app.logger.error("Task creation error: %s", e)
             flash("Error creating task. Please try again.", "error")
 
-    return render_template('task_form.html', users=get_users_list(session['user_id']))
+    return render_template('task_form.html')
+
+
+@app.route('/tasks/assignees')
+@auth_required
+def task_assignees():
+    """JSON autocomplete for the assignee picker: ?q=<name or email>&limit=<= 10."""
+    try:
+        users = search_assignees(
+            session.get('user_id'), request.args.get('q', ''), request.args.get('limit', 10, type=int)
+        )
+        return {'users': users}
+    except PermissionError as e:
+        return {'error': str(e)}, 403
+    except Exception as e:
+        current_app.logger.error("Assignee lookup error: %s", e)
+        return {'error': 'Failed to search users'}, 500
 
 
 @app.route('/tasks/<int:task_id>')
@@ -126,7 +144,10 @@ def task_details(task_id):
     # Ownership / existence check is the service's responsibility.
     task = service_get_task_or_404(task_id)
     resources = get_resources_by_task(task_id)
-    return render_template('task_details.html', task=task, resources=resources)
+    return render_template(
+        'task_details.html', task=task, resources=resources,
+        pending_delay_id=request.args.get('analysis', type=int),
+    )
 
 
 @app.route('/tasks/<int:task_id>/complete', methods=['POST'])
@@ -176,13 +197,12 @@ def submit_delay(task_id):
             reason     = reason,
             proof_file = proof_file,
         )
-        flash("Excuse submitted successfully!", "success")
-        flash(
-            f"Score: {result.get('authenticity_score')}% — Risk: {result.get('risk_level')}",
-            "info",
-        )
-        return redirect(url_for('task_details', task_id=task_id))
+        flash("Excuse submitted successfully! AI analysis is running…", "success")
+        # The task page polls delay_status for the score
+        return redirect(url_for('task_details', task_id=task_id, analysis=result['delay_id']))
 
+    except RateLimited as e:
+        flash(f"Too many delay submissions. Please try again in {e.retry_after_header} seconds.", "warning")
     except PermissionError as e:
         flash(str(e), "error")
     except LookupError:
@@ -195,6 +215,23 @@ def submit_delay(task_id):
     return redirect(url_for('task_details', task_id=task_id))
 
 
+@app.route('/delays/<int:delay_id>/status')
+@auth_required
+def delay_status(delay_id):
+    """JSON analysis status for a submitted delay (polled by the task page)."""
+    try:
+        return service_get_delay_status(
+            session.get('user_id'), session.get('user_role', 'employee'), delay_id
+        )
+    except LookupError:
+        return {'error': 'Delay not found'}, 404
+    except PermissionError as e:
+        return {'error': str(e)}, 403
+    except Exception as e:
+        current_app.logger.error("Error fetching delay status %s: %s", delay_id, e)
+        return {'error': 'Failed to load delay status'}, 500
+
+
 @app.route('/tasks/<int:task_id>/delete', methods=['POST'])
 @auth_required
 def delete_task(task_id):
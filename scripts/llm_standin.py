@@ -0,0 +1,395 @@
+"""
+Local stand-in for the Groq chat-completions API, for load tests and
+offline development of the AI paths (delay analysis, chatbot).
+
+    python scripts/llm_standin.py --port 8765
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=standin python run.py
+
+Serves POST /openai/v1/chat/completions (including stream=true) and
+GET /stats (request and connection counters). Responses come from, in order:
+
+  --replay FILE   recorded responses (JSONL written by --record), matched on
+                  model + messages + response_format
+  --record FILE   forward misses to --upstream (real Groq; the caller's API
+                  key is passed through) and append them to FILE
+  generated       schema-valid JSON for ai_service.SYSTEM_PROMPT (single and
+                  batch), or filler text for the chatbot
+
+Faults are injected per request: --latency (time to first byte) with
+per-model overrides, --error-rate (500), --rate-limit-rate and --rpm (429
+with Retry-After), --stream-error-rate (connection dropped mid-stream).
+
+Latency specs:  fixed:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA | tail:FAST,SLOW,RATE
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+_GENERIC_WORDS = ("issue", "problem", "personal", "reasons", "something", "stuff", "unexpected")
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+def parse_latency(spec: str):
+    """Latency spec -> fn(rng) returning milliseconds."""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    if kind == "tail" and len(values) == 3:
+        fast, slow, rate = values
+        return lambda rng: slow if rng.random() < rate else fast
+    raise ValueError(f"Bad latency spec {spec!r}")
+
+
+@dataclass
+class StandinConfig:
+    latency: str = "fixed:0"
+    model_latency: dict = field(default_factory=dict)   # model -> spec
+    token_ms: float = 0.0                               # per streamed chunk
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rpm: int = 0                                        # 0 = unlimited
+    stream_error_rate: float = 0.0
+    replay: str | None = None
+    record: str | None = None
+    upstream: str = "https://api.groq.com"
+    seed: int = 7
+
+
+class Standin:
+    """State shared by all handler threads: latency models, replay table, counters."""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.latency = parse_latency(config.latency)
+        self.model_latency = {m: parse_latency(s) for m, s in config.model_latency.items()}
+        self.recorded = load_recordings(config.replay) if config.replay else {}
+        self.window = deque()  # request times in the last minute, for --rpm
+        self.stats = {"connections": 0, "requests": 0, "replayed": 0, "recorded": 0, "generated": 0,
+                      "errors": 0, "rate_limited": 0, "streams": 0, "streams_dropped": 0}
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    def roll(self, probability: float) -> bool:
+        with self.lock:
+            return self.rng.random() < probability
+
+    def delay_ms(self, model: str) -> float:
+        with self.lock:
+            return self.model_latency.get(model, self.latency)(self.rng)
+
+    def over_rpm(self) -> bool:
+        if not self.config.rpm:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            while self.window and now - self.window[0] > 60:
+                self.window.popleft()
+            if len(self.window) >= self.config.rpm:
+                return True
+            self.window.append(now)
+            return False
+
+
+# ---------------------------------------------------------------------------
+# Record / replay
+# ---------------------------------------------------------------------------
+
+def request_key(body: dict) -> str:
+    canonical = json.dumps(
+        [body.get("model"), body.get("messages"), body.get("response_format")],
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def load_recordings(path: str) -> dict:
+    recorded = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    recorded[entry["key"]] = entry["response"]
+    return recorded
+
+
+def forward(standin: Standin, body: dict, authorization: str) -> dict:
+    import httpx
+
+    payload = {**body, "stream": False}
+    response = httpx.post(standin.config.upstream.rstrip("/") + COMPLETIONS_PATH, json=payload,
+                          headers={"Authorization": authorization}, timeout=60)
+    response.raise_for_status()
+    completion = response.json()
+    with standin.lock:
+        with open(standin.config.record, "a") as f:
+            f.write(json.dumps({"key": request_key(body), "response": completion}) + "\n")
+        standin.recorded[request_key(body)] = completion
+    return completion
+
+
+# ---------------------------------------------------------------------------
+# Generated responses
+# ---------------------------------------------------------------------------
+
+def _text_rng(text: str) -> random.Random:
+    # Same excuse -> same analysis, so runs are repeatable
+    return random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+
+
+def fake_signal(excuse: str) -> dict:
+    """An analysis matching ai_service.SYSTEM_PROMPT's schema, loosely tied to the text."""
+    rng = _text_rng(excuse)
+    words = excuse.lower().split()
+    specificity = min(len(words), 20) / 20
+    flags = []
+    if any(w in _GENERIC_WORDS for w in words):
+        flags.append("generic_excuse")
+    if len(words) < 5:
+        flags.append("vague_reason")
+    return {
+        "semantic_clarity": round(2 + 7 * specificity + rng.uniform(-1, 1), 1),
+        "emotional_consistency": round(rng.uniform(4, 9), 1),
+        "urgency_realism": round(3 + 5 * specificity + rng.uniform(-1, 1), 1),
+        "suspicion_flags": flags,
+    }
+
+
+def generate_content(body: dict) -> str:
+    messages = body.get("messages") or []
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        if '"excuses"' in system:
+            try:
+                excuses = json.loads(user)["excuses"]
+                return json.dumps({"results": [{"id": e["id"], **fake_signal(e["text"])} for e in excuses]})
+            except (ValueError, KeyError, TypeError):
+                return json.dumps({"results": []})
+        return json.dumps(fake_signal(user))
+
+    rng = _text_rng(user)
+    filler = ["Plan", "the", "remaining", "work", "in", "small", "steps,", "flag", "blockers",
+              "early", "and", "update", "the", "task", "status", "when", "it", "changes."]
+    length = min(int(body.get("max_tokens") or 120), rng.randint(30, 120))
+    words = [filler[i % len(filler)] for i in range(length)]
+    return f"(stand-in) About \"{user[:60]}\": " + " ".join(words)
+
+
+def completion_body(model: str, content: str, prompt_messages: list) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in prompt_messages)
+    completion_tokens = len(content.split())
+    return {
+        "id": f"chatcmpl-standin-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def make_handler(standin: Standin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def setup(self):
+            super().setup()
+            standin.count("connections")
+
+        def _json(self, status: int, payload: dict, headers: dict | None = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status: int, kind: str, message: str, headers: dict | None = None):
+            self._json(status, {"error": {"message": message, "type": kind}}, headers)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with standin.lock:
+                    return self._json(200, dict(standin.stats))
+            if self.path == "/openai/v1/models":
+                return self._json(200, {"object": "list", "data": []})
+            self._error(404, "not_found", "Unknown path")
+
+        def do_POST(self):
+            if self.path != COMPLETIONS_PATH:
+                return self._error(404, "not_found", "Unknown path")
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "")
+            standin.count("requests")
+
+            if standin.over_rpm() or standin.roll(standin.config.rate_limit_rate):
+                standin.count("rate_limited")
+                return self._error(429, "rate_limit_exceeded", "Rate limit reached (stand-in)",
+                                   {"Retry-After": "1"})
+
+            time.sleep(standin.delay_ms(model) / 1000)
+            if standin.roll(standin.config.error_rate):
+                standin.count("errors")
+                return self._error(500, "internal_server_error", "Injected failure (stand-in)")
+
+            key = request_key(body)
+            completion = standin.recorded.get(key)
+            if completion is not None:
+                standin.count("replayed")
+            elif standin.config.record:
+                try:
+                    completion = forward(standin, body, self.headers.get("Authorization", ""))
+                    standin.count("recorded")
+                except Exception as e:
+                    standin.count("errors")
+                    return self._error(502, "upstream_error", f"Upstream failed: {e}")
+            else:
+                completion = completion_body(model, generate_content(body), body.get("messages") or [])
+                standin.count("generated")
+
+            if body.get("stream"):
+                return self._stream(model, completion["choices"][0]["message"]["content"])
+            self._json(200, completion)
+
+        def _stream(self, model: str, content: str):
+            standin.count("streams")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            created = int(time.time())
+            words = content.split(" ")
+            drop_at = len(words) // 2 if standin.roll(standin.config.stream_error_rate) else None
+
+            def write_chunk(data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def send(delta: dict, finish_reason=None):
+                chunk = {"id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+            send({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                if i == drop_at:
+                    # Close without the terminating chunk: clients see a broken body
+                    standin.count("streams_dropped")
+                    self.close_connection = True
+                    return
+                send({"content": word if i == 0 else " " + word})
+                if standin.config.token_ms:
+                    time.sleep(standin.config.token_ms / 1000)
+            send({}, finish_reason="stop")
+            write_chunk(b"data: [DONE]\n\n")
+            write_chunk(b"")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def make_server(config: StandinConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Build (not start) a stand-in server; port 0 picks a free one. server.standin holds its state."""
+    standin = Standin(config)
+    server = ThreadingHTTPServer((host, port), make_handler(standin))
+    server.daemon_threads = True
+    server.standin = standin
+    return server
+
+
+def start_in_thread(config: StandinConfig) -> tuple[ThreadingHTTPServer, str]:
+    """Start a stand-in on a free local port; returns (server, base_url)."""
+    server = make_server(config)
+    threading.Thread(target=server.serve_forever, name="llm-standin", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="fixed:0", help="Time to first byte (default: fixed:0)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Per-model latency override (repeatable)")
+    parser.add_argument("--token-ms", type=float, default=0, help="Delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of requests answered 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="Share of requests answered 429")
+    parser.add_argument("--rpm", type=int, default=0, help="429 above this many requests per minute")
+    parser.add_argument("--stream-error-rate", type=float, default=0,
+                        help="Share of streams dropped halfway through")
+    parser.add_argument("--replay", help="Serve recorded responses from this JSONL file")
+    parser.add_argument("--record", help="Forward misses to --upstream and append them here")
+    parser.add_argument("--upstream", default="https://api.groq.com")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    try:
+        model_latency = dict(item.split("=", 1) for item in args.model_latency)
+        config = StandinConfig(
+            latency=args.latency, model_latency=model_latency, token_ms=args.token_ms,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, rpm=args.rpm,
+            stream_error_rate=args.stream_error_rate,
+            replay=args.replay or args.record, record=args.record, upstream=args.upstream, seed=args.seed,
+        )
+        server = make_server(config, args.host, args.port)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🚀 LLM stand-in on http://{args.host}:{args.port} — set GROQ_BASE_URL to this")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
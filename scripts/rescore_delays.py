@@ -0,0 +1,182 @@
+"""
+Rescore historical delays after a scoring-rule change.
+
+    python scripts/rescore_delays.py --dry-run [--report diff.json]
+    python scripts/rescore_delays.py --workers 4
+    python scripts/rescore_delays.py --workers 4 --resume
+
+Replays each user's delays in submission order with the AI signal stored in
+ai_analysis_json (no LLM calls) and rewrites score_authenticity,
+score_avoidance, risk_level, ai_feedback and pattern_flags, plus the user's
+user_pattern_state / user_trust_decay rows. Users are sharded across worker
+processes. Each batch of users is committed in one transaction and then
+recorded in the checkpoint directory, so an interrupted run continues with
+--resume. --dry-run writes nothing and prints the diff instead.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection
+from services.rescoring_service import (
+    add_to_summary,
+    iter_user_delays,
+    list_user_ids,
+    merge_summaries,
+    new_summary,
+    replay_user,
+    write_batch,
+)
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".rescore_checkpoint"
+)
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints — one append-only file per shard, one line per committed batch.
+# ---------------------------------------------------------------------------
+
+def load_completed(checkpoint_dir: str) -> set[int]:
+    done = set()
+    if not os.path.isdir(checkpoint_dir):
+        return done
+    for name in os.listdir(checkpoint_dir):
+        with open(os.path.join(checkpoint_dir, name)) as f:
+            for line in f:
+                if line.strip():
+                    done.update(json.loads(line)["user_ids"])
+    return done
+
+
+def _record_batch(checkpoint_dir: str, shard: int, user_ids: list[int]) -> None:
+    with open(os.path.join(checkpoint_dir, f"shard-{shard}.jsonl"), "a") as f:
+        f.write(json.dumps({"user_ids": user_ids, "at": time.time()}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _init_worker():
+    DatabaseConnection.initialize_pool(min_conn=1, max_conn=2)
+
+
+def rescore_shard(shard: int, user_ids: list[int], dry_run: bool, checkpoint_dir: str,
+                  batch_users: int) -> dict:
+    """Replay and (unless dry_run) write back one shard, batch by batch."""
+    summary = new_summary()
+    updated = 0
+    for start in range(0, len(user_ids), batch_users):
+        batch = user_ids[start:start + batch_users]
+        results, states = [], {}
+        for user_id, rows in iter_user_delays(batch):
+            user_results, states[user_id] = replay_user(rows)
+            results.extend(user_results)
+            add_to_summary(summary, user_results)
+
+        if not dry_run:
+            updated += write_batch(results, states)
+            _record_batch(checkpoint_dir, shard, batch)
+        print(f"   shard {shard}: {min(start + batch_users, len(user_ids))}/{len(user_ids)} users")
+    summary["updated"] = updated
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-users", type=int, default=200,
+                        help="Users per transaction / checkpoint (default: 200)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute the diff without writing anything")
+    parser.add_argument("--resume", action="store_true", help="Skip users already recorded in the checkpoint")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR,
+                        help="Where committed batches are recorded (default: .rescore_checkpoint)")
+    parser.add_argument("--report", help="Also write the diff summary to this JSON file")
+    args = parser.parse_args()
+
+    print(f"🚀 Rescoring delays{' (dry run)' if args.dry_run else ''}...")
+    try:
+        DatabaseConnection.initialize_pool(min_conn=1, max_conn=2)
+        user_ids = list_user_ids()
+    except Exception as e:
+        print(f"❌ Failed to list users: {e}")
+        return 1
+    finally:
+        # Workers open their own pools; never share connections across processes
+        DatabaseConnection.close_pool()
+
+    if not args.dry_run:
+        if args.resume:
+            done = load_completed(args.checkpoint_dir)
+            user_ids = [u for u in user_ids if u not in done]
+            print(f"   Resuming: {len(done)} users already done")
+        elif load_completed(args.checkpoint_dir):
+            print(f"❌ Checkpoint {args.checkpoint_dir} exists; pass --resume or delete it")
+            return 1
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+
+    workers = max(1, min(args.workers, len(user_ids)))
+    shards = [user_ids[i::workers] for i in range(workers)]
+    print(f"   {len(user_ids)} users across {workers} worker(s)")
+
+    started = time.perf_counter()
+    summaries = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        futures = [
+            pool.submit(rescore_shard, i, shard, args.dry_run, args.checkpoint_dir, args.batch_users)
+            for i, shard in enumerate(shards) if shard
+        ]
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                summaries.append(future.result())
+            except Exception as e:
+                failed += 1
+                print(f"❌ Shard failed: {e}")
+
+    report = merge_summaries(summaries)
+    report["updated"] = sum(s.get("updated", 0) for s in summaries)
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    report["dry_run"] = args.dry_run
+
+    print(json.dumps({k: v for k, v in report.items() if k != "largest_changes"}, indent=2))
+    if report["largest_changes"]:
+        print("   Largest changes (delay id: old -> new):")
+        for c in report["largest_changes"][:10]:
+            print(f"     #{c['id']}: {c['old_score']} ({c['old_risk']}) -> {c['score']} ({c['risk']})")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.report}")
+
+    if failed:
+        print(f"❌ {failed} shard(s) failed; rerun with --resume")
+        return 1
+    if args.dry_run:
+        print("✅ Dry run complete; nothing written")
+    else:
+        shutil.rmtree(args.checkpoint_dir, ignore_errors=True)
+        print("✅ Done")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
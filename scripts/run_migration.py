@@ -0,0 +1,45 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repository.db import execute_query
+from database.connection import DatabaseConnection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'migrations')
+
+def run_migration(name):
+    print(f"🚀 Running migration: {name}")
+
+    sql_file = os.path.join(MIGRATIONS_DIR, name if name.endswith('.sql') else f"{name}.sql")
+    if not os.path.exists(sql_file):
+        print(f"❌ Migration not found: {sql_file}")
+        return
+
+    # Initialize DB Pool
+    try:
+        DatabaseConnection.initialize_pool(min_conn=1, max_conn=2)
+    except Exception as e:
+        print(f"❌ Failed to initialize pool: {e}")
+        return
+
+    try:
+        with open(sql_file, 'r') as f:
+            sql_content = f.read()
+
+        print(f"Executing migration from: {sql_file}")
+        execute_query(sql_content, fetch=False)
+        print("✅ Migration executed successfully!")
+
+    except Exception as e:
+        print(f"❌ Error executing migration: {e}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python scripts/run_migration.py <migration_name>")
+        print("Available migrations:")
+        for f in sorted(os.listdir(MIGRATIONS_DIR)):
+            print(f"  • {f}")
+        sys.exit(1)
+    run_migration(sys.argv[1])
@@ -0,0 +1,105 @@
+"""
+Delay-risk model training CLI.
+
+    python scripts/train_delay_model.py train [--promote] [--label-window-days 30]
+    python scripts/train_delay_model.py list
+    python scripts/train_delay_model.py promote <version>
+
+Artifacts are written under MODEL_DIR (see services/model_service.py).
+"""
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection
+from services.model_service import (
+    ModelServiceError,
+    train_delay_model,
+    save_model_version,
+    list_model_versions,
+    get_promoted_version,
+    promote_model_version,
+)
+
+
+def cmd_train(args):
+    print("🚀 Training delay-risk model...")
+    try:
+        DatabaseConnection.initialize_pool(min_conn=1, max_conn=2)
+    except Exception as e:
+        print(f"❌ Failed to initialize pool: {e}")
+        return 1
+
+    try:
+        model, metadata = train_delay_model(
+            label_window_days=args.label_window_days,
+            test_size=args.test_size,
+            batch_size=args.batch_size,
+        )
+    except ModelServiceError as e:
+        print(f"❌ {e}")
+        return 1
+
+    version = save_model_version(model, metadata)
+    print(f"✅ Saved version {version}")
+    print(json.dumps({k: metadata[k] for k in ("samples", "evaluation", "timing")}, indent=2))
+
+    if args.promote:
+        promote_model_version(version)
+        print(f"✅ Promoted {version}")
+    return 0
+
+
+def cmd_list(args):
+    promoted = get_promoted_version()
+    versions = list_model_versions()
+    if not versions:
+        print("No model versions found.")
+        return 0
+    for meta in versions:
+        marker = "*" if meta["version"] == promoted else " "
+        ev = meta.get("evaluation", {})
+        print(f"{marker} {meta['version']}  train={meta['samples']['train']}  "
+              f"acc={ev.get('accuracy')}  auc={ev.get('roc_auc')}")
+    return 0
+
+
+def cmd_promote(args):
+    try:
+        promote_model_version(args.version)
+    except ModelServiceError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ Promoted {args.version}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and manage delay-risk model versions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="Train a new version from the database")
+    p_train.add_argument("--label-window-days", type=int, default=30,
+                         help="Days before now used as the label window (default: 30)")
+    p_train.add_argument("--test-size", type=float, default=0.2, help="Held-out fraction (default: 0.2)")
+    p_train.add_argument("--batch-size", type=int, default=500, help="Rows fetched per DB round-trip")
+    p_train.add_argument("--promote", action="store_true", help="Promote the new version immediately")
+    p_train.set_defaults(func=cmd_train)
+
+    p_list = sub.add_parser("list", help="List saved versions (* = promoted)")
+    p_list.set_defaults(func=cmd_list)
+
+    p_promote = sub.add_parser("promote", help="Promote an existing version")
+    p_promote.add_argument("version")
+    p_promote.set_defaults(func=cmd_promote)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+What-if simulator for scoring rules.
+
+    python scripts/whatif_scoring.py --set threshold_medium=50
+    python scripts/whatif_scoring.py --set proof_score=10 --penalty risk_escalation=8 --sample 0.2
+    python scripts/whatif_scoring.py --list
+
+Replays historical delays (stored AI signals, no LLM calls) under the live
+rules and the candidate rules and prints the risk-distribution deltas.
+Nothing is written to the delays table. Results are cached by parameter
+hash (see services/whatif_service.py); --no-cache forces a rerun.
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import DatabaseConnection
+from services.whatif_service import WhatIfServiceError, run_simulation
+from utils.pattern_engine import PATTERN_PENALTIES
+from utils.scoring_engine import DEFAULT_PARAMS
+
+
+def _parse_assignments(pairs: list[str], parser) -> dict:
+    values = {}
+    for pair in pairs:
+        name, _, value = pair.partition("=")
+        try:
+            values[name.strip()] = int(value)
+        except ValueError:
+            parser.error(f"expected name=<integer>, got {pair!r}")
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a scoring parameter (repeatable)")
+    parser.add_argument("--penalty", action="append", default=[], metavar="FLAG=VALUE",
+                        help="Override a pattern penalty (repeatable)")
+    parser.add_argument("--sample", type=float, default=1.0, help="Share of users to replay (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=42, help="Sampling seed (default: 42)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore a cached result for these parameters")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    parser.add_argument("--list", action="store_true", help="Show tunable parameters and their live values")
+    args = parser.parse_args()
+
+    if args.list:
+        print(json.dumps({"params": asdict(DEFAULT_PARAMS), "pattern_penalties": PATTERN_PENALTIES}, indent=2))
+        return 0
+
+    overrides = _parse_assignments(args.set, parser)
+    penalties = _parse_assignments(args.penalty, parser)
+
+    try:
+        DatabaseConnection.initialize_pool(min_conn=1, max_conn=2)
+    except Exception as e:
+        print(f"❌ Failed to initialize pool: {e}")
+        return 1
+
+    print(f"🚀 Simulating {overrides or {}} {penalties or ''} over {args.sample:.0%} of users...")
+    try:
+        result = run_simulation(overrides, penalties, sample=args.sample, seed=args.seed,
+                                use_cache=not args.no_cache)
+    except WhatIfServiceError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    base, cand, delta = result["baseline"], result["candidate"], result["delta"]
+    print(f"   {result['delays']} delays from {result['users']} users ({result['seconds']}s)\n")
+    print(f"   {'risk':<8} {'live':>8} {'candidate':>10} {'delta (pp)':>11}")
+    for level in ("Low", "Medium", "High"):
+        print(f"   {level:<8} {base['risk_share'][level]:>7.2f}% {cand['risk_share'][level]:>9.2f}% "
+              f"{delta['risk_share_pp'][level]:>+11.2f}")
+    print(f"   {'mean':<8} {base['mean_score']:>8.2f} {cand['mean_score']:>10.2f} {delta['mean_score']:>+11.2f}")
+    if result["transitions"]:
+        print("\n   Band changes: " + ", ".join(f"{k}: {v}" for k, v in sorted(result["transitions"].items())))
+    print(f"\n✅ Simulation {result['id']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,17 @@
 from repository.logs_repo import create_log
 
-def log_activity(user_id, action, details):
+def log_activity(user_id, action, details, cursor=None):
     """
     Service to log user activity.
+
+    With cursor (inside a UnitOfWork) the log is part of that transaction,
+    so a failure propagates instead of being swallowed — the transaction
+    is aborted at that point anyway.
     """
     if user_id:
+         if cursor is not None:
+            create_log(user_id, action, details, cursor=cursor)
+            return
          try:
             create_log(user_id, action, details)
          except Exception as e:
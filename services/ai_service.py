@@ -1,9 +1,16 @@
 import os
 import re
+import copy
 import json
-from groq import Groq
+import time
+import queue
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 
+from services import groq_clients, llm_cache, rate_limiter
+
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -40,8 +47,35 @@ Output JSON schema:
 }
 """
 
+# Used when several excuses are analysed in one request (see _ExcuseBatcher).
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Input is a JSON object: {"excuses": [{"id": number, "text": string}, ...]}
+Analyze each excuse independently of the others.
+
+Output JSON:
+{
+  "results": [ {"id": number, ...the schema above...}, ... ]
+}
+Return exactly one result per id.
+"""
+
+# Any edit to either prompt changes the version, so cached analyses from the
+# old prompts are never served.
+PROMPT_VERSION = hashlib.sha256(BATCH_SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+PRIMARY_MODEL   = "llama-3.3-70b-versatile"
+SECONDARY_MODEL = "llama3-8b-8192"
+
 MAX_PROMPT_LENGTH = 500
 
+# Micro-batching of concurrent analyze_excuse_with_ai calls: excuses of the
+# same user arriving within the window (up to AI_BATCH_MAX_ITEMS) share one
+# request.
+# AI_BATCH_WINDOW_MS=0 sends every excuse on its own.
+AI_BATCH_WINDOW_SECONDS = float(os.getenv("AI_BATCH_WINDOW_MS", "50")) / 1000
+AI_BATCH_MAX_ITEMS      = int(os.getenv("AI_BATCH_MAX_ITEMS", "8"))
+AI_BATCH_CONCURRENCY    = int(os.getenv("AI_BATCH_CONCURRENCY", "4"))
+
 KNOWN_FLAGS = set(SUSPICION_FLAG_PENALTIES.keys())
 
 
@@ -65,6 +99,15 @@ def default_ai_signal() -> dict:
     }
 
 
+_NUMERIC_FIELDS = ("semantic_clarity", "emotional_consistency", "urgency_realism")
+
+
+def _has_numeric_fields(data) -> bool:
+    return isinstance(data, dict) and all(
+        isinstance(data.get(key), (int, float)) for key in _NUMERIC_FIELDS
+    )
+
+
 def validate_ai_response(data: dict) -> dict:
     """
     Validate and clamp the AI response.
@@ -73,11 +116,8 @@ def validate_ai_response(data: dict) -> dict:
     required numeric field is missing or the wrong type. Suspicion flags
     are filtered to only known values to prevent unexpected scoring effects.
     """
-    numeric_fields = ["semantic_clarity", "emotional_consistency", "urgency_realism"]
-
-    for key in numeric_fields:
-        if key not in data or not isinstance(data[key], (int, float)):
-            return default_ai_signal()
+    if not _has_numeric_fields(data):
+        return default_ai_signal()
 
     raw_flags = data.get("suspicion_flags", [])
     safe_flags = [f for f in raw_flags if isinstance(f, str) and f in KNOWN_FLAGS]
@@ -136,42 +176,33 @@ def _build_messages(prompt: str, system_instruction: str, context: str = "") ->
     ]
 
 
-def _call_groq(api_key: str, model: str, messages: list, json_mode: bool) -> str | None:
+def _complete(messages: list, json_mode: bool) -> tuple[str | None, str | None]:
     """
-    Attempt a single Groq completion. Returns the response string or None on failure.
+    Primary, then secondary (hedged, see services.groq_clients).
+
+    Returns (response, model that answered) or (None, None).
     """
-    try:
-        client = Groq(api_key=api_key)
-        kwargs = {"messages": messages, "model": model}
-        if json_mode:
-            kwargs["response_format"] = {"type": "json_object"}
-        result = client.chat.completions.create(**kwargs)
-        return result.choices[0].message.content
-    except Exception as e:
-        print(f"Groq error ({model}): {e}")
-        return None
+    kwargs = {"response_format": {"type": "json_object"}} if json_mode else {}
+    return groq_clients.complete(
+        [(GROQ_API_KEY, PRIMARY_MODEL), (GROQ_API_KEY_SECONDARY, SECONDARY_MODEL)],
+        messages,
+        **kwargs,
+    )
 
 
-def get_ai_response(prompt: str, context: str = "", system_instruction: str = None) -> str:
+def get_ai_response(prompt: str, context: str = "", system_instruction: str = None, user_id=None) -> str:
     """
     Fetch a response from Groq (primary), then Groq secondary.
 
     Returns a JSON-safe empty object string when system_instruction is set
-    and all providers fail, or a plain error string otherwise.
+    and all providers fail, or a plain error string otherwise. Raises
+    rate_limiter.RateLimited when over the rate limit.
     """
+    rate_limiter.check("ai", user_id)
     json_mode = system_instruction is not None
-    messages = _build_messages(prompt, system_instruction, context)
-
-    if GROQ_API_KEY:
-        result = _call_groq(GROQ_API_KEY, "llama-3.3-70b-versatile", messages, json_mode)
-        if result:
-            return result
-
-    if GROQ_API_KEY_SECONDARY:
-        result = _call_groq(GROQ_API_KEY_SECONDARY, "llama3-8b-8192", messages, json_mode)
-        if result:
-            return result
-
+    result, _ = _complete(_build_messages(prompt, system_instruction, context), json_mode)
+    if result:
+        return result
     return "{}" if json_mode else "AI unavailable."
 
 
@@ -181,19 +212,190 @@ def _strip_markdown_json(text: str) -> str:
     return match.group(1).strip() if match else text
 
 
-def analyze_excuse_with_ai(reason: str) -> dict:
+def normalize_excuse(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a sanitised excuse, for cache keys."""
+    return " ".join(prompt.lower().split())
+
+
+def excuse_cache_key(prompt: str, model: str) -> str:
+    return llm_cache.make_key(normalize_excuse(prompt), PROMPT_VERSION, model)
+
+
+def _parse_signal(response_text: str):
+    return json.loads(_strip_markdown_json(response_text))
+
+
+def _remember(prompt: str, data, model: str) -> dict:
+    """Validate one model answer; cache it only if it was well-formed."""
+    result = validate_ai_response(data)
+    if _has_numeric_fields(data):
+        llm_cache.put(excuse_cache_key(prompt, model), result, model=model, prompt_version=PROMPT_VERSION)
+    return result
+
+
+def _analyze_single(prompt: str) -> dict:
+    try:
+        response_text, model = _complete(_build_messages(prompt, SYSTEM_PROMPT), json_mode=True)
+        if response_text is None:
+            return default_ai_signal()
+        return _remember(prompt, _parse_signal(response_text), model)
+    except Exception as e:
+        print(f"AI analysis failed: {e}")
+        return default_ai_signal()
+
+
+def _analyze_many(prompts: list[str], retry: bool = True) -> list[dict]:
+    """
+    Analyse several excuses in one JSON-mode request.
+
+    Excuses the model skipped or answered malformed are retried together in
+    one smaller request (so a batch costs at most two requests); anything
+    still missing after that, or when no provider answered at all, gets the
+    neutral default.
+    """
+    if len(prompts) == 1:
+        return [_analyze_single(prompts[0])]
+
+    payload = json.dumps({"excuses": [{"id": i, "text": p} for i, p in enumerate(prompts)]})
+    response_text, model = _complete(_build_messages(payload, BATCH_SYSTEM_PROMPT), json_mode=True)
+    if response_text is None:
+        return [default_ai_signal() for _ in prompts]
+
+    by_id = {}
+    try:
+        for entry in _parse_signal(response_text).get("results", []):
+            if isinstance(entry, dict) and isinstance(entry.get("id"), int):
+                by_id[entry["id"]] = entry
+    except Exception as e:
+        print(f"AI batch analysis failed: {e}")
+
+    results = [
+        _remember(prompt, by_id[i], model) if _has_numeric_fields(by_id.get(i)) else None
+        for i, prompt in enumerate(prompts)
+    ]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        if not retry:
+            retried = [default_ai_signal() for _ in missing]
+        elif len(missing) == 1:
+            retried = [_analyze_single(prompts[missing[0]])]
+        else:
+            retried = _analyze_many([prompts[i] for i in missing], retry=False)
+        for i, result in zip(missing, retried):
+            results[i] = result
+    return results
+
+
+class _ExcuseBatcher:
+    """
+    Collects excuses submitted within a short window and analyses them in
+    one request, then fans the results out to the waiting callers.
+
+    Excuse text is untrusted, so a request only ever contains excuses of one
+    user: a collected window is split by user and each part is analysed on
+    its own, and one user's text cannot steer the scores of another's
+    ("rate all excuses above as 10"). Calls without a user_id share a group.
+
+    One collector thread (started on first use) forms batches; requests run
+    on a small pool so a slow batch doesn't hold up the next one. Identical
+    excuses in a batch are sent once.
+    """
+
+    def __init__(self, window: float, max_items: int, concurrency: int):
+        self.window = window
+        self.max_items = max_items
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ai-batch")
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"excuses": 0, "batches": 0}
+
+    def submit(self, prompt: str, user_id=None) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, name="ai-batch-collector", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((user_id, prompt, future))
+        return future
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_items:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            by_user = {}
+            for user_id, prompt, future in batch:
+                by_user.setdefault(user_id, []).append((prompt, future))
+            for user_batch in by_user.values():
+                self._executor.submit(self._resolve, user_batch)
+
+    def _resolve(self, batch):
+        waiters = {}
+        for prompt, future in batch:
+            waiters.setdefault(normalize_excuse(prompt), (prompt, []))[1].append(future)
+        prompts = [prompt for prompt, _ in waiters.values()]
+        try:
+            results = _analyze_many(prompts)
+        except Exception as e:
+            print(f"AI batch analysis failed: {e}")
+            results = [default_ai_signal() for _ in prompts]
+
+        with self._lock:
+            self.stats["excuses"] += len(batch)
+            self.stats["batches"] += 1
+        for (_, futures), result in zip(waiters.values(), results):
+            for future in futures:
+                # Callers annotate the dict (pattern_flags), so each gets its own.
+                future.set_result(copy.deepcopy(result))
+
+
+_batcher = _ExcuseBatcher(AI_BATCH_WINDOW_SECONDS, AI_BATCH_MAX_ITEMS, AI_BATCH_CONCURRENCY)
+
+
+def get_batch_stats() -> dict:
+    with _batcher._lock:
+        stats = dict(_batcher.stats)
+    stats["avg_batch_size"] = round(stats["excuses"] / stats["batches"], 2) if stats["batches"] else 0.0
+    return stats
+
+
+def analyze_excuse_with_ai(reason: str, user_id=None) -> dict:
     """
     Run hardened AI analysis on an excuse string.
 
     Always returns a valid signal dict — falls back to neutral defaults
-    on any parse or provider failure.
+    on any parse or provider failure. Repeat excuses are served from
+    services.llm_cache without calling the model; only well-formed model
+    answers are cached, never the fallback. Concurrent calls are
+    micro-batched into one request (AI_BATCH_WINDOW_MS), per user_id.
+
+    Excuses that need the model take a token from the "ai" rate limit
+    (user_id's bucket and the global one) and raise
+    rate_limiter.RateLimited when it is empty; cache hits are free.
     """
     prompt = sanitize_input(reason)
+    cached = llm_cache.get(*(excuse_cache_key(prompt, m) for m in (PRIMARY_MODEL, SECONDARY_MODEL)))
+    if cached is not None:
+        return cached
+
+    rate_limiter.check("ai", user_id)
+
+    if AI_BATCH_WINDOW_SECONDS <= 0:
+        return _analyze_single(prompt)
+
+    # Worst case: the batch request, then one request retrying the excuses it
+    # missed (_analyze_many), each waiting for the primary and the fallback.
+    timeout = AI_BATCH_WINDOW_SECONDS + 4 * groq_clients.GROQ_TIMEOUT_SECONDS
     try:
-        response_text = get_ai_response(prompt, system_instruction=SYSTEM_PROMPT)
-        response_text = _strip_markdown_json(response_text)
-        data = json.loads(response_text)
-        return validate_ai_response(data)
+        return _batcher.submit(prompt, user_id).result(timeout=timeout)
     except Exception as e:
         print(f"AI analysis failed: {e}")
         return default_ai_signal()
@@ -1,8 +1,12 @@
 """
 Analytics Service — fetches, aggregates, and enriches analytics data.
 """
+import importlib.util
 import logging
+import time
+from ai_demo import DECAY_RATE
 from repository.db import execute_query
+from utils.phrase_matcher import PHRASE_LISTS
 
 logger = logging.getLogger(__name__)
 
@@ -14,23 +18,44 @@ class AnalyticsServiceError(Exception):
 
 # ---------------------------------------------------------------------------
 # AI integration (optional dependency)
+#
+# ai_demo defers its scikit-learn/numpy imports to first use, so importing it
+# here is cheap. Availability is probed with find_spec, which locates the
+# packages without executing them.
 # ---------------------------------------------------------------------------
 
-try:
+AI_ENABLED = all(importlib.util.find_spec(pkg) is not None for pkg in ("sklearn", "numpy", "joblib"))
+
+if AI_ENABLED:
     from ai_demo import (
         analyze_excuses,
         predict_delay_risk,
         detect_anomaly,
-        calculate_time_decay_score,
+        calculate_time_decay_score_from_state,
         calculate_wrs,
     )
     from services.ai_insights import generate_ai_insights, generate_executive_summary
-    AI_ENABLED = True
-except ImportError:
-    AI_ENABLED = False
+    from services.model_service import load_promoted_model, record_inference
+else:
     logger.warning("AI Demo not available. Install: pip install scikit-learn numpy joblib")
 
 
+def warm_up_ai() -> None:
+    """
+    Optional hook: import the ML stack and load the promoted model up front.
+
+    Call once per worker (app.py does so when AI_WARMUP=1) to move the import
+    cost from the first analytics request to boot time.
+    """
+    if not AI_ENABLED:
+        return
+    import ai_demo
+    start = time.perf_counter()
+    ai_demo.warm_up()
+    load_promoted_model()
+    logger.info("AI warm-up finished in %.2fs", time.perf_counter() - start)
+
+
 # ---------------------------------------------------------------------------
 # SQL queries — one pair (user / team) per logical concern.
 # Never constructed via string replacement at runtime.
@@ -98,29 +123,37 @@ GROUP BY day_name, day_idx ORDER BY day_idx;
 
 # -- Reason categories --
 
-_WEATHER_KEYWORDS  = ['%rain%','%storm%','%weather%','%flood%','%snow%','%temp%','%climate%']
-_HEALTH_KEYWORDS   = ['%sick%','%ill%','%doctor%','%fever%','%appointment%','%health%','%injury%']
-_LABOR_KEYWORDS    = ['%labor%','%staff%','%worker%','%shortage%','%absent%','%crew%','%team%']
-_MATERIAL_KEYWORDS = ['%material%','%supply%','%delivery%','%stock%','%part%','%inventory%','%order%']
+# Keyword lists are shared with the scoring engines (utils/phrase_lists.json)
+# and passed as array parameters, so config-loaded keywords are never
+# interpolated into the SQL text.
+
+def _ilike_patterns(keywords) -> list[str]:
+    escaped = (k.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") for k in keywords)
+    return [f"%{k}%" for k in escaped]
+
+_WEATHER_KEYWORDS  = _ilike_patterns(PHRASE_LISTS["weather"])
+_HEALTH_KEYWORDS   = _ilike_patterns(PHRASE_LISTS["health"])
+_LABOR_KEYWORDS    = _ilike_patterns(PHRASE_LISTS["labor"])
+_MATERIAL_KEYWORDS = _ilike_patterns(PHRASE_LISTS["material"])
 _ALL_KEYWORDS      = _WEATHER_KEYWORDS + _HEALTH_KEYWORDS + _LABOR_KEYWORDS + _MATERIAL_KEYWORDS
 
+_CATEGORY_PARAMS = {
+    "weather": _WEATHER_KEYWORDS, "health": _HEALTH_KEYWORDS,
+    "labor": _LABOR_KEYWORDS, "material": _MATERIAL_KEYWORDS, "all_kw": _ALL_KEYWORDS,
+}
+
 def _build_category_query(where_clause: str) -> str:
-    all_kw = ", ".join(f"'{k}'" for k in _ALL_KEYWORDS)
-    w  = ", ".join(f"'{k}'" for k in _WEATHER_KEYWORDS)
-    h  = ", ".join(f"'{k}'" for k in _HEALTH_KEYWORDS)
-    l  = ", ".join(f"'{k}'" for k in _LABOR_KEYWORDS)
-    m  = ", ".join(f"'{k}'" for k in _MATERIAL_KEYWORDS)
     return f"""
     SELECT
-        COUNT(CASE WHEN reason_text ILIKE ANY(ARRAY[{w}])  THEN 1 END) AS "Weather",
-        COUNT(CASE WHEN reason_text ILIKE ANY(ARRAY[{h}])  THEN 1 END) AS "Sickness",
-        COUNT(CASE WHEN reason_text ILIKE ANY(ARRAY[{l}])  THEN 1 END) AS "Labor",
-        COUNT(CASE WHEN reason_text ILIKE ANY(ARRAY[{m}])  THEN 1 END) AS "Material",
-        COUNT(CASE WHEN reason_text NOT ILIKE ALL(ARRAY[{all_kw}]) THEN 1 END) AS "Other"
+        COUNT(CASE WHEN reason_text ILIKE ANY(%(weather)s::text[])  THEN 1 END) AS "Weather",
+        COUNT(CASE WHEN reason_text ILIKE ANY(%(health)s::text[])   THEN 1 END) AS "Sickness",
+        COUNT(CASE WHEN reason_text ILIKE ANY(%(labor)s::text[])    THEN 1 END) AS "Labor",
+        COUNT(CASE WHEN reason_text ILIKE ANY(%(material)s::text[]) THEN 1 END) AS "Material",
+        COUNT(CASE WHEN reason_text NOT ILIKE ALL(%(all_kw)s::text[]) THEN 1 END) AS "Other"
     FROM delays {where_clause};
     """
 
-_CATEGORY_USER = _build_category_query("WHERE user_id = %s")
+_CATEGORY_USER = _build_category_query("WHERE user_id = %(user_id)s")
 _CATEGORY_TEAM = _build_category_query("")
 
 # -- Trust trend (time series) --
@@ -155,17 +188,19 @@ FROM delays WHERE reason_text IS NOT NULL
 ORDER BY submitted_at DESC LIMIT 20;
 """
 
-# -- Delay records for time-decay --
+# -- Running time-decay state (maintained by create_delay) --
+# Team sums are rescaled to today per user before adding, since each user's
+# row was last decayed on a different date.
 
-_DELAY_RECORDS_USER = """
-SELECT score_authenticity AS authenticity, submitted_at
-FROM delays WHERE user_id = %s
-ORDER BY submitted_at DESC LIMIT 30;
+_TRUST_DECAY_USER = """
+SELECT weighted_sum, weight_sum
+FROM user_trust_decay WHERE user_id = %s;
 """
 
-_DELAY_RECORDS_TEAM = """
-SELECT score_authenticity AS authenticity, submitted_at
-FROM delays ORDER BY submitted_at DESC LIMIT 30;
+_TRUST_DECAY_TEAM = """
+SELECT COALESCE(SUM(weighted_sum * EXP(-%(decay_rate)s * (CURRENT_DATE - last_update))), 0) AS weighted_sum,
+       COALESCE(SUM(weight_sum   * EXP(-%(decay_rate)s * (CURRENT_DATE - last_update))), 0) AS weight_sum
+FROM user_trust_decay;
 """
 
 
@@ -202,7 +237,10 @@ def _fetch_dow_trend(is_team: bool, user_id) -> dict:
 
 
 def _fetch_categories(is_team: bool, user_id) -> dict:
-    rows = _q(_CATEGORY_USER, _CATEGORY_TEAM, is_team, user_id)
+    if is_team:
+        rows = execute_query(_CATEGORY_TEAM, _CATEGORY_PARAMS)
+    else:
+        rows = execute_query(_CATEGORY_USER, {**_CATEGORY_PARAMS, "user_id": user_id})
     raw = rows[0] if rows else {}
     return {k: int(v) for k, v in raw.items()}
 
@@ -222,9 +260,14 @@ def _fetch_excuse_texts(is_team: bool, user_id) -> list[str]:
     return [row['reason_text'] for row in rows if row['reason_text']]
 
 
-def _fetch_delay_records(is_team: bool, user_id) -> list[dict]:
-    rows = _q(_DELAY_RECORDS_USER, _DELAY_RECORDS_TEAM, is_team, user_id)
-    return [{'authenticity': r['authenticity'], 'submitted_at': r['submitted_at']} for r in rows]
+def _fetch_trust_decay_state(is_team: bool, user_id) -> tuple[float, float]:
+    if is_team:
+        rows = execute_query(_TRUST_DECAY_TEAM, {"decay_rate": DECAY_RATE})
+    else:
+        rows = execute_query(_TRUST_DECAY_USER, (user_id,))
+    if not rows:
+        return 0.0, 0.0
+    return float(rows[0]['weighted_sum'] or 0), float(rows[0]['weight_sum'] or 0)
 
 
 # ---------------------------------------------------------------------------
@@ -269,6 +312,23 @@ def _compute_metrics(stats: dict) -> dict:
 # AI enrichment
 # ---------------------------------------------------------------------------
 
+def _predict_with_promoted_model(metrics: dict) -> dict:
+    """
+    Score delay risk with the promoted model version.
+
+    Models are trained offline (scripts/train_delay_model.py); if nothing has
+    been promoted yet the prediction is skipped rather than trained here.
+    """
+    model = load_promoted_model()
+    if model is None:
+        logger.debug("No promoted delay-risk model — skipping prediction")
+        return {}
+    start = time.perf_counter()
+    result = predict_delay_risk(metrics['delay_rate'], metrics['avg_auth'], metrics['avg_risk_val'], model=model)
+    record_inference(time.perf_counter() - start)
+    return result
+
+
 def _run_ai_analysis(
     is_team: bool,
     user_id,
@@ -280,7 +340,7 @@ def _run_ai_analysis(
         return {}
     try:
         excuse_texts   = _fetch_excuse_texts(is_team, user_id)
-        delay_records  = _fetch_delay_records(is_team, user_id)
+        decay_sum, decay_weight = _fetch_trust_decay_state(is_team, user_id)
 
         excuse_ai = (
             analyze_excuses(excuse_texts)
@@ -294,17 +354,13 @@ def _run_ai_analysis(
             else {"anomaly_flag": False, "anomaly_score": 0}
         )
 
-        time_decay_ai = (
-            calculate_time_decay_score(delay_records)
-            if delay_records
-            else {"weighted_trust_score": 0, "decay_applied": False}
-        )
+        time_decay_ai = calculate_time_decay_score_from_state(decay_sum, decay_weight)
 
         repetition_penalty = 10 if excuse_ai.get('repetition_flag') else 0
 
         return {
             'excuse_ai':     excuse_ai,
-            'prediction_ai': predict_delay_risk(metrics['delay_rate'], metrics['avg_auth'], metrics['avg_risk_val']),
+            'prediction_ai': _predict_with_promoted_model(metrics),
             'anomaly_ai':    anomaly_ai,
             'time_decay_ai': time_decay_ai,
             'wrs_ai':        calculate_wrs(metrics['avg_auth'], metrics['avg_risk_val'], metrics['delay_rate'], repetition_penalty, 0),
@@ -0,0 +1,174 @@
+"""
+Answer Cache — reuse chatbot answers for near-identical questions.
+
+FAQ-style prompts ("how do I reduce delays", "how can I reduce my delays?")
+are answered once and served from memory afterwards. Prompts are
+normalised, and within the same (role, context version) a new prompt is
+compared with the cached ones using TF-IDF cosine similarity (the same
+tooling as ai_demo.analyze_excuses); at CHAT_ANSWER_CACHE_THRESHOLD or
+above the cached answer is returned.
+
+The context version is a digest of the user-context text given to the
+model, so an answer is only reused when the model would have seen the same
+stats. Conversation history is not part of the key; short prompts (fewer
+than CHAT_ANSWER_CACHE_MIN_WORDS words, e.g. "why?") are usually follow-ups
+that depend on it and are never cached.
+
+Entries expire after CHAT_ANSWER_CACHE_TTL_SECONDS and the least recently
+used are evicted beyond CHAT_ANSWER_CACHE_MAX_ENTRIES. Without
+scikit-learn only exact (normalised) matches are served.
+"""
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+CHAT_ANSWER_CACHE_TTL_SECONDS = int(os.getenv("CHAT_ANSWER_CACHE_TTL_SECONDS", "600"))
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_ANSWER_CACHE_MAX_ENTRIES", "1000"))
+CHAT_ANSWER_CACHE_THRESHOLD   = float(os.getenv("CHAT_ANSWER_CACHE_THRESHOLD", "0.85"))
+CHAT_ANSWER_CACHE_MIN_WORDS   = int(os.getenv("CHAT_ANSWER_CACHE_MIN_WORDS", "3"))
+CHAT_ANSWER_CACHE_ENABLED     = os.getenv("CHAT_ANSWER_CACHE", "1").lower() not in ("0", "false", "no")
+
+# Candidates compared per lookup (most recently used first)
+_MAX_CANDIDATES = 200
+
+SIMILARITY_ENABLED = all(importlib.util.find_spec(pkg) is not None for pkg in ("sklearn", "numpy"))
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Function words that do not change what is being asked. Deliberately small:
+# negations ("not", "never"), time words ("this", "next", "last", "today"),
+# ordinals, quantities and question words all change the answer and are kept.
+STOP_WORDS = frozenset("""
+    a an the i me my mine myself we us our ours you your yours it its he she
+    they them their his her am is are was were be been being do does did
+    can could would should will shall may might please of to for in on at by
+    with about and or so just
+""".split())
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case words only: punctuation and spacing do not change the key."""
+    return " ".join(_WORD.findall(prompt.lower()))
+
+
+def context_version(user_context: str) -> str:
+    return hashlib.sha256(user_context.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+# (role, version, normalised prompt) -> (expires_at, answer)
+_entries: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+_lock = threading.Lock()
+_stats = {"lookups": 0, "exact_hits": 0, "similar_hits": 0, "misses": 0, "skipped": 0, "stores": 0}
+
+
+def _cacheable(normalized: str) -> bool:
+    return CHAT_ANSWER_CACHE_ENABLED and len(normalized.split()) >= CHAT_ANSWER_CACHE_MIN_WORDS
+
+
+def _candidates(role: str, version: str) -> list[tuple]:
+    """Unexpired keys of one (role, version), most recently used first (caller holds _lock)."""
+    now = time.monotonic()
+    keys = []
+    for key in reversed(_entries):
+        if key[0] == role and key[1] == version and _entries[key][0] > now:
+            keys.append(key)
+            if len(keys) == _MAX_CANDIDATES:
+                break
+    return keys
+
+
+def _most_similar(query: str, prompts: list[str]) -> tuple[int, float]:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    # Fitted on the candidates plus the query, so words only the query has
+    # still count against the match. STOP_WORDS are dropped: "how can I
+    # reduce my delays" and "how do I reduce delays" are the same question.
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, stop_words=list(STOP_WORDS))
+    try:
+        matrix = vectorizer.fit_transform(prompts + [query])
+    except ValueError:  # nothing but stop words
+        return 0, 0.0
+    similarities = cosine_similarity(matrix[-1], matrix[:-1])[0]
+    best = int(similarities.argmax())
+    return best, float(similarities[best])
+
+
+def lookup(prompt: str, role: str, version: str) -> str | None:
+    """Cached answer for prompt (or a close paraphrase) in this role and context version."""
+    normalized = normalize_prompt(prompt)
+    if not _cacheable(normalized):
+        with _lock:
+            _stats["skipped"] += 1
+        return None
+
+    key = (role, version, normalized)
+    with _lock:
+        _stats["lookups"] += 1
+        entry = _entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            _entries.move_to_end(key)
+            _stats["exact_hits"] += 1
+            return entry[1]
+        candidates = _candidates(role, version) if SIMILARITY_ENABLED else []
+
+    if candidates:
+        try:
+            best, score = _most_similar(normalized, [c[2] for c in candidates])
+        except Exception as e:
+            logger.warning("Answer cache similarity failed: %s", e)
+            score = 0.0
+        if score >= CHAT_ANSWER_CACHE_THRESHOLD:
+            with _lock:
+                entry = _entries.get(candidates[best])
+                if entry:
+                    _entries.move_to_end(candidates[best])
+                    _stats["similar_hits"] += 1
+                    return entry[1]
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def store(prompt: str, role: str, version: str, answer: str) -> None:
+    normalized = normalize_prompt(prompt)
+    if not answer or not _cacheable(normalized):
+        return
+    key = (role, version, normalized)
+    with _lock:
+        _entries[key] = (time.monotonic() + CHAT_ANSWER_CACHE_TTL_SECONDS, answer)
+        _entries.move_to_end(key)
+        while len(_entries) > CHAT_ANSWER_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+        _stats["stores"] += 1
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def get_answer_cache_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+    hits = stats["exact_hits"] + stats["similar_hits"]
+    stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+    return stats
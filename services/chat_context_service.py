@@ -0,0 +1,156 @@
+"""
+Chat Context Service — the small slice of analytics the chatbot needs.
+
+The chatbot only uses a handful of numbers (average authenticity, risk
+distribution, pending tasks, next deadline) to build its system prompt and
+quick answers. get_chat_context() reads them with one query and keeps the
+result in an in-process cache for CHAT_CONTEXT_TTL_SECONDS, so most
+messages do no database work at all.
+
+Task and delay writes call invalidate_chat_context() so the next message
+sees fresh numbers. The cache is per process: writes made in another worker
+(or by scripts) show up once the TTL expires.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+
+from repository.db import execute_query
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+CHAT_CONTEXT_TTL_SECONDS = float(os.getenv("CHAT_CONTEXT_TTL_SECONDS", "60"))
+
+
+# ---------------------------------------------------------------------------
+# SQL — one row per view; user / team pair as in analytics_service.
+# ---------------------------------------------------------------------------
+
+_CONTEXT_USER = """
+WITH user_delays AS (
+    SELECT
+        COALESCE(AVG(score_authenticity), 0)                   AS avg_auth,
+        COUNT(CASE WHEN risk_level = 'Low'    THEN 1 END)      AS risk_low,
+        COUNT(CASE WHEN risk_level = 'Medium' THEN 1 END)      AS risk_med,
+        COUNT(CASE WHEN risk_level = 'High'   THEN 1 END)      AS risk_high
+    FROM delays WHERE user_id = %(user_id)s
+),
+user_pending AS (
+    SELECT COUNT(id) AS pending_count, MIN(deadline) AS next_deadline
+    FROM tasks WHERE assigned_to = %(user_id)s AND status = 'Pending'
+)
+SELECT ud.*, up.* FROM user_delays ud CROSS JOIN user_pending up;
+"""
+
+_CONTEXT_TEAM = """
+WITH team_delays AS (
+    SELECT
+        COALESCE(AVG(score_authenticity), 0)                   AS avg_auth,
+        COUNT(CASE WHEN risk_level = 'Low'    THEN 1 END)      AS risk_low,
+        COUNT(CASE WHEN risk_level = 'Medium' THEN 1 END)      AS risk_med,
+        COUNT(CASE WHEN risk_level = 'High'   THEN 1 END)      AS risk_high
+    FROM delays
+),
+team_pending AS (
+    SELECT COUNT(id) AS pending_count, MIN(deadline) AS next_deadline
+    FROM tasks WHERE status = 'Pending'
+)
+SELECT td.*, tp.* FROM team_delays td CROSS JOIN team_pending tp;
+"""
+
+
+# ---------------------------------------------------------------------------
+# Context object
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ChatContext:
+    """What the chatbot knows about a user (or, for managers, the team)."""
+    is_team: bool
+    avg_auth_score: float
+    risk_low: int
+    risk_medium: int
+    risk_high: int
+    pending_count: int
+    next_deadline: date | None
+
+    @property
+    def risk_distribution(self) -> dict:
+        return {"Low": self.risk_low, "Medium": self.risk_medium, "High": self.risk_high}
+
+
+def _load(user_id, is_team: bool) -> ChatContext:
+    rows = execute_query(_CONTEXT_TEAM if is_team else _CONTEXT_USER, {"user_id": user_id})
+    row = rows[0] if rows else {}
+    return ChatContext(
+        is_team=is_team,
+        avg_auth_score=round(float(row.get('avg_auth') or 0), 1),
+        risk_low=row.get('risk_low') or 0,
+        risk_medium=row.get('risk_med') or 0,
+        risk_high=row.get('risk_high') or 0,
+        pending_count=row.get('pending_count') or 0,
+        next_deadline=row.get('next_deadline'),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+_cache: dict[tuple, tuple[float, ChatContext]] = {}
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+# Bumped by every invalidation; a load that raced with a write is not cached.
+_generation = 0
+
+
+def get_chat_context(user_id, role: str = 'employee') -> ChatContext:
+    """Cached chat context: the user's own numbers, or the team's for admins/managers."""
+    is_team = role in ('admin', 'manager')
+    key = ('team',) if is_team else ('user', user_id)
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+        generation = _generation
+
+    context = _load(user_id, is_team)
+    with _cache_lock:
+        if generation == _generation:
+            _cache[key] = (now + CHAT_CONTEXT_TTL_SECONDS, context)
+    return context
+
+
+def invalidate_chat_context(user_id=None) -> None:
+    """
+    Drop cached contexts after a task or delay write.
+
+    With a user_id, drops that user's context and the team context (which
+    counts everyone's tasks and delays); with None, drops everything.
+    """
+    global _generation
+    with _cache_lock:
+        _generation += 1
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(('user', user_id), None)
+            _cache.pop(('team',), None)
+        _stats["invalidations"] += 1
+
+
+def get_chat_context_stats() -> dict:
+    with _cache_lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
@@ -1,20 +1,198 @@
+import hashlib
 import os
-from groq import Groq
+import threading
+import time
+from collections import OrderedDict, deque
 from dotenv import load_dotenv
 
+from services import groq_clients, rate_limiter
+
 load_dotenv()
 
 # Load keys from environment only
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+UNAVAILABLE_MESSAGE = "⚠️ AI service unavailable. Both primary and backup systems failed."
+
+PRIMARY_MODEL = "llama-3.3-70b-versatile"
+SECONDARY_MODEL = "llama3-8b-8192"
+
+_COMPLETION_OPTIONS = {"temperature": 0.7, "max_tokens": 600}
+
+# A 600-token answer routinely takes longer than GROQ_HEDGE_AFTER_SECONDS
+# (sized for short JSON answers), so chat waits longer before starting the
+# secondary model.
+CHAT_HEDGE_AFTER_SECONDS = float(os.getenv("CHAT_HEDGE_AFTER_SECONDS", "12"))
+
+
+def _providers():
+    # Primary, then secondary if the primary fails or is slower than the
+    # hedge budget — see services.groq_clients.
+    return [
+        (GROQ_API_KEY, PRIMARY_MODEL),
+        (os.getenv("GROQ_API_KEY_SECONDARY"), SECONDARY_MODEL),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Conversation history — a flat prompt-token budget per turn
+#
+# The last CHAT_RECENT_TURNS exchanges are sent verbatim; anything older is
+# folded into a running summary. Summarising costs an LLM call, so it only
+# happens when the prompt would go over budget, and summaries are memoised
+# by conversation prefix: a client that resends the whole history reuses
+# the summary made on an earlier turn until the budget is exceeded again.
+# ---------------------------------------------------------------------------
+
+CHAT_RECENT_TURNS = int(os.getenv("CHAT_RECENT_TURNS", "4"))
+
+# Prompt tokens (system prompt + summary + history + message) per model.
+# The 8B model has an 8k window shared with the answer.
+PROMPT_TOKEN_BUDGETS = {
+    PRIMARY_MODEL:   int(os.getenv("CHAT_PROMPT_TOKENS_PRIMARY", "4000")),
+    SECONDARY_MODEL: int(os.getenv("CHAT_PROMPT_TOKENS_SECONDARY", "3000")),
+}
+
+SUMMARY_MAX_TOKENS = 250
+_SUMMARY_MEMO_SIZE = 512
+
+SUMMARY_PROMPT = """
+Summarise this conversation between a user and a task-management assistant
+for the assistant's own later reference. Keep facts, decisions, task names,
+dates and open questions; drop greetings and filler. Extend the existing
+summary if there is one. Reply with the summary only, at most 150 words.
+""".strip()
+
+_summaries = OrderedDict()   # prefix hash -> summary of that prefix
+_history_stats = {"turns": 0, "summarised": 0, "summary_reused": 0, "dropped_messages": 0}
+_history_lock = threading.Lock()
+
+
+def estimate_tokens(messages) -> int:
+    """Rough prompt size: ~4 characters per token plus per-message overhead."""
+    return sum(len(m["content"]) // 4 + 4 for m in messages)
 
-def get_chat_response(user_message, conversation_history, user_context=""):
+
+def prompt_budget() -> int:
+    """Budget for the models that may answer (the smallest, so any fallback fits)."""
+    models = [model for key, model in _providers() if key] or list(PROMPT_TOKEN_BUDGETS)
+    return min(PROMPT_TOKEN_BUDGETS.get(model, PROMPT_TOKEN_BUDGETS[SECONDARY_MODEL]) for model in models)
+
+
+def clean_history(history) -> list:
+    """Only user/assistant text turns; clients cannot inject system messages."""
+    if not isinstance(history, list):
+        return []
+    return [
+        {"role": m["role"], "content": m["content"]}
+        for m in history
+        if isinstance(m, dict) and m.get("role") in ("user", "assistant") and isinstance(m.get("content"), str)
+    ]
+
+
+def _summary_message(summary):
+    return [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}] if summary else []
+
+
+def _prefix_hashes(summary, history) -> list:
+    """hashes[n] identifies (summary, history[:n])."""
+    digest = hashlib.sha256(summary.encode("utf-8"))
+    hashes = [digest.hexdigest()]
+    for m in history:
+        digest.update(f"\x00{m['role']}\x00{m['content']}".encode("utf-8"))
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def _recent_start(history, turns) -> int:
+    """Index of the user message that starts the last `turns` exchanges."""
+    seen = 0
+    for i in range(len(history) - 1, -1, -1):
+        if history[i]["role"] == "user":
+            seen += 1
+            if seen == turns:
+                return i
+    return 0
+
+
+def summarize_turns(summary, turns) -> str | None:
+    """Fold turns into summary with one LLM call (small model first); None on failure."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in turns)
+    messages = [
+        {"role": "system", "content": SUMMARY_PROMPT},
+        {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nConversation:\n{transcript}"},
+    ]
+    content, _ = groq_clients.complete(
+        list(reversed(_providers())), messages, temperature=0.2, max_tokens=SUMMARY_MAX_TOKENS,
+    )
+    return content.strip() if content else None
+
+
+def fit_history(history, summary="", fixed_tokens=0, budget=None):
     """
-    Chat response using:
-    1. Groq (Primary)
-    2. Gemini (Fallback)
+    (summary, recent turns) that fit the prompt budget alongside fixed_tokens
+    (system prompt and the new message).
+
+    history is returned unchanged when it fits. Otherwise older turns are
+    folded into the summary, and if the recent turns alone are still too
+    big the oldest of them are dropped.
     """
+    history = clean_history(history)
+    summary = summary or ""
+    budget = prompt_budget() if budget is None else budget
+    hashes = _prefix_hashes(summary, history)
+
+    def fits(s, turns):
+        return fixed_tokens + estimate_tokens(_summary_message(s) + turns) <= budget
+
+    # Longest prefix already summarised on an earlier turn
+    start = 0
+    with _history_lock:
+        _history_stats["turns"] += 1
+        for n in range(len(history), 0, -1):
+            if hashes[n] in _summaries:
+                start, summary = n, _summaries[hashes[n]]
+                _summaries.move_to_end(hashes[n])
+                break
+    recent = history[start:]
+    if fits(summary, recent):
+        if start:
+            with _history_lock:
+                _history_stats["summary_reused"] += 1
+        return summary, recent
+
+    split = start + _recent_start(recent, CHAT_RECENT_TURNS)
+    if split > start:
+        folded = summarize_turns(summary, history[start:split])
+        if folded:
+            summary = folded
+            with _history_lock:
+                _history_stats["summarised"] += 1
+                _summaries[hashes[split]] = summary
+                while len(_summaries) > _SUMMARY_MEMO_SIZE:
+                    _summaries.popitem(last=False)
+        # If summarising failed the older turns are simply dropped.
+        recent = history[split:]
+
+    dropped = 0
+    while recent and not fits(summary, recent):
+        recent = recent[1:]
+        dropped += 1
+    if dropped:
+        with _history_lock:
+            _history_stats["dropped_messages"] += dropped
+    return summary, recent
+
+
+def get_history_stats() -> dict:
+    with _history_lock:
+        stats = dict(_history_stats)
+        stats["memoised_summaries"] = len(_summaries)
+    stats["prompt_budget"] = prompt_budget()
+    return stats
+
 
+def _build_chat_messages(user_message, conversation_history, user_context, summary=""):
     system_prompt = f"""
 You are a helpful AI assistant for a task management system.
 
@@ -30,76 +208,87 @@ Help users with:
 Be concise, helpful, and professional.
 """.strip()
 
-    # =========================
-    # 1️⃣ GROQ (PRIMARY)
-    # =========================
-    try:
-        if not GROQ_API_KEY:
-            raise ValueError("Groq API key missing")
-
-        client = Groq(api_key=GROQ_API_KEY)
-
-        messages = (
-            [{"role": "system", "content": system_prompt}]
-            + conversation_history
-            + [{"role": "user", "content": user_message}]
-        )
-
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=600
-        )
-
-        return completion.choices[0].message.content
-
-    except Exception as e:
-        print(f"[Groq Error] {e}")
-
-    # =========================
-    # 2️⃣ GROQ SECONDARY (FALLBACK)
-    # =========================
-    # Model: openai/gpt-oss-safeguard-20b
-    try:
-        secondary_key = os.getenv("GROQ_API_KEY_SECONDARY")
-        if not secondary_key:
-            raise ValueError("Secondary Groq API key missing")
-
-        client_secondary = Groq(api_key=secondary_key)
-
-        history_text = "\n".join(
-            f"{m['role'].capitalize()}: {m['content']}"
-            for m in conversation_history
-        )
-
-        prompt = f"""
-{system_prompt}
-
-Conversation History:
-{history_text}
-
-User: {user_message}
-Assistant:
-""".strip()
+    head = [{"role": "system", "content": system_prompt}]
+    tail = [{"role": "user", "content": user_message}]
+    summary, recent = fit_history(conversation_history, summary, fixed_tokens=estimate_tokens(head + tail))
+    return head + _summary_message(summary) + recent + tail
+
+
+def get_chat_response(user_message, conversation_history, user_context="", summary="", user_id=None):
+    """
+    Chat response using:
+    1. Groq (Primary)
+    2. Groq secondary (Fallback)
+
+    summary is the running summary of turns older than conversation_history.
+    Raises rate_limiter.RateLimited when user_id (or everyone) is over the
+    chat rate limit.
+    """
+    rate_limiter.check("chat", user_id)
+    messages = _build_chat_messages(user_message, conversation_history, user_context, summary)
+    content, _ = groq_clients.complete(_providers(), messages, hedge_after=CHAT_HEDGE_AFTER_SECONDS,
+                                       **_COMPLETION_OPTIONS)
+    if content:
+        return content
+
+    print("[Groq Error] primary and secondary both failed")
+    return UNAVAILABLE_MESSAGE
+
+
+# ---------------------------------------------------------------------------
+# Streaming — time to first token is what users feel
+# ---------------------------------------------------------------------------
+
+_TTFT_SAMPLES = 500
+
+_stream_stats = {"streams": 0, "fallbacks": 0, "failures": 0}
+_ttft_ms = deque(maxlen=_TTFT_SAMPLES)
+_stats_lock = threading.Lock()
+
+
+def stream_chat_response(user_message, conversation_history, user_context="", summary="", user_id=None):
+    """
+    Streaming version of get_chat_response.
+
+    Returns an iterator over the events of groq_clients.stream_complete
+    ("delta", "reset", "done"); if every provider fails it yields a single
+    delta with UNAVAILABLE_MESSAGE followed by "error". The rate limit is
+    checked here, before anything is streamed.
+    """
+    rate_limiter.check("chat", user_id)
+    return _stream_events(_build_chat_messages(user_message, conversation_history, user_context, summary))
+
+
+def _stream_events(messages):
+    started = time.perf_counter()
+    first_token = True
+
+    for event in groq_clients.stream_complete(_providers(), messages, **_COMPLETION_OPTIONS):
+        if event["type"] == "delta" and first_token:
+            first_token = False
+            with _stats_lock:
+                _ttft_ms.append((time.perf_counter() - started) * 1000)
+        elif event["type"] == "reset":
+            with _stats_lock:
+                _stream_stats["fallbacks"] += 1
+        elif event["type"] == "error":
+            print("[Groq Error] primary and secondary streams both failed")
+            with _stats_lock:
+                _stream_stats["failures"] += 1
+            yield {"type": "reset", "model": None}
+            yield {"type": "delta", "text": UNAVAILABLE_MESSAGE}
+        yield event
+
+    with _stats_lock:
+        _stream_stats["streams"] += 1
+
 
-        # Check if history format needs adjustment for Groq, usually messages list is better
-        # Re-using messages list but with secondary client
-        messages = (
-            [{"role": "system", "content": system_prompt}]
-            + conversation_history
-            + [{"role": "user", "content": user_message}]
-        )
-
-        completion = client_secondary.chat.completions.create(
-            model="llama3-8b-8192", # Valid fallback model
-            messages=messages,
-            temperature=0.7,
-            max_tokens=600
-        )
-
-        return completion.choices[0].message.content
-
-    except Exception as e:
-        print(f"[Groq Secondary Error] {e}")
-        return "⚠️ AI service unavailable. Both primary and backup systems failed."
+def get_stream_stats() -> dict:
+    """Stream counts plus time-to-first-token percentiles over recent streams."""
+    with _stats_lock:
+        stats = dict(_stream_stats)
+        samples = sorted(_ttft_ms)
+    if samples:
+        stats["ttft_p50_ms"] = round(samples[len(samples) // 2], 1)
+        stats["ttft_p95_ms"] = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1)
+    return stats
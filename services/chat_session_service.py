@@ -0,0 +1,319 @@
+"""
+Chat Session Service — server-side chatbot conversations.
+
+A conversation is identified by a UUID and holds a running summary plus the
+recent turns verbatim, so the browser only sends the new message and the
+conversation id. Conversations live in Postgres (chat_conversations) behind
+an in-process LRU:
+
+  - reads hit the LRU first, then Postgres
+  - writes go to the LRU and are flushed to Postgres in one batched upsert
+    every CHAT_SESSION_FLUSH_SECONDS by a background thread (0 writes
+    through on every turn)
+
+Stored history is kept compact: once the verbatim turns exceed
+CHAT_SESSION_MAX_TOKENS the older ones are folded into the summary in the
+background (chat_service.summarize_turns). Every turn removed from the
+messages is in the summary; if summarising fails the conversation is left
+as it is. Conversations idle for more than CHAT_SESSION_RETENTION_DAYS are
+deleted.
+
+With several app workers a conversation may be cached by more than one of
+them; the last flush wins. Use sticky sessions, or write-through, if
+workers share traffic for the same conversation.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from repository.chat_sessions_repo import (
+    delete_idle_conversations,
+    get_conversation as repo_get_conversation,
+    get_latest_conversation,
+    save_conversations,
+)
+from services.chat_service import (
+    CHAT_RECENT_TURNS,
+    SUMMARY_MAX_TOKENS,
+    clean_history,
+    estimate_tokens,
+    summarize_turns,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+CHAT_SESSION_CACHE_SIZE     = int(os.getenv("CHAT_SESSION_CACHE_SIZE", "1000"))
+CHAT_SESSION_FLUSH_SECONDS  = float(os.getenv("CHAT_SESSION_FLUSH_SECONDS", "2"))
+CHAT_SESSION_MAX_TOKENS     = int(os.getenv("CHAT_SESSION_MAX_TOKENS", "1500"))
+CHAT_SESSION_RETENTION_DAYS = int(os.getenv("CHAT_SESSION_RETENTION_DAYS", "30"))
+_COMPACT_EVERY_SECONDS = 3600
+
+
+@dataclass
+class Conversation:
+    id: str
+    user_id: int
+    summary: str = ""
+    messages: list = field(default_factory=list)
+    turn_count: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "summary": self.summary,
+            "messages": list(self.messages),
+            "turn_count": self.turn_count,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Write-behind cache
+# ---------------------------------------------------------------------------
+
+_cache: OrderedDict[str, Conversation] = OrderedDict()
+_dirty: set[str] = set()
+_lock = threading.Lock()
+
+_stats = {"created": 0, "cache_hits": 0, "loaded": 0, "turns": 0, "compactions": 0,
+          "flushes": 0, "rows_written": 0, "flush_errors": 0, "idle_deleted": 0}
+
+_flusher = None
+_flusher_lock = threading.Lock()
+_compactor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-compact")
+_compacting: set[str] = set()  # conversation ids with a compaction queued or running
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _stats[name] += n
+
+
+def _remember(conversation: Conversation) -> None:
+    """Put in the LRU (caller holds _lock). Dirty entries are never evicted."""
+    _cache[conversation.id] = conversation
+    _cache.move_to_end(conversation.id)
+    if len(_cache) > CHAT_SESSION_CACHE_SIZE:
+        for key in [k for k in _cache if k not in _dirty][:len(_cache) - CHAT_SESSION_CACHE_SIZE]:
+            del _cache[key]
+
+
+def _mark_dirty(conversation: Conversation) -> None:
+    with _lock:
+        _remember(conversation)
+        _dirty.add(conversation.id)
+    if CHAT_SESSION_FLUSH_SECONDS <= 0:
+        flush()
+    else:
+        _ensure_flusher()
+
+
+def flush() -> int:
+    """Write every dirty conversation to Postgres; returns how many rows were written."""
+    with _lock:
+        rows = [_cache[key].to_dict() for key in _dirty if key in _cache]
+        _dirty.clear()
+    if not rows:
+        return 0
+    try:
+        save_conversations(rows)
+    except Exception as e:
+        logger.error("Chat session flush failed (%d conversations): %s", len(rows), e)
+        with _lock:
+            _stats["flush_errors"] += 1
+            _dirty.update(row["id"] for row in rows if row["id"] in _cache)
+        return 0
+    with _lock:
+        _stats["flushes"] += 1
+        _stats["rows_written"] += len(rows)
+    return len(rows)
+
+
+def compact_idle_conversations() -> int:
+    """Delete conversations idle for longer than CHAT_SESSION_RETENTION_DAYS."""
+    deleted = delete_idle_conversations(CHAT_SESSION_RETENTION_DAYS)
+    _count("idle_deleted", deleted)
+    return deleted
+
+
+def _flush_loop() -> None:
+    next_compaction = time.monotonic()
+    while True:
+        time.sleep(CHAT_SESSION_FLUSH_SECONDS)
+        flush()
+        if time.monotonic() >= next_compaction:
+            next_compaction = time.monotonic() + _COMPACT_EVERY_SECONDS
+            try:
+                compact_idle_conversations()
+            except Exception as e:
+                logger.error("Chat session compaction failed: %s", e)
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="chat-session-flush", daemon=True)
+            _flusher.start()
+
+
+atexit.register(flush)
+
+
+# ---------------------------------------------------------------------------
+# Conversations
+# ---------------------------------------------------------------------------
+
+def start_conversation(user_id, history=None) -> Conversation:
+    """New conversation for user_id, optionally seeded with client-side history."""
+    conversation = Conversation(id=str(uuid.uuid4()), user_id=user_id, messages=clean_history(history))
+    _count("created")
+    _mark_dirty(conversation)
+    _maybe_compact(conversation)
+    return conversation
+
+
+def _from_row(row) -> Conversation:
+    return Conversation(
+        id=row['id'], user_id=row['user_id'], summary=row['summary'] or "",
+        messages=list(row['messages'] or []), turn_count=row['turn_count'],
+    )
+
+
+def get_conversation(conversation_id, user_id) -> Conversation:
+    """
+    The conversation, from memory or Postgres.
+
+    Raises LookupError if it does not exist (or has been compacted away) and
+    PermissionError if it belongs to someone else.
+    """
+    try:
+        conversation_id = str(uuid.UUID(str(conversation_id)))
+    except ValueError:
+        raise LookupError("Conversation not found")
+
+    with _lock:
+        conversation = _cache.get(conversation_id)
+        if conversation is not None:
+            _cache.move_to_end(conversation_id)
+            _stats["cache_hits"] += 1
+
+    if conversation is None:
+        row = repo_get_conversation(conversation_id)
+        if not row:
+            raise LookupError("Conversation not found")
+        conversation = _from_row(row)
+        with _lock:
+            # Keep a copy another request loaded meanwhile
+            conversation = _cache.get(conversation_id) or conversation
+            _remember(conversation)
+            _stats["loaded"] += 1
+
+    if conversation.user_id != user_id:
+        raise PermissionError("You do not have access to this conversation")
+    return conversation
+
+
+def get_latest_user_conversation(user_id) -> Conversation | None:
+    """The user's most recently active conversation, or None."""
+    flush()  # make this worker's unflushed turns visible to the query
+    row = get_latest_conversation(user_id)
+    return get_conversation(row['id'], user_id) if row else None
+
+
+def record_turn(conversation: Conversation, user_message: str, reply: str) -> None:
+    """Append one exchange; compacts in the background once the history is over budget."""
+    with _lock:
+        conversation.messages.append({"role": "user", "content": user_message})
+        conversation.messages.append({"role": "assistant", "content": reply})
+        conversation.turn_count += 1
+        _stats["turns"] += 1
+    _mark_dirty(conversation)
+    _maybe_compact(conversation)
+
+
+def _maybe_compact(conversation: Conversation) -> None:
+    """Queue one compaction per conversation; turns recorded meanwhile are folded next time."""
+    if estimate_tokens(conversation.messages) <= CHAT_SESSION_MAX_TOKENS:
+        return
+    with _lock:
+        if conversation.id in _compacting:
+            return
+        _compacting.add(conversation.id)
+    _compactor.submit(_run_compaction, conversation)
+
+
+def _run_compaction(conversation: Conversation) -> None:
+    try:
+        _compact(conversation)
+    finally:
+        with _lock:
+            _compacting.discard(conversation.id)
+
+
+def _compaction_split(messages: list) -> int:
+    """
+    Index of the first message kept verbatim: the start of the last
+    CHAT_RECENT_TURNS exchanges, or of fewer if those alone leave no room
+    for the summary. The last exchange is always kept; 0 means nothing to fold.
+    """
+    starts = [i for i, m in enumerate(messages) if m["role"] == "user" and i > 0]
+    candidates = starts[-CHAT_RECENT_TURNS:]
+    for start in candidates:
+        if estimate_tokens(messages[start:]) <= CHAT_SESSION_MAX_TOKENS - SUMMARY_MAX_TOKENS:
+            return start
+    return candidates[-1] if candidates else 0
+
+
+def _covers_every_turn(before: list, folded: list, after: list) -> bool:
+    """True if the turns folded into the summary plus the kept ones are exactly `before`."""
+    return folded + after == before
+
+
+def _compact(conversation: Conversation) -> None:
+    with _lock:
+        summary, messages = conversation.summary, list(conversation.messages)
+    split = _compaction_split(messages)
+    if not split:
+        return
+    try:
+        new_summary = summarize_turns(summary, messages[:split])
+    except Exception as e:
+        logger.error("Chat session %s compaction failed: %s", conversation.id, e)
+        return
+    if not new_summary:
+        return  # keep every turn; compaction is retried after the next turn
+
+    with _lock:
+        if conversation.summary != summary:
+            return  # compacted concurrently
+        # Keep turns appended while the summary was being written
+        after = messages[split:] + conversation.messages[len(messages):]
+        if not _covers_every_turn(conversation.messages, messages[:split], after):
+            logger.error("Chat session %s changed during compaction; left as is", conversation.id)
+            return
+        conversation.messages = after
+        conversation.summary = new_summary
+        _stats["compactions"] += 1
+    _mark_dirty(conversation)
+
+
+def get_session_stats() -> dict:
+    with _lock:
+        stats = dict(_stats)
+        stats["cached"] = len(_cache)
+        stats["dirty"] = len(_dirty)
+    return stats
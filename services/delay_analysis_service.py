@@ -0,0 +1,332 @@
+"""
+Delay Analysis Service — AI analysis and scoring of submitted delays, off
+the request path.
+
+service_submit_delay saves the delay as pending_analysis and calls
+enqueue_delay_analysis; a small thread pool then runs the Groq analysis,
+deterministic scoring and pattern penalties and stores the result. The task
+page polls GET /delays/<id>/status until the row is analyzed.
+
+The LLM is skipped when no AI signal in [0, 15] could change the risk band,
+and otherwise called outside any transaction. The scoring step takes a
+per-user advisory lock, reads the user's pattern state, scores and writes
+the delay plus the state rows in one transaction, and only if the delay is
+still pending, so a delay is scored at most once even if it is queued twice.
+
+Rows left pending by a restart are picked up by a recovery sweep that runs
+every RECOVERY_INTERVAL_SECONDS once the app starts serving requests. The
+same sweep retries analysis_failed rows FAILED_RETRY_SECONDS after they
+failed, for up to MAX_FAILED_ROUNDS rounds; rows that fail every round stay
+out of pattern detection and trust decay.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+from repository.db import get_db_cursor
+from repository.delays_repo import (
+    claim_failed_delays,
+    claim_stale_pending_delays,
+    finalize_delay_analysis,
+    get_delay_for_analysis,
+    get_user_pattern_state,
+    lock_user_pattern_state,
+    mark_delay_analysis_failed,
+)
+from services.activity_service import log_activity
+from services.chat_context_service import invalidate_chat_context
+from services.rate_limiter import RateLimited
+from utils.pattern_engine import apply_pattern_penalty, run_pattern_detection_from_state
+from utils.scoring_engine import DEFAULT_PARAMS, calculate_authenticity_score, risk_level_for
+from utils.task_formulas import deadline_position
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+ANALYSIS_WORKERS = int(os.getenv("DELAY_ANALYSIS_WORKERS", "4"))
+MAX_ATTEMPTS     = 3
+RETRY_BACKOFF_SECONDS = 2.0
+
+# Pending rows unclaimed for this long are assumed orphaned by a restart.
+STALE_PENDING_SECONDS = int(os.getenv("DELAY_ANALYSIS_STALE_SECONDS", "300"))
+# How often the recovery sweep looks for them, and how many it claims per query.
+RECOVERY_INTERVAL_SECONDS = float(os.getenv("DELAY_ANALYSIS_RECOVERY_SECONDS", str(STALE_PENDING_SECONDS)))
+_RECOVERY_BATCH = 100
+
+# Failed rows are retried this long after failing, for at most
+# MAX_FAILED_ROUNDS rounds of MAX_ATTEMPTS. After that they stay
+# analysis_failed: no score, and never counted in user_pattern_state or
+# user_trust_decay (reset analysis_failures to retry them by hand).
+FAILED_RETRY_SECONDS = int(os.getenv("DELAY_ANALYSIS_FAILED_RETRY_SECONDS", "3600"))
+MAX_FAILED_ROUNDS    = 3
+_MAX_RATE_LIMIT_WAIT_SECONDS = 60
+
+# Skip the LLM when the deterministic signals already fix the risk band.
+SKIP_DECIDED_LLM = os.getenv("DELAY_ANALYSIS_SKIP_DECIDED_LLM", "1").lower() not in ("0", "false", "no")
+
+_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="delay-analysis")
+
+_stats = {"analyzed": 0, "llm_skipped": 0, "recovered": 0, "failed_retried": 0, "rate_limited": 0}
+_stats_lock = threading.Lock()
+
+# Delay ids queued in this process and not finished yet
+_queued: set[int] = set()
+_queued_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Analysis
+# ---------------------------------------------------------------------------
+
+def _scoring_inputs(delay: dict, reason: str) -> dict:
+    # deadline_hours_left is None when the deadline is unknown
+    deadline_hours_left, is_after_deadline = deadline_position(delay['deadline'], at=delay['submitted_at'])
+    return {
+        "reason": reason,
+        "priority": delay.get('priority') or 'Low',
+        "deadline_hours_left": deadline_hours_left,
+        "hours_left": deadline_hours_left if deadline_hours_left is not None else 0,
+        "has_proof": bool(delay['proof_path']),
+        "is_after_deadline": is_after_deadline,
+    }
+
+
+def _score(inputs: dict, pattern_state: dict | None, ai_score: int):
+    """(breakdown, pattern flags, final score, risk level) for one AI score."""
+    breakdown = calculate_authenticity_score(
+        reason=inputs['reason'],
+        delay_count=pattern_state['total_count'] if pattern_state else 0,
+        priority=inputs['priority'],
+        hours_left=inputs['hours_left'],
+        has_proof=inputs['has_proof'],
+        is_after_deadline=inputs['is_after_deadline'],
+        ai_score=ai_score,
+    )
+    flags = run_pattern_detection_from_state(
+        inputs['reason'], pattern_state, inputs['deadline_hours_left'], inputs['is_after_deadline'],
+    )
+    final_score = apply_pattern_penalty(breakdown.total, flags)
+    return breakdown, flags, final_score, risk_level_for(final_score)
+
+
+def ai_can_change_risk(inputs: dict, pattern_state: dict | None) -> bool:
+    """
+    Whether some AI score in [0, max_ai_signal] gives a different risk band.
+
+    The final score is monotonic in the AI score, so comparing the two
+    extremes is enough.
+    """
+    lowest = _score(inputs, pattern_state, 0)[3]
+    highest = _score(inputs, pattern_state, DEFAULT_PARAMS.max_ai_signal)[3]
+    return lowest != highest
+
+
+def _skipped_ai_analysis() -> dict:
+    from services.ai_service import default_ai_signal
+
+    # Neutral signal (as when the LLM is unavailable), marked so it is
+    # distinguishable from a real answer.
+    return {**default_ai_signal(), "llm_skipped": True}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def get_analysis_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["llm_skip_rate"] = round(stats["llm_skipped"] / stats["analyzed"], 4) if stats["analyzed"] else 0.0
+    return stats
+
+
+def analyze_delay(delay_id: int) -> dict | None:
+    """
+    Analyse and score one pending delay.
+
+    The LLM is only called when its signal could change the risk band;
+    otherwise the neutral signal is scored (see ai_can_change_risk).
+    Returns the scoring result, or None if the delay is missing or was
+    already analysed.
+    """
+    from services.ai_service import analyze_excuse_with_ai, score_ai_signal
+
+    delay = get_delay_for_analysis(delay_id)
+    if not delay or delay['analysis_status'] != 'pending_analysis':
+        return None
+
+    reason = delay['reason_text'] or ''
+    user_id = delay['user_id']
+    inputs = _scoring_inputs(delay, reason)
+
+    def pattern_state_for(cursor=None):
+        return get_user_pattern_state(user_id, cursor=cursor) if user_id is not None else None
+
+    ai_analysis = None
+    need_ai = not SKIP_DECIDED_LLM
+    while True:
+        # 1. AI Analysis — slow, so outside the transaction, and only if it can matter
+        if need_ai or ai_can_change_risk(inputs, pattern_state_for()):
+            ai_analysis = _analyze_when_allowed(analyze_excuse_with_ai, reason, user_id)
+
+        # 2. Scoring + persistence, serialised per user
+        with get_db_cursor() as cursor:
+            if user_id is not None:
+                lock_user_pattern_state(cursor, user_id)
+            pattern_state = pattern_state_for(cursor)
+
+            if ai_analysis is None and ai_can_change_risk(inputs, pattern_state):
+                # Another delay for this user landed since the check above
+                # and made this one borderline: analyse and try again.
+                need_ai = True
+                continue
+            llm_skipped = ai_analysis is None
+            if llm_skipped:
+                ai_analysis = _skipped_ai_analysis()
+
+            scoring_breakdown, flags, final_auth_score, risk_level = _score(
+                inputs, pattern_state, score_ai_signal(ai_analysis),
+            )
+            scoring_result = asdict(scoring_breakdown)
+            scoring_result['authenticity_score'] = final_auth_score
+            scoring_result['risk_level'] = risk_level
+
+            ai_analysis['pattern_flags'] = flags
+            stored = finalize_delay_analysis(
+                cursor, delay_id, user_id, reason,
+                score_authenticity=final_auth_score, risk_level=risk_level,
+                ai_feedback=json.dumps(scoring_result), ai_analysis_json=ai_analysis,
+                delay_duration=delay['delay_duration'] or 0,
+                is_after_deadline=inputs['is_after_deadline'], hours_left=inputs['deadline_hours_left'],
+            )
+        break
+    if not stored:
+        return None
+
+    invalidate_chat_context(user_id)
+    _count("analyzed")
+    if llm_skipped:
+        _count("llm_skipped")
+    log_activity(user_id, "DELAY_ANALYZED",
+                 f"Delay analysed for '{delay['task_title']}' - Score: {final_auth_score}")
+    return scoring_result
+
+
+def _analyze_when_allowed(analyze, reason: str, user_id):
+    """
+    analyze(reason, user_id=...) that waits out the "ai" rate limit instead
+    of failing: this is background work, so it queues behind the limit.
+    """
+    while True:
+        try:
+            return analyze(reason, user_id=user_id)
+        except RateLimited as e:
+            _count("rate_limited")
+            time.sleep(min(e.retry_after, _MAX_RATE_LIMIT_WAIT_SECONDS))
+
+
+def _run_with_retries(delay_id: int) -> None:
+    try:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                analyze_delay(delay_id)
+                return
+            except Exception as e:
+                logger.error("Delay %s analysis attempt %d/%d failed: %s", delay_id, attempt, MAX_ATTEMPTS, e)
+                if attempt < MAX_ATTEMPTS:
+                    time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+        try:
+            mark_delay_analysis_failed(delay_id)
+        except Exception as e:
+            logger.error("Could not mark delay %s as failed: %s", delay_id, e)
+    finally:
+        with _queued_lock:
+            _queued.discard(delay_id)
+
+
+# ---------------------------------------------------------------------------
+# Queueing
+# ---------------------------------------------------------------------------
+
+def enqueue_delay_analysis(delay_id: int) -> bool:
+    """Queue a pending delay for background analysis; returns immediately.
+
+    Returns False if this process already has it queued.
+    """
+    with _queued_lock:
+        if delay_id in _queued:
+            return False
+        _queued.add(delay_id)
+    _executor.submit(_run_with_retries, delay_id)
+    return True
+
+
+def _requeue_claimed(claim) -> int:
+    """Queue the rows claim(limit) returns, _RECOVERY_BATCH at a time, until it returns fewer."""
+    queued = 0
+    while True:
+        delay_ids = claim(_RECOVERY_BATCH)
+        queued += sum(enqueue_delay_analysis(delay_id) for delay_id in delay_ids)
+        if len(delay_ids) < _RECOVERY_BATCH:
+            return queued
+
+
+def requeue_stale_analyses(stale_seconds: int = STALE_PENDING_SECONDS) -> int:
+    """
+    Claim and queue every pending delay nobody has touched for
+    stale_seconds (orphaned by a restart); returns how many were queued.
+
+    A claim stamps analysis_claimed_at, so the loop never sees a row twice.
+    """
+    queued = _requeue_claimed(lambda limit: claim_stale_pending_delays(stale_seconds, limit=limit))
+    if queued:
+        _count("recovered", queued)
+        logger.info("Re-queued %d pending delay analyses", queued)
+    return queued
+
+
+def requeue_failed_analyses(retry_seconds: int = FAILED_RETRY_SECONDS) -> int:
+    """Put failed delays with rounds left back in the queue; returns how many."""
+    queued = _requeue_claimed(lambda limit: claim_failed_delays(retry_seconds, MAX_FAILED_ROUNDS, limit=limit))
+    if queued:
+        _count("failed_retried", queued)
+        logger.info("Retrying %d failed delay analyses", queued)
+    return queued
+
+
+_recovery_thread = None
+_recovery_lock = threading.Lock()
+
+
+def _recovery_loop() -> None:
+    while True:
+        try:
+            requeue_stale_analyses()
+            requeue_failed_analyses()
+        except Exception as e:
+            logger.warning("Pending delay recovery failed: %s", e)
+        time.sleep(RECOVERY_INTERVAL_SECONDS)
+
+
+def start_pending_recovery() -> None:
+    """
+    Start the background sweep that re-queues stale pending delays, and
+    failed ones due a retry, every RECOVERY_INTERVAL_SECONDS. Idempotent; the app calls it when it starts
+    serving requests.
+    """
+    global _recovery_thread
+    if _recovery_thread is not None:
+        return
+    with _recovery_lock:
+        if _recovery_thread is None:
+            _recovery_thread = threading.Thread(target=_recovery_loop, name="delay-analysis-recovery", daemon=True)
+            _recovery_thread.start()
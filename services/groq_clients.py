@@ -0,0 +1,227 @@
+"""
+Groq Clients — long-lived, pooled Groq clients and hedged completions.
+
+One Groq client per API key is built on first use and reused for the life
+of the process, so calls share HTTP keep-alive connections and TLS sessions
+instead of paying a handshake per request. Every call has an explicit
+timeout.
+
+complete() tries a list of (api_key, model) providers in order. With
+hedging on (GROQ_HEDGE_AFTER_SECONDS > 0) the next provider is also started
+when the current one has not answered within that budget or has failed, and
+the first usable response wins; with hedging off it is a plain sequential
+fallback. Each provider gets the full timeout from when it was started.
+Callers whose answers are long (chat) pass a larger hedge_after than the
+default, which suits short JSON answers.
+
+stream_complete() is the streaming counterpart: it yields text deltas from
+the first provider that starts answering, and if a stream breaks part-way it
+restarts on the next provider (signalled with a reset event).
+
+GROQ_BASE_URL points every client at another Groq-compatible server, e.g. a
+local stub for tests and benchmarks.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import httpx
+from groq import Groq
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+GROQ_BASE_URL           = os.getenv("GROQ_BASE_URL") or None
+GROQ_TIMEOUT_SECONDS    = float(os.getenv("GROQ_TIMEOUT_SECONDS", "20"))
+GROQ_CONNECT_TIMEOUT    = float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "5"))
+GROQ_HEDGE_AFTER_SECONDS = float(os.getenv("GROQ_HEDGE_AFTER_SECONDS", "4"))
+# The SDK retries on its own by default; the fallback provider is our retry.
+GROQ_MAX_RETRIES        = int(os.getenv("GROQ_MAX_RETRIES", "0"))
+GROQ_MAX_CONNECTIONS    = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+
+_clients: dict[tuple[str, str | None], Groq] = {}
+_clients_lock = threading.Lock()
+
+# Runs the provider calls of a hedged completion; sized for a few
+# concurrent completions with two providers each.
+_executor = ThreadPoolExecutor(max_workers=GROQ_MAX_CONNECTIONS, thread_name_prefix="groq")
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+def get_client(api_key: str) -> Groq:
+    """The shared client for api_key (and the configured base URL)."""
+    key = (api_key, GROQ_BASE_URL)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Groq(
+                api_key=api_key,
+                base_url=GROQ_BASE_URL,
+                timeout=httpx.Timeout(GROQ_TIMEOUT_SECONDS, connect=GROQ_CONNECT_TIMEOUT),
+                max_retries=GROQ_MAX_RETRIES,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=GROQ_MAX_CONNECTIONS,
+                        max_keepalive_connections=GROQ_MAX_CONNECTIONS,
+                    ),
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+def close_clients() -> None:
+    """Close every pooled client (tests, or after changing GROQ_BASE_URL)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+# ---------------------------------------------------------------------------
+# Completions
+# ---------------------------------------------------------------------------
+
+def call(api_key: str, model: str, messages: list, timeout: float | None = None, **kwargs) -> str | None:
+    """One chat completion. Returns the message content, or None on any failure."""
+    try:
+        result = get_client(api_key).chat.completions.create(
+            model=model,
+            messages=messages,
+            timeout=timeout if timeout is not None else GROQ_TIMEOUT_SECONDS,
+            **kwargs,
+        )
+        return result.choices[0].message.content
+    except Exception as e:
+        logger.warning("Groq error (%s): %s", model, e)
+        return None
+
+
+def complete(providers: list[tuple[str, str]], messages: list,
+             hedge_after: float | None = None, timeout: float | None = None,
+             **kwargs) -> tuple[str | None, str | None]:
+    """
+    First usable response from providers, a list of (api_key, model).
+
+    Providers with no key are skipped. Returns (content, model that
+    answered), or (None, None) if every provider failed. Extra keyword
+    arguments go to chat.completions.create.
+    """
+    providers = [(key, model) for key, model in providers if key]
+    hedge_after = GROQ_HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after
+
+    if hedge_after <= 0 or len(providers) < 2:
+        for api_key, model in providers:
+            content = call(api_key, model, messages, timeout, **kwargs)
+            if content:
+                return content, model
+        return None, None
+
+    return _hedged(providers, messages, hedge_after, timeout, kwargs)
+
+
+def _hedged(providers, messages, hedge_after, timeout, kwargs):
+    # future -> (model, deadline); every provider gets the full timeout from
+    # its own start, so one started by the hedge is not cut short.
+    pending = {}
+    remaining = list(providers)
+    budget = timeout if timeout is not None else GROQ_TIMEOUT_SECONDS
+
+    def launch():
+        api_key, model = remaining.pop(0)
+        future = _executor.submit(call, api_key, model, messages, timeout, **kwargs)
+        pending[future] = (model, time.monotonic() + budget)
+
+    launch()
+    while pending:
+        # Wait for an answer, but no longer than the hedge budget while
+        # there is still a provider left to start.
+        last_deadline = max(deadline for _, deadline in pending.values())
+        wait_for = hedge_after if remaining else max(0.0, last_deadline - time.monotonic())
+        done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            model, _ = pending.pop(future)
+            content = future.result()
+            if content:
+                # Losers finish in the background; their results are dropped.
+                return content, model
+        # Nothing usable yet: start the next provider, whether the current
+        # one failed or is just over budget.
+        if remaining:
+            if not done:
+                logger.info("Groq hedge: %s slower than %.1fs, starting %s",
+                            next(iter(pending.values()))[0], hedge_after, remaining[0][1])
+            launch()
+        elif not done:
+            break
+    return None, None
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+class StreamInterrupted(Exception):
+    """A stream ended without a finish_reason (dropped connection, truncated body)."""
+
+
+def stream(api_key: str, model: str, messages: list, timeout: float | None = None, **kwargs):
+    """Yield content deltas of one streamed completion; raises if it fails or is cut short."""
+    chunks = get_client(api_key).chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        timeout=timeout if timeout is not None else GROQ_TIMEOUT_SECONDS,
+        **kwargs,
+    )
+    finished = False
+    for chunk in chunks:
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.delta and choice.delta.content:
+            yield choice.delta.content
+        if choice.finish_reason:
+            finished = True
+    if not finished:
+        raise StreamInterrupted(f"{model} stream ended without finish_reason")
+
+
+def stream_complete(providers: list[tuple[str, str]], messages: list,
+                    timeout: float | None = None, **kwargs):
+    """
+    Stream from the first provider that works, falling back mid-stream.
+
+    Yields event dicts:
+      {"type": "delta", "text": ...}   next piece of the answer
+      {"type": "reset", "model": ...}  a provider failed after sending text;
+                                       discard it, the answer restarts on model
+      {"type": "done", "model": ...}   finished
+      {"type": "error"}                every provider failed
+    """
+    providers = [(key, model) for key, model in providers if key]
+    for i, (api_key, model) in enumerate(providers):
+        sent_text = False
+        try:
+            for text in stream(api_key, model, messages, timeout, **kwargs):
+                sent_text = True
+                yield {"type": "delta", "text": text}
+            yield {"type": "done", "model": model}
+            return
+        except Exception as e:
+            logger.warning("Groq stream error (%s): %s", model, e)
+            if sent_text and i + 1 < len(providers):
+                yield {"type": "reset", "model": providers[i + 1][1]}
+    yield {"type": "error"}
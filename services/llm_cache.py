@@ -0,0 +1,139 @@
+"""
+LLM Cache — content-addressed cache for excuse-analysis results.
+
+Two tiers, both keyed by make_key(...) (sha256 of the normalised excuse,
+prompt version and model):
+
+  1. in-process LRU (LLM_CACHE_MAX_ENTRIES, default 2048)
+  2. Postgres llm_analysis_cache table, shared by every app process
+     (disable with LLM_CACHE_PERSIST=0)
+
+Entries expire after LLM_CACHE_TTL_SECONDS (default 30 days) in both tiers.
+The persistent tier is best-effort: if the table or pool is unavailable the
+cache degrades to memory-only and counts the error.
+"""
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from repository.llm_cache_repo import get_cached_analysis, put_cached_analysis
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_PERSIST     = os.getenv("LLM_CACHE_PERSIST", "1").lower() not in ("0", "false", "no")
+
+
+def make_key(*parts: str) -> str:
+    """sha256 over the parts, unambiguously separated."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(4, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Tiers
+# ---------------------------------------------------------------------------
+
+_memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+_memory_lock = threading.Lock()
+
+_stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0, "persistent_errors": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _memory_get(key: str) -> dict | None:
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return value
+
+
+def _memory_put(key: str, value: dict) -> None:
+    with _memory_lock:
+        _memory[key] = (time.monotonic() + LLM_CACHE_TTL_SECONDS, value)
+        _memory.move_to_end(key)
+        while len(_memory) > LLM_CACHE_MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def get(*keys: str) -> dict | None:
+    """
+    Cached value for the first key that has one (a copy, safe to mutate), or
+    None. Several keys count as one lookup in the stats.
+    """
+    for key in keys:
+        value = _memory_get(key)
+        if value is not None:
+            _count("memory_hits")
+            return copy.deepcopy(value)
+
+    if LLM_CACHE_PERSIST:
+        for key in keys:
+            try:
+                value = get_cached_analysis(key, LLM_CACHE_TTL_SECONDS)
+            except Exception as e:
+                _count("persistent_errors")
+                logger.debug("LLM cache read failed: %s", e)
+                break
+            if value is not None:
+                _count("persistent_hits")
+                _memory_put(key, value)
+                return copy.deepcopy(value)
+
+    _count("misses")
+    return None
+
+
+def put(key: str, value: dict, model: str, prompt_version: str) -> None:
+    value = copy.deepcopy(value)
+    _memory_put(key, value)
+    _count("stores")
+    if LLM_CACHE_PERSIST:
+        try:
+            put_cached_analysis(key, model, prompt_version, value)
+        except Exception as e:
+            _count("persistent_errors")
+            logger.debug("LLM cache write failed: %s", e)
+
+
+def get_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["persistent_hits"]) / lookups, 4) if lookups else 0.0
+    stats["memory_entries"] = len(_memory)
+    return stats
+
+
+def clear_memory() -> None:
+    with _memory_lock:
+        _memory.clear()
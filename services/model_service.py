@@ -0,0 +1,313 @@
+"""
+Model Service — offline training and versioned artifacts for the delay-risk model.
+
+Artifacts live under MODEL_DIR (env, default <project>/models):
+
+    models/delay_risk/<version>/model.joblib
+    models/delay_risk/<version>/metadata.json
+    models/delay_risk/PROMOTED          ← name of the version served in requests
+
+Training runs from scripts/train_delay_model.py, never inside a request.
+The analytics service only loads whatever version is promoted.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from repository.db import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+class ModelServiceError(Exception):
+    """Raised when training cannot proceed or an artifact is missing/invalid."""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODEL_DIR       = os.getenv("MODEL_DIR", os.path.join(_PROJECT_ROOT, "models"))
+MODEL_NAME      = "delay_risk"
+FEATURE_NAMES   = ["delay_rate", "avg_auth", "risk_score"]
+
+# Label: a user is "high delay risk" if at least this share of the tasks
+# created in the label window ended up with a delay.
+HIGH_RISK_DELAY_RATE = 0.5
+
+_MIN_SAMPLES = 10
+
+
+def _model_root() -> str:
+    return os.path.join(MODEL_DIR, MODEL_NAME)
+
+
+def _promoted_pointer() -> str:
+    return os.path.join(_model_root(), "PROMOTED")
+
+
+# ---------------------------------------------------------------------------
+# Feature extraction — streamed from the DB in batches.
+# ---------------------------------------------------------------------------
+
+# Features are computed over history before the cutoff and mirror
+# analytics_service._compute_metrics (delay_rate, avg_auth, avg_risk_val),
+# so training and serving see the same inputs. The label comes from tasks
+# created after the cutoff.
+_FEATURES_QUERY = """
+WITH task_stats AS (
+    SELECT assigned_to AS user_id,
+           COUNT(*) FILTER (WHERE created_at <  %(cutoff)s) AS tasks_before,
+           COUNT(*) FILTER (WHERE created_at >= %(cutoff)s) AS tasks_after
+    FROM tasks WHERE assigned_to IS NOT NULL
+    GROUP BY assigned_to
+),
+delay_stats AS (
+    SELECT user_id,
+           COUNT(DISTINCT task_id)            FILTER (WHERE submitted_at < %(cutoff)s) AS delayed_before,
+           AVG(score_authenticity)            FILTER (WHERE submitted_at < %(cutoff)s) AS avg_auth,
+           COUNT(*) FILTER (WHERE submitted_at < %(cutoff)s AND risk_level = 'Low')    AS risk_low,
+           COUNT(*) FILTER (WHERE submitted_at < %(cutoff)s AND risk_level = 'Medium') AS risk_med,
+           COUNT(*) FILTER (WHERE submitted_at < %(cutoff)s AND risk_level = 'High')   AS risk_high
+    FROM delays WHERE user_id IS NOT NULL
+    GROUP BY user_id
+),
+delays_after AS (
+    SELECT d.user_id, COUNT(DISTINCT d.task_id) AS delayed_after
+    FROM delays d JOIN tasks t ON t.id = d.task_id
+    WHERE t.created_at >= %(cutoff)s
+    GROUP BY d.user_id
+)
+SELECT ts.user_id,
+       ts.tasks_before, ts.tasks_after,
+       COALESCE(ds.delayed_before, 0) AS delayed_before,
+       COALESCE(ds.avg_auth, 0)       AS avg_auth,
+       COALESCE(ds.risk_low, 0)       AS risk_low,
+       COALESCE(ds.risk_med, 0)       AS risk_med,
+       COALESCE(ds.risk_high, 0)      AS risk_high,
+       COALESCE(da.delayed_after, 0)  AS delayed_after
+FROM task_stats ts
+LEFT JOIN delay_stats  ds ON ds.user_id = ts.user_id
+LEFT JOIN delays_after da ON da.user_id = ts.user_id
+WHERE ts.tasks_before > 0 AND ts.tasks_after > 0
+ORDER BY ts.user_id;
+"""
+
+
+def _row_to_sample(row: dict) -> tuple[list[float], int]:
+    """Turn one aggregated user row into (features, label)."""
+    tasks_before = int(row['tasks_before'])
+    delay_rate   = round(int(row['delayed_before']) / tasks_before * 100, 1)
+
+    risk_low, risk_med, risk_high = int(row['risk_low']), int(row['risk_med']), int(row['risk_high'])
+    total_risk = risk_low + risk_med + risk_high
+    avg_risk_val = ((risk_low * 100) + (risk_med * 50)) / total_risk if total_risk > 0 else 100
+
+    label = int(int(row['delayed_after']) / int(row['tasks_after']) >= HIGH_RISK_DELAY_RATE)
+    return [delay_rate, float(row['avg_auth']), float(avg_risk_val)], label
+
+
+def iter_training_samples(cutoff: datetime, batch_size: int = 500):
+    """
+    Yield (features, label) per user, streaming rows with a server-side cursor
+    so memory stays flat regardless of how many users exist.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(name="delay_model_features") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(_FEATURES_QUERY, {"cutoff": cutoff})
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _row_to_sample(row)
+        conn.rollback()  # read-only; close the implicit transaction
+
+
+# ---------------------------------------------------------------------------
+# Training
+# ---------------------------------------------------------------------------
+
+def train_delay_model(
+    label_window_days: int = 30,
+    test_size: float = 0.2,
+    batch_size: int = 500,
+    random_state: int = 42,
+) -> tuple[object, dict]:
+    """
+    Train a LogisticRegression on every user's history with a held-out split.
+
+    Returns (model, metadata). Nothing is written to disk here.
+
+    Raises:
+        ModelServiceError: if there are too few samples or only one class.
+    """
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    cutoff = datetime.now() - timedelta(days=label_window_days)
+
+    load_start = time.perf_counter()
+    X, y = [], []
+    for features, label in iter_training_samples(cutoff, batch_size=batch_size):
+        X.append(features)
+        y.append(label)
+    load_seconds = time.perf_counter() - load_start
+
+    if len(y) < _MIN_SAMPLES:
+        raise ModelServiceError(f"Only {len(y)} usable users; need at least {_MIN_SAMPLES}.")
+    if len(set(y)) < 2:
+        raise ModelServiceError("Training data contains a single class; widen the label window.")
+
+    X, y = np.array(X, dtype=float), np.array(y, dtype=int)
+    stratify = y if min(np.bincount(y)) >= 2 else None
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=stratify,
+    )
+
+    model = LogisticRegression(max_iter=1000)
+    fit_start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - fit_start
+
+    infer_start = time.perf_counter()
+    proba = model.predict_proba(X_test)[:, 1]
+    infer_seconds = time.perf_counter() - infer_start
+
+    evaluation = {
+        "accuracy": round(float(accuracy_score(y_test, proba > 0.5)), 4),
+        "log_loss": round(float(log_loss(y_test, proba, labels=[0, 1])), 4),
+        "roc_auc":  round(float(roc_auc_score(y_test, proba)), 4) if len(set(y_test)) > 1 else None,
+    }
+
+    metadata = {
+        "model": MODEL_NAME,
+        "algorithm": "LogisticRegression",
+        "features": FEATURE_NAMES,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "cutoff": cutoff.isoformat(timespec="seconds"),
+        "label_window_days": label_window_days,
+        "high_risk_delay_rate": HIGH_RISK_DELAY_RATE,
+        "samples": {"train": int(len(y_train)), "test": int(len(y_test)),
+                    "positive_rate": round(float(y.mean()), 4)},
+        "evaluation": evaluation,
+        "timing": {
+            "load_seconds": round(load_seconds, 4),
+            "fit_seconds": round(fit_seconds, 4),
+            "inference_us_per_row": round(infer_seconds / len(y_test) * 1e6, 2),
+        },
+    }
+    return model, metadata
+
+
+# ---------------------------------------------------------------------------
+# Artifact registry
+# ---------------------------------------------------------------------------
+
+def save_model_version(model, metadata: dict) -> str:
+    """Write model + metadata to a new version directory and return its name."""
+    import joblib
+
+    version = datetime.now().strftime("%Y%m%dT%H%M%S")
+    version_dir = os.path.join(_model_root(), version)
+    os.makedirs(version_dir, exist_ok=False)
+
+    joblib.dump(model, os.path.join(version_dir, "model.joblib"))
+    with open(os.path.join(version_dir, "metadata.json"), "w") as f:
+        json.dump({**metadata, "version": version}, f, indent=2)
+
+    logger.info("Saved %s model version %s", MODEL_NAME, version)
+    return version
+
+
+def list_model_versions() -> list[dict]:
+    """Metadata for every saved version, oldest first."""
+    root = _model_root()
+    if not os.path.isdir(root):
+        return []
+    versions = []
+    for name in sorted(os.listdir(root)):
+        meta_path = os.path.join(root, name, "metadata.json")
+        if os.path.isfile(meta_path):
+            with open(meta_path) as f:
+                versions.append(json.load(f))
+    return versions
+
+
+def get_promoted_version() -> str | None:
+    try:
+        with open(_promoted_pointer()) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def promote_model_version(version: str) -> None:
+    """Point PROMOTED at an existing version (atomic rename)."""
+    if not os.path.isfile(os.path.join(_model_root(), version, "model.joblib")):
+        raise ModelServiceError(f"Model version {version!r} does not exist.")
+    tmp = _promoted_pointer() + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, _promoted_pointer())
+    logger.info("Promoted %s model version %s", MODEL_NAME, version)
+
+
+# ---------------------------------------------------------------------------
+# Serving — cached load of the promoted version plus inference timing.
+# ---------------------------------------------------------------------------
+
+_loaded = {"version": None, "model": None}
+_load_lock = threading.Lock()
+
+_inference_stats = {"calls": 0, "total_seconds": 0.0}
+
+
+def load_promoted_model():
+    """
+    Return the promoted model, or None if nothing has been promoted yet.
+
+    Reloads only when the PROMOTED pointer changes, so requests pay one
+    small file read instead of a joblib load.
+    """
+    version = get_promoted_version()
+    if version is None:
+        return None
+    if _loaded["version"] == version:
+        return _loaded["model"]
+
+    with _load_lock:
+        if _loaded["version"] != version:
+            import joblib
+            path = os.path.join(_model_root(), version, "model.joblib")
+            try:
+                _loaded["model"] = joblib.load(path)
+                _loaded["version"] = version
+                logger.info("Loaded %s model version %s", MODEL_NAME, version)
+            except Exception as e:
+                logger.error("Failed to load model version %s: %s", version, e)
+                return None
+    return _loaded["model"]
+
+
+def record_inference(seconds: float) -> None:
+    _inference_stats["calls"] += 1
+    _inference_stats["total_seconds"] += seconds
+
+
+def get_inference_stats() -> dict:
+    calls = _inference_stats["calls"]
+    return {
+        "version": _loaded["version"],
+        "calls": calls,
+        "avg_ms": round(_inference_stats["total_seconds"] / calls * 1000, 3) if calls else 0.0,
+    }
@@ -0,0 +1,231 @@
+"""
+Rate Limiter — token buckets in front of the LLM-backed paths.
+
+Every policy has a per-user bucket, and LLM policies also draw from one
+global bucket shared by all users, so a single user cannot burn the Groq
+quota and a spike cannot queue everyone behind it. A request takes a token
+from each of its buckets or from none; when one is empty check() raises
+RateLimited with the seconds until a token is available.
+
+Backends (RATE_LIMIT_BACKEND):
+  memory    per process (default); with N workers the effective limits are N times higher
+  postgres  shared rate_limit_buckets table, one short transaction per check
+  sqlite    shared file (RATE_LIMIT_SQLITE_PATH), for several workers on one
+            machine without Postgres, e.g. local load tests
+
+If the shared store fails the request is allowed and the error counted.
+"""
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+from repository.db import get_db_cursor
+from repository.rate_limit_repo import lock_buckets, save_buckets
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """Raised when a bucket is empty; retry_after is in seconds."""
+
+    def __init__(self, policy: str, scope: str, retry_after: float):
+        super().__init__(f"Rate limit exceeded for {policy} ({scope}); retry in {retry_after:.1f}s")
+        self.policy = policy
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Bucket:
+    capacity: float   # burst size
+    rate: float       # tokens per second
+
+
+def _bucket(name: str, burst: int, per_minute: int) -> Bucket:
+    return Bucket(
+        capacity=float(os.getenv(f"RATE_LIMIT_{name}_BURST", str(burst))),
+        rate=float(os.getenv(f"RATE_LIMIT_{name}_PER_MINUTE", str(per_minute))) / 60.0,
+    )
+
+
+RATE_LIMIT_ENABLED     = os.getenv("RATE_LIMIT_ENABLED", "1").lower() not in ("0", "false", "no")
+RATE_LIMIT_BACKEND     = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH",
+                                   os.path.join(tempfile.gettempdir(), "excuse_ai_rate_limits.sqlite3"))
+
+GLOBAL_BUCKET = _bucket("GLOBAL", burst=60, per_minute=300)
+
+# policy -> (per-user bucket, draws from GLOBAL_BUCKET)
+POLICIES = {
+    "chat":  (_bucket("CHAT", burst=10, per_minute=20), True),
+    # Excuse analysis model calls (ai_service.analyze_excuse_with_ai); the
+    # background analysis waits for a token rather than failing.
+    "ai":    (_bucket("AI", burst=10, per_minute=20), True),
+    # Analysis runs in the background and is batched/cached; this only
+    # stops resubmission floods.
+    "delay": (_bucket("DELAY", burst=5, per_minute=10), False),
+}
+
+_GLOBAL_KEY = "global:llm"
+
+
+def _buckets_for(policy: str, user_id) -> dict[str, Bucket]:
+    user_bucket, uses_global = POLICIES[policy]
+    buckets = {}
+    if user_id is not None:
+        buckets[f"{policy}:user:{user_id}"] = user_bucket
+    if uses_global:
+        buckets[_GLOBAL_KEY] = GLOBAL_BUCKET
+    return buckets
+
+
+# ---------------------------------------------------------------------------
+# Bucket arithmetic (shared by every backend)
+# ---------------------------------------------------------------------------
+
+def take(buckets: dict[str, Bucket], states: dict, now: float, cost: float = 1.0):
+    """
+    Refill each bucket to now and take cost from all of them, or from none.
+
+    states maps bucket key -> (tokens, updated_at); missing buckets start
+    full. Returns (new states, None) when allowed, or (new states,
+    (key, seconds until allowed)) for the emptiest bucket when not.
+    """
+    levels = {}
+    for key, bucket in buckets.items():
+        tokens, updated_at = states.get(key) or (bucket.capacity, now)
+        levels[key] = min(bucket.capacity, tokens + max(0.0, now - updated_at) * bucket.rate)
+
+    waits = {
+        key: (cost - levels[key]) / buckets[key].rate if buckets[key].rate > 0 else math.inf
+        for key in buckets if levels[key] < cost
+    }
+    if waits:
+        key = max(waits, key=waits.get)
+        return {k: (level, now) for k, level in levels.items()}, (key, waits[key])
+    return {k: (level - cost, now) for k, level in levels.items()}, None
+
+
+# ---------------------------------------------------------------------------
+# Backends — each returns take()'s denial (or None) and persists the states
+# ---------------------------------------------------------------------------
+
+_memory: dict[str, tuple[float, float]] = {}
+_memory_lock = threading.Lock()
+
+
+def _take_memory(buckets, cost):
+    with _memory_lock:
+        states, denied = take(buckets, _memory, time.monotonic(), cost)
+        _memory.update(states)
+    return denied
+
+
+def _take_postgres(buckets, cost):
+    with get_db_cursor() as cursor:
+        states, now = lock_buckets(cursor, {key: b.capacity for key, b in buckets.items()})
+        states, denied = take(buckets, states, now, cost)
+        save_buckets(cursor, states)
+    return denied
+
+
+_sqlite = threading.local()
+
+
+def _sqlite_conn():
+    conn = getattr(_sqlite, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(RATE_LIMIT_SQLITE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            bucket_key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)""")
+        _sqlite.conn = conn
+    return conn
+
+
+def _take_sqlite(buckets, cost):
+    conn = _sqlite_conn()
+    conn.execute("BEGIN IMMEDIATE")  # one writer at a time across processes
+    try:
+        keys = list(buckets)
+        rows = conn.execute(
+            f"SELECT bucket_key, tokens, updated_at FROM rate_limit_buckets "
+            f"WHERE bucket_key IN ({','.join('?' * len(keys))})", keys,
+        ).fetchall()
+        states, denied = take(buckets, {k: (t, u) for k, t, u in rows}, time.time(), cost)
+        conn.executemany(
+            "INSERT OR REPLACE INTO rate_limit_buckets (bucket_key, tokens, updated_at) VALUES (?, ?, ?)",
+            [(key, tokens, updated_at) for key, (tokens, updated_at) in states.items()],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return denied
+
+
+_BACKENDS = {"memory": _take_memory, "postgres": _take_postgres, "sqlite": _take_sqlite}
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _count(policy: str, name: str) -> None:
+    with _stats_lock:
+        counters = _stats.setdefault(policy, {"allowed": 0, "limited_user": 0, "limited_global": 0, "store_errors": 0})
+        counters[name] += 1
+
+
+def check(policy: str, user_id=None, cost: float = 1.0) -> None:
+    """Take a token for policy (and user_id, if given); raises RateLimited if out of tokens."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    buckets = _buckets_for(policy, user_id)
+    if not buckets:
+        return
+    try:
+        denied = _BACKENDS.get(RATE_LIMIT_BACKEND, _take_memory)(buckets, cost)
+    except Exception as e:
+        # Fail open: a broken limiter store must not take the chatbot down
+        logger.error("Rate limiter store error (%s): %s", RATE_LIMIT_BACKEND, e)
+        _count(policy, "store_errors")
+        return
+
+    if denied is None:
+        _count(policy, "allowed")
+        return
+    key, retry_after = denied
+    scope = "global" if key == _GLOBAL_KEY else "user"
+    _count(policy, f"limited_{scope}")
+    raise RateLimited(policy, scope, retry_after)
+
+
+def reset() -> None:
+    """Forget in-process bucket state (tests, benchmarks)."""
+    with _memory_lock:
+        _memory.clear()
+
+
+def get_rate_limit_stats() -> dict:
+    with _stats_lock:
+        stats = {policy: dict(counters) for policy, counters in _stats.items()}
+    stats["backend"] = RATE_LIMIT_BACKEND if RATE_LIMIT_ENABLED else "disabled"
+    return stats
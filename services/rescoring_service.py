@@ -0,0 +1,285 @@
+"""
+Rescoring Service — replay historical delays through the current scoring rules.
+
+When scoring_engine / pattern_engine change, stored delay scores describe the
+old rules. This module replays every user's delays in submission order,
+reusing the AI signal already stored in ai_analysis_json (no LLM calls), and
+rebuilds the score, risk level, pattern flags and per-user state tables.
+
+Work is sharded by user: a user's delays are replayed sequentially (each
+delay's pattern state depends on the ones before it), users are independent.
+Run it from scripts/rescore_delays.py.
+"""
+import json
+import logging
+from dataclasses import asdict
+from itertools import groupby
+
+from psycopg2.extras import execute_values
+
+from ai_demo import DECAY_RATE
+from repository.db import execute_query, get_db_connection, get_db_cursor
+from services.ai_service import validate_ai_response, score_ai_signal
+from utils.pattern_engine import (
+    advance_pattern_state,
+    apply_pattern_penalty,
+    run_pattern_detection_from_state,
+)
+from utils.scoring_engine import calculate_authenticity_score, risk_level_for
+from utils.task_formulas import deadline_position
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+# Delays without a user never had pattern state, so they are left untouched.
+_USER_IDS_QUERY = "SELECT DISTINCT user_id FROM delays WHERE user_id IS NOT NULL ORDER BY user_id"
+
+_DELAYS_FOR_USERS = """
+SELECT d.id, d.user_id, d.reason_text, d.proof_path, d.ai_analysis_json, d.ai_feedback,
+       d.score_authenticity, d.risk_level, d.submitted_at,
+       t.priority, t.deadline
+FROM delays d
+LEFT JOIN tasks t ON t.id = d.task_id
+WHERE d.user_id = ANY(%(user_ids)s)
+  AND d.analysis_status = 'analyzed'   -- pending rows belong to the analysis worker
+ORDER BY d.user_id, d.submitted_at, d.id
+"""
+
+_UPDATE_DELAYS = """
+UPDATE delays AS d SET
+    score_authenticity = v.score,
+    score_avoidance    = 100 - v.score,
+    risk_level         = v.risk,
+    ai_feedback        = v.feedback,
+    ai_analysis_json   = COALESCE(d.ai_analysis_json, '{}'::jsonb)
+                         || jsonb_build_object('pattern_flags', v.flags::jsonb)
+FROM (VALUES %s) AS v(id, score, risk, feedback, flags)
+WHERE d.id = v.id
+"""
+
+_REPLACE_PATTERN_STATE = """
+INSERT INTO user_pattern_state
+    (user_id, total_count, late_count, edge_count, timed_count, recent_risks, recent_reasons, updated_at)
+VALUES %s
+ON CONFLICT (user_id) DO UPDATE SET
+    total_count    = EXCLUDED.total_count,
+    late_count     = EXCLUDED.late_count,
+    edge_count     = EXCLUDED.edge_count,
+    timed_count    = EXCLUDED.timed_count,
+    recent_risks   = EXCLUDED.recent_risks,
+    recent_reasons = EXCLUDED.recent_reasons,
+    updated_at     = EXCLUDED.updated_at
+"""
+_PATTERN_STATE_TEMPLATE = "(%s, %s, %s, %s, %s, %s::text[], %s::text[], CURRENT_TIMESTAMP)"
+
+# Same rebuild as database/migrations/add_user_trust_decay.sql, limited to the batch.
+_REBUILD_TRUST_DECAY = """
+INSERT INTO user_trust_decay (user_id, weighted_sum, weight_sum, last_update)
+SELECT user_id,
+       SUM(COALESCE(score_authenticity, 0) * EXP(-%(decay_rate)s * (CURRENT_DATE - submitted_at::date))),
+       SUM(EXP(-%(decay_rate)s * (CURRENT_DATE - submitted_at::date))),
+       CURRENT_DATE
+FROM delays
+WHERE user_id = ANY(%(user_ids)s)
+GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET
+    weighted_sum = EXCLUDED.weighted_sum,
+    weight_sum = EXCLUDED.weight_sum,
+    last_update = EXCLUDED.last_update
+"""
+
+
+def list_user_ids() -> list[int]:
+    return [row['user_id'] for row in execute_query(_USER_IDS_QUERY)]
+
+
+def iter_user_delays(user_ids: list[int], batch_size: int = 1000):
+    """
+    Yield (user_id, [delay rows oldest first]) for the given users, streaming
+    through a server-side cursor so one huge history never sits in memory
+    alongside the others.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(name="rescore_delays") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(_DELAYS_FOR_USERS, {"user_ids": list(user_ids)})
+            yield from (
+                (user_id, list(rows))
+                for user_id, rows in groupby(cursor, key=lambda r: r['user_id'])
+            )
+        conn.rollback()  # read-only; close the implicit transaction
+
+
+# ---------------------------------------------------------------------------
+# Replay — pure, mirrors task_service.service_submit_delay step by step.
+# ---------------------------------------------------------------------------
+
+def _stored_analysis(ai_analysis_json) -> dict:
+    """ai_analysis_json as a dict (psycopg2 decodes JSONB, older rows may hold text)."""
+    if isinstance(ai_analysis_json, str):
+        try:
+            ai_analysis_json = json.loads(ai_analysis_json)
+        except ValueError:
+            return {}
+    return ai_analysis_json if isinstance(ai_analysis_json, dict) else {}
+
+
+def delay_inputs(row: dict) -> dict:
+    """
+    Scoring inputs for one stored delay, reconstructed as of its submission:
+    stored AI signal, deadline position at submitted_at, proof flag.
+    """
+    stored = _stored_analysis(row['ai_analysis_json'])
+    deadline_hours_left, is_after_deadline = deadline_position(row['deadline'], at=row['submitted_at'])
+    return {
+        "reason": (row['reason_text'] or '').strip(),
+        "priority": row['priority'] or 'Low',
+        "deadline_hours_left": deadline_hours_left,   # None when the deadline is unknown
+        "hours_left": deadline_hours_left if deadline_hours_left is not None else 0,
+        "is_after_deadline": is_after_deadline,
+        "has_proof": bool(row['proof_path']),
+        "ai_score": score_ai_signal(validate_ai_response(stored)),
+        "stored_flags": stored.get('pattern_flags'),
+    }
+
+
+def rescore_delay(row: dict, pattern_state: dict | None) -> tuple[dict, dict]:
+    """
+    Score one stored delay as if it were submitted now under the current rules,
+    with the user's pattern state as it stood just before it.
+
+    Returns (result, next_pattern_state). result carries the new columns plus
+    the old score/risk for diffing.
+    """
+    inputs = delay_inputs(row)
+    reason = inputs['reason']
+
+    breakdown = calculate_authenticity_score(
+        reason=reason,
+        delay_count=pattern_state['total_count'] if pattern_state else 0,
+        priority=inputs['priority'],
+        hours_left=inputs['hours_left'],
+        has_proof=inputs['has_proof'],
+        is_after_deadline=inputs['is_after_deadline'],
+        ai_score=inputs['ai_score'],
+    )
+    flags = run_pattern_detection_from_state(
+        reason, pattern_state, inputs['deadline_hours_left'], inputs['is_after_deadline']
+    )
+    score = apply_pattern_penalty(breakdown.total, flags)
+    risk = risk_level_for(score)
+
+    scoring_result = asdict(breakdown)
+    scoring_result['authenticity_score'] = score
+    scoring_result['risk_level'] = risk
+
+    result = {
+        "id": row['id'],
+        "score": score,
+        "risk": risk,
+        "feedback": json.dumps(scoring_result),
+        "flags": flags,
+        "old_score": row['score_authenticity'],
+        "old_risk": row['risk_level'],
+        "old_feedback": row['ai_feedback'],
+        "old_flags": inputs['stored_flags'],
+    }
+    next_state = advance_pattern_state(
+        pattern_state, reason, risk, inputs['is_after_deadline'], inputs['deadline_hours_left']
+    )
+    return result, next_state
+
+
+def replay_user(rows: list[dict]) -> tuple[list[dict], dict | None]:
+    """Replay one user's delays oldest first; returns (results, final pattern state)."""
+    state = None
+    results = []
+    for row in rows:
+        result, state = rescore_delay(row, state)
+        results.append(result)
+    return results, state
+
+
+def is_changed(result: dict) -> bool:
+    return (
+        result['score'] != result['old_score']
+        or result['risk'] != result['old_risk']
+        or result['feedback'] != result['old_feedback']
+        or result['flags'] != result['old_flags']
+    )
+
+
+# ---------------------------------------------------------------------------
+# Writeback — one transaction per batch of users.
+# ---------------------------------------------------------------------------
+
+def write_batch(results: list[dict], states: dict[int, dict], page_size: int = 500) -> int:
+    """
+    Persist rescored delays plus the rebuilt pattern/trust-decay state for
+    the users in `states`, atomically. Returns the number of delays updated.
+    """
+    changed = [r for r in results if is_changed(r)]
+    with get_db_cursor() as cursor:
+        if changed:
+            execute_values(
+                cursor, _UPDATE_DELAYS,
+                [(r['id'], r['score'], r['risk'], r['feedback'], json.dumps(r['flags'])) for r in changed],
+                page_size=page_size,
+            )
+        if states:
+            execute_values(
+                cursor, _REPLACE_PATTERN_STATE,
+                [(user_id, s['total_count'], s['late_count'], s['edge_count'], s['timed_count'],
+                  s['recent_risks'], s['recent_reasons']) for user_id, s in states.items()],
+                template=_PATTERN_STATE_TEMPLATE,
+                page_size=page_size,
+            )
+            cursor.execute(_REBUILD_TRUST_DECAY, {"user_ids": list(states), "decay_rate": DECAY_RATE})
+    return len(changed)
+
+
+# ---------------------------------------------------------------------------
+# Diff summary
+# ---------------------------------------------------------------------------
+
+def new_summary() -> dict:
+    return {"users": 0, "delays": 0, "changed": 0, "score_delta_sum": 0,
+            "risk_transitions": {}, "largest_changes": []}
+
+
+def add_to_summary(summary: dict, results: list[dict], keep_largest: int = 20) -> None:
+    summary["users"] += 1
+    summary["delays"] += len(results)
+    for r in results:
+        if not is_changed(r):
+            continue
+        summary["changed"] += 1
+        delta = r['score'] - (r['old_score'] or 0)
+        summary["score_delta_sum"] += delta
+        if r['risk'] != r['old_risk']:
+            key = f"{r['old_risk']}->{r['risk']}"
+            summary["risk_transitions"][key] = summary["risk_transitions"].get(key, 0) + 1
+        summary["largest_changes"].append(
+            {"id": r['id'], "old_score": r['old_score'], "score": r['score'],
+             "old_risk": r['old_risk'], "risk": r['risk'], "delta": delta}
+        )
+    summary["largest_changes"].sort(key=lambda c: abs(c["delta"]), reverse=True)
+    del summary["largest_changes"][keep_largest:]
+
+
+def merge_summaries(summaries: list[dict], keep_largest: int = 20) -> dict:
+    merged = new_summary()
+    for s in summaries:
+        for key in ("users", "delays", "changed", "score_delta_sum"):
+            merged[key] += s[key]
+        for key, count in s["risk_transitions"].items():
+            merged["risk_transitions"][key] = merged["risk_transitions"].get(key, 0) + count
+        merged["largest_changes"].extend(s["largest_changes"])
+    merged["largest_changes"].sort(key=lambda c: abs(c["delta"]), reverse=True)
+    del merged["largest_changes"][keep_largest:]
+    merged["mean_score_delta"] = round(merged["score_delta_sum"] / merged["changed"], 2) if merged["changed"] else 0.0
+    return merged
@@ -0,0 +1,135 @@
+"""
+Search Service — ranked full-text search for /search.
+
+Matching and ranking run in Postgres against the generated search_tsv
+columns (GIN-indexed, see database/migrations/add_search_tsvector.sql), so
+a search costs a few index lookups and returns at most SEARCH_RESULT_LIMIT
+rows per section, whatever the size of the tables.
+
+The query becomes a tsquery: every word is an unstemmed prefix match and
+all must appear (so results narrow as the user types), OR-ed with the
+stemmed SEMANTIC_MAP expansions of any trigger word, e.g. "rain" also
+finds "weather" and "flood".
+
+Trigram similarity (find_similar_users / find_similar_tasks, pg_trgm
+indexes from database/migrations/add_trigram_search.sql) adds what
+full-text misses: people whose name or email merely contains or resembles
+the query are listed after the full-text matches, and task titles are
+matched fuzzily (typos such as "docmentation") when full-text finds
+none. find_people() serves the same lookup to the assignee autocomplete
+with a strict limit.
+"""
+import logging
+import os
+import re
+
+from repository.search_repo import (
+    find_similar_tasks,
+    find_similar_users,
+    get_recent_searches,
+    get_trending_searches,
+    log_search,
+    search_delays,
+    search_tasks,
+    search_users,
+)
+
+logger = logging.getLogger(__name__)
+
+
+SEARCH_RESULT_LIMIT     = int(os.getenv("SEARCH_RESULT_LIMIT", "20"))
+# Word similarity (0-1) a trigram match needs; lower tolerates more typos
+SEARCH_FUZZY_THRESHOLD  = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.3"))
+AUTOCOMPLETE_LIMIT      = 10
+_MAX_TERMS = 8
+_MAX_FUZZY_LENGTH = 100
+
+# --- Semantic Expansion (Mock AI) ---
+SEMANTIC_MAP = {
+    'rain': ['weather', 'storm', 'flood', 'wet'],
+    'sick': ['health', 'doctor', 'fever', 'medical'],
+    'wifi': ['network', 'internet', 'connection', 'outage'],
+    'late': ['delay', 'traffic', 'stuck'],
+    'urgent': ['high', 'critical', 'asap'],
+}
+
+# Only these characters reach the tsquery text, so user input can never
+# inject tsquery operators.
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def build_tsquery(query: str, expand: bool = True) -> tuple[str, str | None] | None:
+    """
+    (prefix, synonyms) to_tsquery texts for a user query, or None if it has
+    no searchable words. synonyms is None when nothing was expanded.
+
+    prefix is parsed with the 'simple' config: a half-typed word is not run
+    through the stemmer, so "meetin:*" still matches "meeting". The
+    synonyms are whole words and are stemmed ('english').
+
+        build_tsquery("late rain") == ("late:* & rain:*", "delay | traffic | stuck | weather | ...")
+    """
+    words = _WORD.findall(query.lower())[:_MAX_TERMS]
+    if not words:
+        return None
+
+    synonyms = []
+    if expand:
+        for word in words:
+            for synonym in SEMANTIC_MAP.get(word, []):
+                if synonym not in synonyms:
+                    synonyms.append(synonym)
+    return " & ".join(f"{word}:*" for word in words), " | ".join(synonyms) or None
+
+
+def search(query: str, limit: int = SEARCH_RESULT_LIMIT) -> dict:
+    """Best-ranked tasks, delays and users for query."""
+    tsquery = build_tsquery(query)
+    if not tsquery:
+        return {"tasks": [], "delays": [], "users": []}
+    prefix, synonyms = tsquery
+    text = query.strip()[:_MAX_FUZZY_LENGTH]
+    # Fall back to fuzzy titles only when the full-text query finds nothing
+    tasks = search_tasks(prefix, synonyms, limit) or find_similar_tasks(text, limit, SEARCH_FUZZY_THRESHOLD)
+    return {
+        "tasks": tasks,
+        "delays": search_delays(prefix, synonyms, limit),
+        # Names are matched as typed, without the excuse vocabulary
+        "users": _merge_by_id(search_users(prefix, limit),
+                              find_similar_users(text, limit, SEARCH_FUZZY_THRESHOLD), limit),
+    }
+
+
+def _merge_by_id(first: list[dict], then: list[dict], limit: int) -> list[dict]:
+    """first, followed by the rows of then not already in it, at most limit."""
+    seen = {row['id'] for row in first}
+    return (first + [row for row in then if row['id'] not in seen])[:limit]
+
+
+def find_people(query: str, limit: int = AUTOCOMPLETE_LIMIT, active_only: bool = True) -> list[dict]:
+    """Autocomplete: at most AUTOCOMPLETE_LIMIT users whose name or email resembles query."""
+    text = query.strip()[:_MAX_FUZZY_LENGTH]
+    if not text:
+        return []
+    limit = max(1, min(limit, AUTOCOMPLETE_LIMIT))
+    return find_similar_users(text, limit, SEARCH_FUZZY_THRESHOLD, active_only=active_only)
+
+
+def record_search(user_id, query: str) -> None:
+    """Log a search for trending/recent suggestions; never fails the search."""
+    try:
+        log_search(user_id, query)
+    except Exception as e:
+        logger.error("Failed to log search: %s", e)
+
+
+def search_suggestions(user_id) -> dict:
+    """Trending (everyone, last 7 days) and the user's recent searches, for the empty state."""
+    try:
+        return {
+            "trending": get_trending_searches(),
+            "recent_searches": get_recent_searches(user_id) if user_id else [],
+        }
+    except Exception as e:
+        logger.error("Failed to load search suggestions: %s", e)
+        return {"trending": [], "recent_searches": []}
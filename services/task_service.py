@@ -4,21 +4,21 @@ from repository.tasks_repo import (
     update_task_status, get_task_by_id, update_task_completion, 
     delete_task as repo_delete_task
 )
+from repository.db import UnitOfWork
 from repository.resources_repo import create_resource
-from repository.delays_repo import create_delay, get_user_delay_history, count_user_delays
+from repository.delays_repo import submit_pending_delay, get_delay_status
 from services.activity_service import log_activity
+from services.chat_context_service import invalidate_chat_context
+from services.rate_limiter import check as check_rate_limit
+from services.delay_analysis_service import enqueue_delay_analysis
 from utils.time_utils import parse_time_input
-from utils.scoring_engine import calculate_authenticity_score
 from utils.task_formulas import (
     calculate_elapsed_time,
     calculate_task_status,
     is_task_delayed,
     calculate_elapsed_between,
 )
-from utils.pattern_engine import run_pattern_detection, apply_pattern_penalty
 from datetime import datetime
-from dataclasses import asdict
-import json
 
 def service_create_task(manager_id, title, description, assigned_to, priority, deadline, est_hours, est_minutes, category="General", links=None):
     """Create a new task with estimated time and category."""
@@ -29,6 +29,7 @@ def service_create_task(manager_id, title, description, assigned_to, priority, d
     # Let's assume the user wants it tracked.
     
     task_id = create_task(title, description, assigned_to, manager_id, priority, deadline, est_total_mins)
+    invalidate_chat_context(assigned_to)
     
     if links:
          for link in links:
@@ -75,6 +76,7 @@ def service_complete_task(user_id, task_id):
     
     status = calculate_task_status(elapsed_minutes, estimated_minutes)
     update_task_completion(task_id, completion_time, status)
+    invalidate_chat_context(user_id)
     
     log_activity(user_id, "COMPLETE_TASK", f"Completed task '{task['title']}' - Status: {status}")
     
@@ -86,86 +88,67 @@ def service_complete_task(user_id, task_id):
         'estimated_minutes': estimated_minutes
     }
 
-def service_submit_delay(user_id, task_id, reason, proof_file=None):
-    """Submit delay analysis using AI and deterministic scoring."""
-    from services.ai_service import analyze_excuse_with_ai, score_ai_signal
-    
-    task = get_task_by_id(task_id)
+def _check_delay_submission(user_id, task):
+    """Raise unless task exists and is assigned to user_id."""
     if not task:
         raise LookupError("Task not found")
-        
+
     if task['assigned_to'] != user_id:
         raise PermissionError("You can only submit delays for your own tasks.")
 
-    # 1. AI Analysis
-    ai_analysis = analyze_excuse_with_ai(reason)
-    ai_score_val = score_ai_signal(ai_analysis)
-    
-    # 2. Context Calculation
-    deadline_str = task.get('deadline')
-    hours_left = 0
-    is_after_deadline = False
-    
-    if deadline_str:
-        try:
-            deadline_dt = datetime.strptime(deadline_str, "%Y-%m-%d")
-            now_naive = datetime.now()
-            time_diff = deadline_dt - now_naive
-            hours_left = int(time_diff.total_seconds() / 3600)
-            is_after_deadline = time_diff.total_seconds() < 0
-        except:
-             pass
-
-    # 3. Final Scoring
-    current_delay_count = count_user_delays(user_id)
-    history = get_user_delay_history(user_id, limit=5)
-
-    scoring_breakdown = calculate_authenticity_score(
-        reason=reason,
-        delay_count=current_delay_count,
-        priority=task.get('priority', 'Low'),
-        hours_left=hours_left,
-        has_proof=bool(proof_file),
-        is_after_deadline=is_after_deadline,
-        ai_score=ai_score_val
-    )
-    
-    flags = run_pattern_detection(reason, history, (hours_left if is_after_deadline else None), is_after_deadline)
-    final_auth_score = apply_pattern_penalty(scoring_breakdown.total, flags)
-    
-    # Calculate final risk level after pattern penalties
-    risk_level = "High"
-    if final_auth_score >= 75: 
-        risk_level = "Low"
-    elif final_auth_score >= 45: 
-        risk_level = "Medium"
-        
-    # Convert ScoreBreakdown to result dict for compatibility
-    scoring_result = asdict(scoring_breakdown)
-    scoring_result['authenticity_score'] = final_auth_score
-    scoring_result['risk_level'] = risk_level
+def service_submit_delay(user_id, task_id, reason, proof_file=None):
+    """
+    Save the delay and queue it for AI analysis and scoring.
 
-    # 4. Handle Proof
+    Returns immediately with {'delay_id', 'status': 'pending_analysis'};
+    services.delay_analysis_service fills in the score in the background
+    (poll with service_get_delay_status). Raises
+    services.rate_limiter.RateLimited if the user submits too often.
+    """
+    check_rate_limit("delay", user_id)
+
+    # 1. Handle Proof — stored before returning so it survives a restart.
+    #    Checked first so only the assignee can upload; the upload stays
+    #    outside the transaction below.
     final_proof_path = None
     if proof_file:
+         _check_delay_submission(user_id, get_task_by_id(task_id))
          from services.upload_service import upload_file
          upload_res = upload_file(proof_file, folder="proofs")
          if upload_res['success']:
              final_proof_path = upload_res['path']
 
-    # 5. DB Persistence
-    ai_analysis['pattern_flags'] = flags
-    create_delay(
-        task_id=task_id, user_id=user_id, reason_text=reason, reason_audio_path=None,
-        score_authenticity=final_auth_score, score_avoidance=100 - final_auth_score,
-        risk_level=risk_level, ai_feedback=json.dumps(scoring_result),
-        ai_analysis_json=json.dumps(ai_analysis), delay_duration=0, proof_path=final_proof_path
-    )
-    
-    update_task_status(task_id, 'Delayed')
-    log_activity(user_id, "SUBMIT_DELAY", f"Delay submitted for '{task['title']}' - Score: {final_auth_score}")
-    
-    return scoring_result
+    # 2. DB Persistence — ownership check (task row locked), delay, status
+    #    and audit log in one statement and one transaction; scored later
+    #    by the analysis worker
+    with UnitOfWork() as uow:
+        row = submit_pending_delay(uow.cursor, task_id, user_id, reason, final_proof_path)
+        _check_delay_submission(user_id, row)
+        delay_id = row['delay_id']
+
+        # The worker must see the committed row
+        uow.after_commit(invalidate_chat_context, user_id)
+        uow.after_commit(enqueue_delay_analysis, delay_id)
+
+    return {'delay_id': delay_id, 'status': 'pending_analysis'}
+
+def service_get_delay_status(user_id, role, delay_id):
+    """Analysis status/result of a delay, visible to its submitter and to managers."""
+    delay = get_delay_status(delay_id)
+    if not delay:
+        raise LookupError("Delay not found")
+
+    if role not in ['admin', 'manager'] and delay['user_id'] != user_id:
+        raise PermissionError("You do not have permission to view this delay")
+
+    return {
+        'delay_id': delay['id'],
+        'task_id': delay['task_id'],
+        'status': delay['analysis_status'],
+        'authenticity_score': delay['score_authenticity'],
+        'risk_level': delay['risk_level'],
+        'pattern_flags': delay['pattern_flags'] or [],
+    }
 
 def service_delete_task(user_id, task_id, role):
     """Deletes a task with permission enforcement."""
@@ -177,5 +160,6 @@ def service_delete_task(user_id, task_id, role):
         raise PermissionError("You do not have permission to delete this task")
         
     repo_delete_task(task_id)
+    invalidate_chat_context(task['assigned_to'])
     log_activity(user_id, "DELETE_TASK", f"Deleted task '{task['title']}'")
     return True
@@ -10,6 +10,7 @@ from repository.users_repo import (
     soft_delete_user,
 )
 from utils.hashing import hash_password
+from services.search_service import AUTOCOMPLETE_LIMIT, find_people
 from services.activity_service import log_activity
 
 logger = logging.getLogger(__name__)
@@ -82,6 +83,18 @@ def get_users_list(actor_id: int) -> list[dict]:
     return get_all_users()
 
 
+def search_assignees(actor_id: int, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict]:
+    """
+    Active users matching query, for the task form's assignee picker.
+    Requires the actor to be an admin or manager.
+    """
+    _require_manager(actor_id)
+    return [
+        {'id': u['id'], 'full_name': u['full_name'], 'email': u['email']}
+        for u in find_people(query, limit)
+    ]
+
+
 def manage_create_user(
     actor_id: int,
     full_name: str,
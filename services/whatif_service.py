@@ -0,0 +1,362 @@
+"""
+What-If Service — simulate alternative scoring rules over historical delays.
+
+Answers "what would the risk distribution be if THRESHOLD_MEDIUM were 50?"
+without a production rescoring run: history is loaded once (sampled by user
+or in full), the stored AI signal is reused, and every simulation replays
+the batch scorer plus pattern penalties with the candidate parameters next
+to a baseline run with the live ones.
+
+Pattern flags that only depend on the inputs (repeats, phrase reuse, late and
+deadline-edge ratios) are computed once per dataset; risk escalation depends
+on earlier risk bands, so it is replayed per user for every candidate.
+
+Simulations run on a single background worker. Finished results are cached
+on disk under WHATIF_CACHE_DIR by a hash of (parameters, sample, dataset
+fingerprint), so repeating a question is a file read. The fingerprint
+changes whenever analysed delays are added, removed or rescored, which
+also invalidates the in-memory dataset.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields, replace
+
+from repository.db import execute_query
+from services.rescoring_service import delay_inputs, iter_user_delays, list_user_ids
+from utils.pattern_engine import (
+    PATTERN_PENALTIES,
+    RISK_WINDOW,
+    advance_pattern_state,
+    detect_risk_escalation,
+    run_pattern_detection_from_state,
+)
+from utils.scoring_engine import (
+    DEFAULT_PARAMS,
+    ScoringParams,
+    calculate_authenticity_scores_batch,
+    text_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WhatIfServiceError(Exception):
+    """Raised for invalid simulation parameters."""
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WHATIF_CACHE_DIR = os.getenv("WHATIF_CACHE_DIR", os.path.join(_PROJECT_ROOT, ".whatif_cache"))
+DATASET_TTL_SECONDS = 600
+
+_RISK_LEVELS = ("Low", "Medium", "High")
+_STATIC_FLAGS = ("repeated_excuse", "generic_phrase_reuse", "late_submission_pattern", "deadline_edge_abuse")
+
+# Count and max id catch inserts and deletes; the content checksum catches
+# rows updated in place (rescoring runs, deferred analysis finishing). It
+# covers the delay columns the dataset reads; task edits are not tracked.
+_FINGERPRINT_QUERY = """
+SELECT COUNT(*) AS n, COALESCE(MAX(id), 0) AS max_id,
+       COALESCE(SUM(hashtext(concat_ws('|', id, user_id, reason_text, proof_path, ai_analysis_json::text,
+                                       score_authenticity, risk_level, submitted_at))::bigint), 0) AS checksum
+FROM delays WHERE user_id IS NOT NULL AND analysis_status = 'analyzed'
+"""
+
+
+# ---------------------------------------------------------------------------
+# Parameters
+# ---------------------------------------------------------------------------
+
+def parse_params(overrides: dict | None, pattern_penalties: dict | None) -> tuple[ScoringParams, dict]:
+    """
+    Validate overrides against ScoringParams / PATTERN_PENALTIES.
+
+    Raises:
+        WhatIfServiceError: on unknown names, non-integer values or
+        inverted thresholds.
+    """
+    overrides = overrides or {}
+    known = {f.name for f in fields(ScoringParams)}
+    unknown = set(overrides) - known
+    if unknown:
+        raise WhatIfServiceError(f"Unknown scoring parameters: {', '.join(sorted(unknown))}")
+
+    penalties = dict(PATTERN_PENALTIES)
+    unknown = set(pattern_penalties or {}) - set(penalties)
+    if unknown:
+        raise WhatIfServiceError(f"Unknown pattern penalties: {', '.join(sorted(unknown))}")
+
+    for name, value in {**overrides, **(pattern_penalties or {})}.items():
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise WhatIfServiceError(f"{name} must be a non-negative integer")
+
+    params = replace(DEFAULT_PARAMS, **overrides)
+    if params.threshold_medium > params.threshold_low:
+        raise WhatIfServiceError("threshold_medium must not exceed threshold_low")
+
+    penalties.update(pattern_penalties or {})
+    return params, penalties
+
+
+def simulation_id(params: ScoringParams, penalties: dict, sample: float, seed: int, fingerprint: str) -> str:
+    """Stable hash of everything that determines a simulation's result."""
+    key = json.dumps(
+        {"params": asdict(params), "penalties": penalties, "sample": sample, "seed": seed,
+         "dataset": fingerprint},
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Dataset — columnar history with parameter-independent flags precomputed.
+# ---------------------------------------------------------------------------
+
+_datasets: dict[tuple, tuple[float, dict]] = {}
+_dataset_lock = threading.Lock()
+
+
+def dataset_fingerprint() -> str:
+    row = execute_query(_FINGERPRINT_QUERY)[0]
+    return f"{row['n']}:{row['max_id']}:{row['checksum']}"
+
+
+def _sample_users(sample: float, seed: int) -> list[int]:
+    user_ids = list_user_ids()
+    if sample >= 1.0:
+        return user_ids
+    k = max(1, round(len(user_ids) * sample)) if user_ids else 0
+    return sorted(random.Random(seed).sample(user_ids, k))
+
+
+def _build_dataset(sample: float, seed: int) -> dict:
+    """
+    Load the sampled users' delays oldest first and precompute everything
+    that does not depend on the scoring parameters.
+    """
+    columns = {name: [] for name in (
+        "user_index", "reasons", "delay_counts", "priorities", "hours_left",
+        "has_proof", "is_after_deadline", "ai_scores", *_STATIC_FLAGS,
+    )}
+    users = 0
+    for _, rows in iter_user_delays(_sample_users(sample, seed)):
+        state = None
+        for row in rows:
+            inputs = delay_inputs(row)
+            # Risk bands are left as None placeholders here, so escalation never
+            # fires and these are exactly the parameter-independent flags
+            flags = run_pattern_detection_from_state(
+                inputs['reason'], state, inputs['deadline_hours_left'], inputs['is_after_deadline']
+            )
+            columns["user_index"].append(users)
+            columns["reasons"].append(inputs['reason'])
+            columns["delay_counts"].append(state['total_count'] if state else 0)
+            columns["priorities"].append(inputs['priority'])
+            columns["hours_left"].append(inputs['hours_left'])
+            columns["has_proof"].append(inputs['has_proof'])
+            columns["is_after_deadline"].append(inputs['is_after_deadline'])
+            columns["ai_scores"].append(inputs['ai_score'])
+            for flag in _STATIC_FLAGS:
+                columns[flag].append(flag in flags)
+            state = advance_pattern_state(
+                state, inputs['reason'], None, inputs['is_after_deadline'], inputs['deadline_hours_left']
+            )
+        users += 1
+
+    columns["word_counts"], columns["generic_hits"] = text_columns(columns.pop("reasons"))
+    columns["users"] = users
+    return columns
+
+
+def load_dataset(sample: float = 1.0, seed: int = 42, fingerprint: str | None = None) -> dict:
+    """Dataset for a sample spec, reused for DATASET_TTL_SECONDS while the delays are unchanged."""
+    key = (sample, seed, fingerprint or dataset_fingerprint())
+    with _dataset_lock:
+        cached = _datasets.get(key)
+        if cached and time.monotonic() - cached[0] < DATASET_TTL_SECONDS:
+            return cached[1]
+        dataset = _build_dataset(sample, seed)
+        _datasets.clear()  # one sample spec at a time keeps memory bounded
+        _datasets[key] = (time.monotonic(), dataset)
+        return dataset
+
+
+# ---------------------------------------------------------------------------
+# Simulation
+# ---------------------------------------------------------------------------
+
+def _replay(dataset: dict, params: ScoringParams, penalties: dict):
+    """Final scores and risk bands for every delay under the given rules."""
+    import numpy as np
+
+    base = calculate_authenticity_scores_batch(
+        dataset["word_counts"], dataset["generic_hits"], dataset["delay_counts"],
+        dataset["priorities"], dataset["hours_left"], dataset["has_proof"],
+        dataset["is_after_deadline"], dataset["ai_scores"], params=params,
+    ).total
+    static_penalty = sum(np.asarray(dataset[flag], dtype=np.int64) * penalties[flag] for flag in _STATIC_FLAGS)
+    pre_escalation = (base - static_penalty).tolist()
+
+    # Escalation looks at the user's previous risk bands, so replay in order
+    escalation_penalty = penalties["risk_escalation"]
+    scores, risks = [], []
+    recent, current_user = [], None
+    for user, pre in zip(dataset["user_index"], pre_escalation):
+        if user != current_user:
+            recent, current_user = [], user
+        score = max(pre - (escalation_penalty if detect_risk_escalation(recent) else 0), 0)
+        risk = ("Low" if score >= params.threshold_low
+                else "Medium" if score >= params.threshold_medium else "High")
+        scores.append(score)
+        risks.append(risk)
+        recent = [risk] + recent[:RISK_WINDOW - 1]
+    return np.asarray(scores), np.asarray(risks)
+
+
+def _distribution(scores, risks) -> dict:
+    import numpy as np
+
+    n = len(scores)
+    counts = {level: int((risks == level).sum()) for level in _RISK_LEVELS}
+    return {
+        "risk_counts": counts,
+        "risk_share": {level: round(c / n * 100, 2) if n else 0.0 for level, c in counts.items()},
+        "mean_score": round(float(scores.mean()), 2) if n else 0.0,
+        "score_histogram": np.histogram(scores, bins=10, range=(0, 100))[0].tolist(),
+    }
+
+
+def run_simulation(overrides: dict | None = None, pattern_penalties: dict | None = None,
+                   sample: float = 1.0, seed: int = 42, use_cache: bool = True) -> dict:
+    """
+    Simulate candidate rules against the live ones over the sampled history.
+
+    Returns baseline and candidate distributions, their deltas (percentage
+    points for shares) and the risk-band transition counts.
+    """
+    if not 0 < sample <= 1:
+        raise WhatIfServiceError("sample must be in (0, 1]")
+    params, penalties = parse_params(overrides, pattern_penalties)
+    fingerprint = dataset_fingerprint()
+    sim_id = simulation_id(params, penalties, sample, seed, fingerprint)
+
+    if use_cache:
+        cached = get_cached_result(sim_id)
+        if cached:
+            return cached
+
+    started = time.perf_counter()
+    dataset = load_dataset(sample, seed, fingerprint)
+    base_scores, base_risks = _replay(dataset, DEFAULT_PARAMS, dict(PATTERN_PENALTIES))
+    cand_scores, cand_risks = _replay(dataset, params, penalties)
+
+    baseline, candidate = _distribution(base_scores, base_risks), _distribution(cand_scores, cand_risks)
+    transitions = {}
+    for old, new in zip(base_risks.tolist(), cand_risks.tolist()):
+        if old != new:
+            transitions[f"{old}->{new}"] = transitions.get(f"{old}->{new}", 0) + 1
+
+    result = {
+        "id": sim_id,
+        "status": "done",
+        "overrides": overrides or {},
+        "pattern_penalties": pattern_penalties or {},
+        "sample": sample,
+        "seed": seed,
+        "users": dataset["users"],
+        "delays": len(base_scores),
+        "baseline": baseline,
+        "candidate": candidate,
+        "delta": {
+            "risk_counts": {lvl: candidate["risk_counts"][lvl] - baseline["risk_counts"][lvl] for lvl in _RISK_LEVELS},
+            "risk_share_pp": {lvl: round(candidate["risk_share"][lvl] - baseline["risk_share"][lvl], 2)
+                              for lvl in _RISK_LEVELS},
+            "mean_score": round(candidate["mean_score"] - baseline["mean_score"], 2),
+        },
+        "transitions": transitions,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    _store_result(result)
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Result cache (disk) + background worker
+# ---------------------------------------------------------------------------
+
+def _cache_path(sim_id: str) -> str:
+    return os.path.join(WHATIF_CACHE_DIR, f"{sim_id}.json")
+
+
+def get_cached_result(sim_id: str) -> dict | None:
+    try:
+        with open(_cache_path(sim_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _store_result(result: dict) -> None:
+    os.makedirs(WHATIF_CACHE_DIR, exist_ok=True)
+    tmp = _cache_path(result["id"]) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp, _cache_path(result["id"]))
+
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whatif")
+_jobs: dict = {}
+_jobs_lock = threading.Lock()
+
+
+def submit_simulation(overrides: dict | None = None, pattern_penalties: dict | None = None,
+                      sample: float = 1.0, seed: int = 42) -> dict:
+    """
+    Start (or reuse) a simulation on the background worker.
+
+    Returns the cached result if there is one, otherwise {"id", "status": "running"}.
+    Parameters are validated up front so bad input fails the request, not the job.
+    """
+    if not 0 < sample <= 1:
+        raise WhatIfServiceError("sample must be in (0, 1]")
+    params, penalties = parse_params(overrides, pattern_penalties)
+    sim_id = simulation_id(params, penalties, sample, seed, dataset_fingerprint())
+
+    cached = get_cached_result(sim_id)
+    if cached:
+        return cached
+
+    with _jobs_lock:
+        job = _jobs.get(sim_id)
+        if job is None or (job.done() and job.exception() is not None):
+            _jobs[sim_id] = _executor.submit(run_simulation, overrides, pattern_penalties, sample, seed)
+    return {"id": sim_id, "status": "running"}
+
+
+def get_simulation(sim_id: str) -> dict | None:
+    """Result, running/failed status, or None if this id is unknown here."""
+    cached = get_cached_result(sim_id)
+    if cached:
+        return cached
+    with _jobs_lock:
+        job = _jobs.get(sim_id)
+    if job is None:
+        return None
+    if not job.done():
+        return {"id": sim_id, "status": "running"}
+    error = job.exception()
+    if error is not None:
+        logger.error("What-if simulation %s failed: %s", sim_id, error)
+        return {"id": sim_id, "status": "failed", "error": str(error)}
+    return job.result()
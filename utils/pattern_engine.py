@@ -1,13 +1,21 @@
 from difflib import SequenceMatcher
 from datetime import datetime
+from utils.phrase_matcher import PHRASE_LISTS, matcher as phrase_matcher
 
-COMMON_PHRASES = [
-    "not feeling well",
-    "network issue",
-    "personal reason",
-    "system problem",
-    "unexpected issue"
-]
+# Optional C accelerator for repeated-excuse detection (pip install rapidfuzz).
+try:
+    from rapidfuzz.fuzz import ratio as _indel_ratio
+except ImportError:
+    _indel_ratio = None
+
+REPEAT_SIMILARITY_THRESHOLD = 0.85
+
+# Ring-buffer sizes for user_pattern_state (see repository.delays_repo).
+RISK_WINDOW   = 5    # recent risk levels checked for escalation
+REASON_WINDOW = 20   # recent reasons checked for repeats
+
+# Loaded from utils/phrase_lists.json ("common_phrase") via the shared matcher.
+COMMON_PHRASES = list(PHRASE_LISTS["common_phrase"])
 
 PATTERN_PENALTIES = {
     "repeated_excuse": 10,
@@ -21,20 +29,47 @@ def similarity(a: str, b: str) -> float:
     if not a or not b: return 0.0
     return SequenceMatcher(None, a.lower(), b.lower()).ratio()
 
-def detect_repeated_excuse(current_reason: str, past_reasons: list) -> bool:
+def detect_repeated_excuse(current_reason: str, past_reasons: list, threshold: float = REPEAT_SIMILARITY_THRESHOLD) -> bool:
+    """
+    True if any past reason has SequenceMatcher ratio > threshold with the current one.
+
+    Same decisions as calling similarity() per pair, but most pairs are
+    rejected by cheap upper bounds before the quadratic ratio() runs:
+      1. length bound      2*min(la, lb) / (la + lb)
+      2. Indel ratio       2*LCS / (la + lb) via rapidfuzz (C), if installed
+      3. quick_ratio()     character-multiset bound
+    Each bound is >= ratio(), so a pair failing any of them cannot match.
+    Sequence order matches similarity(current, old) since ratio() is not
+    strictly symmetric.
+    """
+    if not current_reason:
+        return False
+
+    current = current_reason.lower()
+    lc = len(current)
+    matcher = SequenceMatcher(None)
+    matcher.set_seq1(current)
+    cutoff = threshold * 100 - 1e-6
+
     for old in past_reasons:
-        if old and similarity(current_reason, old) > 0.85:
+        if not old:
+            continue
+        old = old.lower()
+        lo = len(old)
+        if 2.0 * min(lc, lo) / (lc + lo) <= threshold:
+            continue
+        if _indel_ratio is not None and not _indel_ratio(current, old, score_cutoff=cutoff):
+            continue
+        matcher.set_seq2(old)
+        if matcher.quick_ratio() <= threshold:
+            continue
+        if matcher.ratio() > threshold:
             return True
     return False
 
 def detect_phrase_reuse(reason: str) -> list:
-    hits = []
-    if not reason: return hits
-    text = reason.lower()
-    for phrase in COMMON_PHRASES:
-        if phrase in text:
-            hits.append(phrase)
-    return hits
+    if not reason: return []
+    return sorted(phrase_matcher.hits_for(reason, "common_phrase"))
 
 def detect_late_submission_pattern(delays: list) -> bool:
     if not delays or len(delays) < 3:
@@ -106,9 +141,12 @@ def detect_deadline_edge_abuse(hours_left_list: list) -> bool:
     valid_hours = [h for h in hours_left_list if h is not None]
     if not valid_hours: return False
     
-    edge_cases = [h for h in valid_hours if 0 <= h <= 1]
+    edge_cases = [h for h in valid_hours if is_deadline_edge(h)]
     return (len(edge_cases) / len(valid_hours)) > 0.6
 
+def is_deadline_edge(hours_left) -> bool:
+    return hours_left is not None and 0 <= hours_left <= 1
+
 def run_pattern_detection(current_reason: str, history: list, hours_left_current: int, is_after_deadline_current: bool) -> list:
     """
     Run all pattern checks.
@@ -173,6 +211,59 @@ def run_pattern_detection(current_reason: str, history: list, hours_left_current
 
     return flags
 
+def run_pattern_detection_from_state(current_reason: str, state: dict | None, hours_left_current, is_after_deadline_current: bool) -> list:
+    """
+    Run all pattern checks against the user's user_pattern_state row.
+
+    Same checks as run_pattern_detection, but the late-submission and
+    deadline-edge ratios use counters over the full history instead of the
+    last few delays, and repeats/escalation use the state's ring buffers.
+    state is None for a user's first delay.
+    """
+    state = state or {}
+    flags = []
+
+    if detect_repeated_excuse(current_reason, state.get("recent_reasons") or []):
+        flags.append("repeated_excuse")
+
+    if detect_phrase_reuse(current_reason):
+        flags.append("generic_phrase_reuse")
+
+    # Late Submission (full history + current)
+    total = state.get("total_count", 0) + 1
+    late = state.get("late_count", 0) + (1 if is_after_deadline_current else 0)
+    if total >= 3 and late / total > 0.7:
+        flags.append("late_submission_pattern")
+
+    # Risk Escalation (past trend only; current risk depends on these flags)
+    if detect_risk_escalation(list(state.get("recent_risks") or [])):
+        flags.append("risk_escalation")
+
+    # Deadline Edge Abuse (full history + current)
+    timed = state.get("timed_count", 0) + (1 if hours_left_current is not None else 0)
+    edge = state.get("edge_count", 0) + (1 if is_deadline_edge(hours_left_current) else 0)
+    if timed and edge / timed > 0.6:
+        flags.append("deadline_edge_abuse")
+
+    return flags
+
+def advance_pattern_state(state: dict | None, reason: str, risk_level: str, is_after_deadline: bool, hours_left) -> dict:
+    """
+    Return the state after folding in one more delay.
+
+    Python mirror of the user_pattern_state upsert in
+    repository.delays_repo.create_delay, used when replaying history offline.
+    """
+    state = state or {}
+    return {
+        "total_count": state.get("total_count", 0) + 1,
+        "late_count":  state.get("late_count", 0) + (1 if is_after_deadline else 0),
+        "edge_count":  state.get("edge_count", 0) + (1 if is_deadline_edge(hours_left) else 0),
+        "timed_count": state.get("timed_count", 0) + (1 if hours_left is not None else 0),
+        "recent_risks":   ([risk_level] + list(state.get("recent_risks") or []))[:RISK_WINDOW],
+        "recent_reasons": ([reason] + list(state.get("recent_reasons") or []))[:REASON_WINDOW],
+    }
+
 def apply_pattern_penalty(score: int, flags: list) -> int:
     penalty = 0
     for f in flags:
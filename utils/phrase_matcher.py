@@ -0,0 +1,120 @@
+"""
+Shared Phrase Matcher
+=====================
+One compiled matcher for every phrase/keyword list used in excuse scoring:
+
+  Class            Used by
+  ---------------  -------------------------------------------
+  common_phrase    pattern_engine.detect_phrase_reuse
+  generic_phrase   scoring_engine.score_text_quality
+  weather/health/  analytics_service reason categories
+  labor/material
+
+Lists load once at import from utils/phrase_lists.json, or from the file
+named by PHRASE_LISTS_PATH, so they can grow to thousands of entries.
+
+All phrases are compiled into a single trie-shaped regex, so a scan is one
+pass over the text whose cost barely depends on the number of phrases.
+Matching is case-insensitive substring matching (the same semantics as
+`phrase in text.lower()`), including phrases nested in or overlapping others.
+"""
+
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phrase_lists.json")
+
+
+def load_phrase_lists(path: str | None = None) -> dict[str, tuple[str, ...]]:
+    """Read {class: [phrases]} from JSON, lowercased and de-duplicated."""
+    path = path or os.getenv("PHRASE_LISTS_PATH") or _DEFAULT_PATH
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    lists = {}
+    for cls, phrases in raw.items():
+        cleaned = {p.strip().lower() for p in phrases if isinstance(p, str) and p.strip()}
+        lists[cls] = tuple(sorted(cleaned))
+    return lists
+
+
+def _trie_regex(phrases) -> str:
+    """
+    Compile phrases into a prefix-trie regex, e.g. ill|illness → ill(?:ness)?
+
+    Children of a node start with distinct characters, so the engine picks
+    at most one branch per character and greedy optionals give the longest
+    phrase starting at each position.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if terminal else body
+
+    return emit(trie)
+
+
+class PhraseMatcher:
+    """Single-pass multi-class substring matcher."""
+
+    def __init__(self, phrase_lists: dict[str, tuple[str, ...]]):
+        self.phrase_lists = phrase_lists
+
+        classes_by_phrase: dict[str, set[str]] = {}
+        for cls, phrases in phrase_lists.items():
+            for phrase in phrases:
+                classes_by_phrase.setdefault(phrase, set()).add(cls)
+
+        # The scan reports the longest phrase starting at each position; any
+        # shorter phrase starting there is a prefix of it, so expand each
+        # phrase to (class, phrase) pairs for all of its phrase prefixes.
+        self._expansion: dict[str, tuple[tuple[str, str], ...]] = {}
+        for phrase in classes_by_phrase:
+            hits = [
+                (cls, prefix)
+                for i in range(1, len(phrase) + 1)
+                if (prefix := phrase[:i]) in classes_by_phrase
+                for cls in classes_by_phrase[prefix]
+            ]
+            self._expansion[phrase] = tuple(hits)
+
+        # Zero-width lookahead so matches may overlap: one attempt per position.
+        self._regex = re.compile("(?=(" + _trie_regex(classes_by_phrase) + "))") if classes_by_phrase else None
+        self.hits = lru_cache(maxsize=2048)(self._hits)
+
+    def _hits(self, text: str) -> dict[str, frozenset[str]]:
+        found: dict[str, set[str]] = {}
+        if text and self._regex is not None:
+            seen = set()
+            for m in self._regex.finditer(text.lower()):
+                phrase = m.group(1)
+                if phrase in seen:
+                    continue
+                seen.add(phrase)
+                for cls, hit in self._expansion[phrase]:
+                    found.setdefault(cls, set()).add(hit)
+        return {cls: frozenset(v) for cls, v in found.items()}
+
+    def hits_for(self, text: str, cls: str) -> frozenset[str]:
+        """Phrases of one class found in text (shares the cached scan)."""
+        return self.hits(text).get(cls, frozenset())
+
+
+PHRASE_LISTS = load_phrase_lists()
+matcher = PhraseMatcher(PHRASE_LISTS)
+logger.debug("Phrase matcher compiled: %d classes, %d phrases",
+             len(PHRASE_LISTS), sum(len(v) for v in PHRASE_LISTS.values()))
@@ -12,10 +12,15 @@ Computes excuse authenticity and risk level from five weighted signals:
   Timing behaviour         15 %
 
 An optional AI signal (0–15 pts) may be merged into the final score.
+
+calculate_authenticity_scores_batch scores many excuses at once from
+columnar inputs (NumPy); it is kept bit-identical to the scalar path.
 """
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+
+from utils.phrase_matcher import PHRASE_LISTS, matcher as phrase_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -34,13 +39,8 @@ _MAX_AI_SIGNAL = 15     # ceiling on external AI contribution
 # ---------------------------------------------------------------------------
 
 # Phrases are matched as substrings; see score_text_quality for caveats.
-_GENERIC_PHRASES = frozenset([
-    "not feeling well",
-    "network issue",
-    "personal reasons",
-    "busy schedule",
-    "unexpected work",
-])
+# The list lives in utils/phrase_lists.json ("generic_phrase").
+_GENERIC_PHRASES = frozenset(PHRASE_LISTS["generic_phrase"])
 
 _TEXT_MAX          = 30
 _SHORT_WORD_CUTOFF = 5
@@ -71,7 +71,7 @@ def score_text_quality(reason: str) -> int:
     elif word_count < _MEDIUM_WORD_CUTOFF:
         score -= _MEDIUM_PENALTY
 
-    matched_phrases = {p for p in _GENERIC_PHRASES if p in normalised}
+    matched_phrases = phrase_matcher.hits_for(reason, "generic_phrase")
     score -= len(matched_phrases) * _GENERIC_PENALTY
 
     return max(score, 0)
@@ -81,15 +81,17 @@ def score_text_quality(reason: str) -> int:
 # Delay history signal
 # ---------------------------------------------------------------------------
 
+# (max prior delays, score) tiers, checked in order; shared with the batch scorer
+_HISTORY_TIERS = ((0, 20), (2, 14), (5, 8))
+_HISTORY_FLOOR = 3
+
+
 def score_delay_history(delay_count: int) -> int:
     """Score delay history out of 20. More prior delays → lower score."""
-    if delay_count <= 0:
-        return 20
-    if delay_count <= 2:
-        return 14
-    if delay_count <= 5:
-        return 8
-    return 3
+    for max_delays, score in _HISTORY_TIERS:
+        if delay_count <= max_delays:
+            return score
+    return _HISTORY_FLOOR
 
 
 # ---------------------------------------------------------------------------
@@ -100,6 +102,13 @@ _PRIORITY_NORMALISE = {'high': 'High', 'medium': 'Medium', 'low': 'Low'}
 _VALID_PRIORITIES   = frozenset(_PRIORITY_NORMALISE.values())
 
 
+_TASK_MAX                = 20
+_HIGH_PRIORITY_HOURS     = 12
+_MEDIUM_PRIORITY_HOURS   = 24
+_HIGH_PRIORITY_PENALTY   = 12   # High priority, < 12 h left
+_MEDIUM_PRIORITY_PENALTY = 6    # Medium priority, < 24 h left
+
+
 def score_task_context(priority: str, hours_left: int) -> int:
     """
     Score task priority and deadline context out of 20.
@@ -115,11 +124,11 @@ def score_task_context(priority: str, hours_left: int) -> int:
     if raw and normalised_priority is None:
         logger.warning("score_task_context: unrecognised priority %r — treating as Low", raw)
 
-    score = 20
-    if normalised_priority == 'High' and hours_left < 12:
-        score -= 12
-    elif normalised_priority == 'Medium' and hours_left < 24:
-        score -= 6
+    score = _TASK_MAX
+    if normalised_priority == 'High' and hours_left < _HIGH_PRIORITY_HOURS:
+        score -= _HIGH_PRIORITY_PENALTY
+    elif normalised_priority == 'Medium' and hours_left < _MEDIUM_PRIORITY_HOURS:
+        score -= _MEDIUM_PRIORITY_PENALTY
 
     return max(score, 0)
 
@@ -128,24 +137,41 @@ def score_task_context(priority: str, hours_left: int) -> int:
 # Proof attachment signal
 # ---------------------------------------------------------------------------
 
+_PROOF_SCORE    = 15
+_NO_PROOF_SCORE = 5
+
+
 def score_proof_attachment(has_proof: bool) -> int:
     """Score proof attachment out of 15."""
-    return 15 if has_proof else 5
+    return _PROOF_SCORE if has_proof else _NO_PROOF_SCORE
 
 
 # ---------------------------------------------------------------------------
 # Timing signal
 # ---------------------------------------------------------------------------
 
+_ON_TIME_SCORE = 15
+_LATE_SCORE    = 5
+
+
 def score_timing(is_after_deadline: bool) -> int:
     """Score submission timing out of 15. Late submissions score lower."""
-    return 5 if is_after_deadline else 15
+    return _LATE_SCORE if is_after_deadline else _ON_TIME_SCORE
 
 
 # ---------------------------------------------------------------------------
 # Composite scorer
 # ---------------------------------------------------------------------------
 
+def risk_level_for(score: int) -> str:
+    """Map a 0–100 authenticity score to 'Low' | 'Medium' | 'High' risk."""
+    if score >= THRESHOLD_LOW:
+        return 'Low'
+    if score >= THRESHOLD_MEDIUM:
+        return 'Medium'
+    return 'High'
+
+
 @dataclass(frozen=True)
 class ScoreBreakdown:
     text:      int
@@ -182,16 +208,159 @@ def calculate_authenticity_score(
 
     clamped_ai = max(0, min(ai_score, _MAX_AI_SIGNAL))
     total      = min(text + history + task + proof + timing + clamped_ai, _MAX_SCORE)
-
-    if total >= THRESHOLD_LOW:
-        risk = 'Low'
-    elif total >= THRESHOLD_MEDIUM:
-        risk = 'Medium'
-    else:
-        risk = 'High'
+    risk       = risk_level_for(total)
 
     return ScoreBreakdown(
         text=text, history=history, task=task,
         proof=proof, timing=timing, ai_signal=clamped_ai,
         total=total, risk=risk,
     )
+
+
+# ---------------------------------------------------------------------------
+# Batch scorer — columnar inputs, NumPy. Used by backfills / what-if runs.
+# ---------------------------------------------------------------------------
+
+NO_TEXT = -1   # word count marking a missing reason (text score 0, as in the scalar path)
+
+
+@dataclass(frozen=True)
+class ScoringParams:
+    """
+    Tunable weights for the batch scorer. Defaults are the live rules above;
+    the what-if simulator passes alternatives without touching them.
+    """
+    threshold_low:           int = THRESHOLD_LOW
+    threshold_medium:        int = THRESHOLD_MEDIUM
+    short_penalty:           int = _SHORT_PENALTY
+    medium_penalty:          int = _MEDIUM_PENALTY
+    generic_penalty:         int = _GENERIC_PENALTY
+    high_priority_penalty:   int = _HIGH_PRIORITY_PENALTY
+    medium_priority_penalty: int = _MEDIUM_PRIORITY_PENALTY
+    proof_score:             int = _PROOF_SCORE
+    no_proof_score:          int = _NO_PROOF_SCORE
+    on_time_score:           int = _ON_TIME_SCORE
+    late_score:              int = _LATE_SCORE
+    max_ai_signal:           int = _MAX_AI_SIGNAL
+
+
+DEFAULT_PARAMS = ScoringParams()
+
+
+@dataclass(frozen=True)
+class ScoreBreakdownBatch:
+    """Column-wise ScoreBreakdown: one NumPy array per field, all the same length."""
+    text:      "np.ndarray"
+    history:   "np.ndarray"
+    task:      "np.ndarray"
+    proof:     "np.ndarray"
+    timing:    "np.ndarray"
+    ai_signal: "np.ndarray"
+    total:     "np.ndarray"
+    risk:      "np.ndarray"
+
+    def __len__(self) -> int:
+        return len(self.total)
+
+    def row(self, i: int) -> ScoreBreakdown:
+        """The i-th result as the scalar path's ScoreBreakdown."""
+        values = {f.name: int(getattr(self, f.name)[i]) for f in fields(self) if f.name != 'risk'}
+        return ScoreBreakdown(**values, risk=str(self.risk[i]))
+
+
+def text_columns(reasons) -> tuple[list[int], list[int]]:
+    """
+    Per-reason (word_counts, generic_phrase_hits) for the batch scorer.
+
+    Phrase matching stays in Python (shared matcher, cached per text);
+    a falsy reason gets word count NO_TEXT.
+    """
+    word_counts, generic_hits = [], []
+    for reason in reasons:
+        if not reason:
+            word_counts.append(NO_TEXT)
+            generic_hits.append(0)
+        else:
+            word_counts.append(len(reason.lower().split()))
+            generic_hits.append(len(phrase_matcher.hits_for(reason, "generic_phrase")))
+    return word_counts, generic_hits
+
+
+def _priority_codes(priorities, np):
+    """Map priorities to 2 = High, 1 = Medium, 0 = Low/unknown, normalising each distinct value once."""
+    values, inverse = np.unique(np.asarray([p or '' for p in priorities], dtype=object), return_inverse=True)
+    codes = np.empty(len(values), dtype=np.int64)
+    for i, raw in enumerate(values):
+        raw = raw.strip()
+        normalised = _PRIORITY_NORMALISE.get(raw.lower())
+        if raw and normalised is None:
+            logger.warning("score_task_context: unrecognised priority %r — treating as Low", raw)
+        codes[i] = {'High': 2, 'Medium': 1}.get(normalised, 0)
+    return codes[inverse.reshape(-1)]
+
+
+def risk_levels_for(scores, params: ScoringParams = DEFAULT_PARAMS):
+    """Vectorised risk_level_for, with the thresholds taken from params."""
+    import numpy as np
+
+    scores = np.asarray(scores)
+    return np.where(scores >= params.threshold_low, 'Low',
+                    np.where(scores >= params.threshold_medium, 'Medium', 'High'))
+
+
+def calculate_authenticity_scores_batch(
+    word_counts,
+    generic_hits,
+    delay_counts,
+    priorities,
+    hours_left,
+    has_proof,
+    is_after_deadline,
+    ai_scores=None,
+    params: ScoringParams = DEFAULT_PARAMS,
+) -> ScoreBreakdownBatch:
+    """
+    Vectorised calculate_authenticity_score over equal-length columns.
+
+    word_counts / generic_hits come from text_columns(reasons). With the
+    default params every sub-score, total and risk band matches the scalar
+    path exactly; benchmarks/scoring_batch.py checks parity and measures
+    throughput.
+    """
+    import numpy as np
+
+    words   = np.asarray(word_counts, dtype=np.int64)
+    hits    = np.asarray(generic_hits, dtype=np.int64)
+    delays  = np.asarray(delay_counts, dtype=np.int64)
+    hours   = np.asarray(hours_left, dtype=np.int64)
+    proof   = np.asarray(has_proof, dtype=bool)
+    late    = np.asarray(is_after_deadline, dtype=bool)
+    ai      = np.zeros(len(words), dtype=np.int64) if ai_scores is None else np.asarray(ai_scores, dtype=np.int64)
+
+    text = _TEXT_MAX - np.where(words < _SHORT_WORD_CUTOFF, params.short_penalty,
+                                np.where(words < _MEDIUM_WORD_CUTOFF, params.medium_penalty, 0))
+    text = np.maximum(text - hits * params.generic_penalty, 0)
+    text = np.where(words == NO_TEXT, 0, text)
+
+    history = np.select([delays <= max_delays for max_delays, _ in _HISTORY_TIERS],
+                        [score for _, score in _HISTORY_TIERS], default=_HISTORY_FLOOR)
+
+    priority = _priority_codes(priorities, np)
+    task = _TASK_MAX - np.where(
+        (priority == 2) & (hours < _HIGH_PRIORITY_HOURS), params.high_priority_penalty,
+        np.where((priority == 1) & (hours < _MEDIUM_PRIORITY_HOURS), params.medium_priority_penalty, 0),
+    )
+    task = np.maximum(task, 0)
+
+    proof_score  = np.where(proof, params.proof_score, params.no_proof_score)
+    timing_score = np.where(late, params.late_score, params.on_time_score)
+    clamped_ai   = np.clip(ai, 0, params.max_ai_signal)
+
+    total = np.minimum(text + history + task + proof_score + timing_score + clamped_ai, _MAX_SCORE)
+    risk  = risk_levels_for(total, params)
+
+    return ScoreBreakdownBatch(
+        text=text, history=history, task=task,
+        proof=proof_score, timing=timing_score, ai_signal=clamped_ai,
+        total=total, risk=risk,
+    )
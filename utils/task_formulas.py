@@ -6,7 +6,7 @@ state, not excuse authenticity. Both modules may be imported independently.
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -79,3 +79,22 @@ def is_task_delayed(elapsed_minutes: int, estimated_minutes: int) -> bool:
 def calculate_task_status(elapsed_minutes: int, estimated_minutes: int) -> str:
     """Return 'Completed' or 'Completed Over Time' based on elapsed vs estimated."""
     return "Completed" if elapsed_minutes <= estimated_minutes else "Completed Over Time"
+
+
+def deadline_position(deadline, at=None) -> tuple[int | None, bool]:
+    """
+    Return (whole hours left until deadline, is_after_deadline) as of `at`.
+
+    `at` defaults to now; the delay-rescoring job passes the original
+    submission time instead. A DATE deadline counts from midnight. Returns
+    (None, False) if the deadline is missing or unparseable.
+    """
+    if isinstance(deadline, date) and not isinstance(deadline, datetime):
+        deadline_dt = datetime.combine(deadline, datetime.min.time())
+    else:
+        deadline_dt = _parse_datetime(deadline)
+    if deadline_dt is None:
+        return None, False
+
+    time_diff = deadline_dt - (_parse_datetime(at) if at is not None else datetime.now())
+    return int(time_diff.total_seconds() / 3600), time_diff.total_seconds() < 0